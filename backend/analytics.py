@@ -0,0 +1,283 @@
+from flask import Blueprint, request, jsonify, g
+from datetime import datetime, timezone
+import threading
+import time
+import os
+import numpy as np
+from auth import token_required, admin_required
+from etag import table_version
+from paging import fetch_all
+
+analytics_bp = Blueprint('analytics', __name__)
+
+STATUSES = ['not_started', 'in_progress', 'completed', 'cancelled']
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+COMPLETED = STATUS_CODES['completed']
+CANCELLED = STATUS_CODES['cancelled']
+
+SNAPSHOT_TASK_COLUMNS = "id, objective_id, assigned_to, assigned_to_multiple, status, priority, due_date, completion_percentage, created_at, completed_at"
+SECONDS_PER_DAY = 86400.0
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def epoch_seconds(timestamp):
+    """ISO timestamp -> UTC epoch seconds (NaN when missing or unparseable)"""
+    if not timestamp:
+        return np.nan
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return np.nan
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def epoch_day(date_value):
+    """'YYYY-MM-DD' (or a timestamp) -> days since epoch (NaN when missing)"""
+    if not date_value:
+        return np.nan
+    try:
+        return float(np.datetime64(str(date_value)[:10], 'D').astype(np.int64))
+    except ValueError:
+        return np.nan
+
+def safe_ratio(numerator, denominator):
+    """Element-wise numerator / denominator with 0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def rounded(values, digits=2):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+class TaskSnapshot:
+    """Column arrays of every task, indexed by position.
+
+    Employees and objectives are dictionary-encoded (``employee_ids[i]`` is the
+    id behind code ``i``, -1 means none) so group-bys are ``np.bincount`` calls.
+    Tasks with several assignees appear once per assignee in the
+    ``assignment_*`` arrays.
+    """
+
+    def __init__(self, tasks, employees, objectives):
+        self.built_at = time.time()
+        self.employee_ids = [e['id'] for e in employees]
+        self.employees = employees
+        self.objective_ids = [o['id'] for o in objectives]
+        self.objectives = objectives
+        employee_codes = {employee_id: code for code, employee_id in enumerate(self.employee_ids)}
+        objective_codes = {objective_id: code for code, objective_id in enumerate(self.objective_ids)}
+
+        count = len(tasks)
+        self.status = np.fromiter((STATUS_CODES.get(t.get('status'), 0) for t in tasks), dtype=np.int8, count=count)
+        self.priority = np.fromiter((PRIORITY_CODES.get(t.get('priority'), 1) for t in tasks), dtype=np.int8, count=count)
+        self.objective = np.fromiter((objective_codes.get(t.get('objective_id'), -1) for t in tasks), dtype=np.int32, count=count)
+        self.completion = np.fromiter((t.get('completion_percentage') or 0 for t in tasks), dtype=np.float64, count=count)
+        self.due_day = np.fromiter((epoch_day(t.get('due_date')) for t in tasks), dtype=np.float64, count=count)
+        self.created = np.fromiter((epoch_seconds(t.get('created_at')) for t in tasks), dtype=np.float64, count=count)
+        self.completed = np.fromiter((epoch_seconds(t.get('completed_at')) for t in tasks), dtype=np.float64, count=count)
+
+        task_rows, assignees = [], []
+        for row, task in enumerate(tasks):
+            for employee_id in set(task.get('assigned_to_multiple') or []) | ({task['assigned_to']} if task.get('assigned_to') else set()):
+                code = employee_codes.get(employee_id)
+                if code is not None:
+                    task_rows.append(row)
+                    assignees.append(code)
+        self.assignment_task = np.asarray(task_rows, dtype=np.int64)
+        self.assignment_employee = np.asarray(assignees, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.status)
+
+    def derived(self, now=None, window_days=30):
+        """Per-task flags every report needs, computed once per request"""
+        now = now if now is not None else time.time()
+        today = np.floor(now / SECONDS_PER_DAY)
+        is_completed = self.status == COMPLETED
+        is_open = ~is_completed & (self.status != CANCELLED)
+        return {
+            'completed': is_completed,
+            'open': is_open,
+            'overdue': is_open & (self.due_day < today),
+            'recently_completed': is_completed & (self.completed >= now - window_days * SECONDS_PER_DAY),
+            'cycle_days': np.where(is_completed, (self.completed - self.created) / SECONDS_PER_DAY, np.nan)
+        }
+
+    def summary(self, window_days=30):
+        flags = self.derived(window_days=window_days)
+        status_counts = np.bincount(self.status, minlength=len(STATUSES))
+        priority_counts = np.bincount(self.priority, minlength=len(PRIORITIES))
+        open_count = int(flags['open'].sum())
+        cycle = flags['cycle_days'][~np.isnan(flags['cycle_days'])]
+        return {
+            'total_tasks': len(self),
+            'by_status': dict(zip(STATUSES, status_counts.tolist())),
+            'by_priority': dict(zip(PRIORITIES, priority_counts.tolist())),
+            'open_tasks': open_count,
+            'overdue_tasks': int(flags['overdue'].sum()),
+            'overdue_ratio': round(float(safe_ratio(flags['overdue'].sum(), open_count)), 4),
+            'completed_last_window': int(flags['recently_completed'].sum()),
+            'throughput_per_week': round(float(flags['recently_completed'].sum()) * 7 / window_days, 2),
+            'avg_cycle_time_days': round(float(cycle.mean()), 2) if cycle.size else None,
+            'median_cycle_time_days': round(float(np.median(cycle)), 2) if cycle.size else None,
+            'avg_completion_percentage': round(float(self.completion.mean()), 2) if len(self) else 0,
+            'window_days': window_days
+        }
+
+    def by_employee(self, window_days=30):
+        flags = self.derived(window_days=window_days)
+        rows, groups, size = self.assignment_task, self.assignment_employee, len(self.employee_ids)
+
+        def group_sum(values):
+            return np.bincount(groups, weights=values[rows].astype(np.float64), minlength=size)
+
+        assigned = np.bincount(groups, minlength=size)
+        completed = group_sum(flags['completed'])
+        open_tasks = group_sum(flags['open'])
+        overdue = group_sum(flags['overdue'])
+        recent = group_sum(flags['recently_completed'])
+        cycle = flags['cycle_days'][rows]
+        has_cycle = ~np.isnan(cycle)
+        cycle_total = np.bincount(groups[has_cycle], weights=cycle[has_cycle], minlength=size)
+        cycle_count = np.bincount(groups[has_cycle], minlength=size)
+        avg_cycle = np.where(cycle_count > 0, safe_ratio(cycle_total, cycle_count), np.nan)
+        avg_completion = safe_ratio(group_sum(self.completion), assigned)
+
+        throughput = recent * 7 / window_days
+        overdue_ratio = safe_ratio(overdue, open_tasks)
+        avg_cycle = rounded(avg_cycle)
+        avg_completion = rounded(avg_completion)
+        return [
+            {
+                'employee_id': employee['id'],
+                'name': employee.get('name'),
+                'department': employee.get('department'),
+                'assigned_tasks': int(assigned[code]),
+                'completed_tasks': int(completed[code]),
+                'open_tasks': int(open_tasks[code]),
+                'overdue_tasks': int(overdue[code]),
+                'overdue_ratio': round(float(overdue_ratio[code]), 4),
+                'completed_last_window': int(recent[code]),
+                'throughput_per_week': round(float(throughput[code]), 2),
+                'avg_cycle_time_days': avg_cycle[code],
+                'avg_completion_percentage': avg_completion[code]
+            }
+            for code, employee in enumerate(self.employees)
+        ]
+
+    def by_objective(self):
+        flags = self.derived()
+        linked = self.objective >= 0
+        groups, size = self.objective[linked], len(self.objective_ids)
+
+        def group_sum(values):
+            return np.bincount(groups, weights=values[linked].astype(np.float64), minlength=size)
+
+        total = np.bincount(groups, minlength=size)
+        completed = group_sum(flags['completed'])
+        overdue = group_sum(flags['overdue'])
+        completion_ratio = safe_ratio(completed, total)
+        avg_completion = safe_ratio(group_sum(self.completion), total)
+        return [
+            {
+                'objective_id': objective['id'],
+                'title': objective.get('title'),
+                'status': objective.get('status'),
+                'total_tasks': int(total[code]),
+                'completed_tasks': int(completed[code]),
+                'overdue_tasks': int(overdue[code]),
+                'completion_ratio': round(float(completion_ratio[code]), 4),
+                'avg_completion_percentage': round(float(avg_completion[code]), 2)
+            }
+            for code, objective in enumerate(self.objectives)
+        ]
+
+
+class SnapshotCache:
+    """Keeps one TaskSnapshot per worker and rebuilds it only when the tasks,
+    employees or objectives tables changed (checked at most every
+    ANALYTICS_SNAPSHOT_SECONDS)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.version = None
+        self.checked_at = 0
+        self.max_age = int(os.getenv('ANALYTICS_SNAPSHOT_SECONDS', '30'))
+
+    def get(self):
+        with self.lock:
+            if self.snapshot is not None and time.time() - self.checked_at < self.max_age:
+                return self.snapshot
+            supabase = get_supabase_client()
+            version = [table_version(supabase, table) for table in ("tasks", "employees", "objectives")]
+            if self.snapshot is None or version != self.version:
+                started = time.time()
+                tasks = fetch_all(lambda: supabase.table("tasks").select(SNAPSHOT_TASK_COLUMNS).order("id"))
+                employees = fetch_all(lambda: supabase.table("employees").select("id, name, department").eq("is_active", True).order("name").order("id"))
+                objectives = fetch_all(lambda: supabase.table("objectives").select("id, title, status").order("created_at", desc=True).order("id"))
+                self.snapshot = TaskSnapshot(tasks, employees, objectives)
+                self.version = version
+                print(f"📊 Analytics snapshot built: {len(tasks)} tasks in {(time.time() - started) * 1000:.0f}ms")
+            self.checked_at = time.time()
+            return self.snapshot
+
+
+snapshot_cache = SnapshotCache()
+
+def window_days_arg():
+    try:
+        return min(max(int(request.args.get('days', 30)), 1), 365)
+    except ValueError:
+        return 30
+
+# ============================================
+# ANALYTICS ENDPOINTS
+# ============================================
+
+@analytics_bp.route('/api/analytics/summary', methods=['GET'])
+@admin_required
+def get_analytics_summary():
+    """Org-wide task counts, overdue ratio, throughput and cycle time"""
+    try:
+        snapshot = snapshot_cache.get()
+        return jsonify({'success': True, 'summary': snapshot.summary(window_days_arg())})
+    except Exception as e:
+        print(f"❌ Error getting analytics summary: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/api/analytics/employees', methods=['GET'])
+@token_required
+def get_employee_analytics():
+    """Per-employee throughput, cycle time and overdue ratio (employees only get their own row)"""
+    try:
+        snapshot = snapshot_cache.get()
+        employees = snapshot.by_employee(window_days_arg())
+        if g.user.get('role') not in ('admin', 'superadmin'):
+            employees = [e for e in employees if e['employee_id'] == g.user.get('employee_id')]
+        return jsonify({'success': True, 'employees': employees})
+    except Exception as e:
+        print(f"❌ Error getting employee analytics: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/api/analytics/objectives', methods=['GET'])
+@admin_required
+def get_objective_analytics():
+    """Per-objective task counts and completion"""
+    try:
+        snapshot = snapshot_cache.get()
+        return jsonify({'success': True, 'objectives': snapshot.by_objective()})
+    except Exception as e:
+        print(f"❌ Error getting objective analytics: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
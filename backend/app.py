@@ -1,6 +1,7 @@
 from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 from auth import AuthManager, token_required, admin_required
+from response_cache import cached_response
 import os
 from dotenv import load_dotenv
 
@@ -10,7 +11,8 @@ def create_app():
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY')
     
-    CORS(app)
+    # Expose ETag so the frontend can send it back in If-Match
+    CORS(app, expose_headers=['ETag'])
     
     # Import and register employee routes
     try:
@@ -34,6 +36,28 @@ def create_app():
     def health_check():
         return jsonify({'status': 'healthy', 'service': 'ERP Backend API'})
     
+    # Request coalescing counters for this worker (see singleflight.py)
+    @app.route('/api/health/singleflight', methods=['GET'])
+    @admin_required
+    def singleflight_metrics():
+        from singleflight import singleflight
+        return jsonify({'success': True, 'pid': os.getpid(), 'queries': singleflight.metrics()})
+    
+    # Retention settings and the latest archive run in this worker (see notification_maintenance.py)
+    @app.route('/api/health/notification-maintenance', methods=['GET'])
+    @admin_required
+    def notification_maintenance_status():
+        from notification_maintenance import notification_maintenance as job
+        return jsonify({
+            'success': True,
+            'pid': os.getpid(),
+            'enabled': job.enabled,
+            'leader': job.leader.is_leader,
+            'archive': job.mode,
+            'retention_days': {'read': job.read_days, 'unread': job.unread_days},
+            'last_run': job.last_run
+        })
+    
     # Import and register task routes
     try:
         from task_routes import task_bp
@@ -50,6 +74,55 @@ def create_app():
     except Exception as e:
         print(f"❌ Failed to register OLD notification routes: {e}")
 
+    try:
+        from analytics import analytics_bp
+        app.register_blueprint(analytics_bp)
+        print("✅ Analytics routes registered successfully")
+    except Exception as e:
+        print(f"❌ Failed to register analytics routes: {e}")
+
+    try:
+        from bootstrap_routes import bootstrap_bp
+        app.register_blueprint(bootstrap_bp)
+        print("✅ Bootstrap route registered successfully")
+    except Exception as e:
+        print(f"❌ Failed to register bootstrap route: {e}")
+
+    # In-process task search index (built and kept in sync by a background thread)
+    if os.getenv('TASK_SEARCH_INDEX', 'true').lower() != 'false':
+        try:
+            from search_index import task_search_index
+            task_search_index.start_background_sync()
+            print("✅ Task search index sync started")
+        except Exception as e:
+            print(f"❌ Failed to start task search index: {e}")
+
+    # Due-date reminders (one worker per host fires them, see due_scheduler.py)
+    if os.getenv('DUE_SCHEDULER', 'true').lower() != 'false':
+        try:
+            from due_scheduler import due_scheduler
+            due_scheduler.start()
+            print("✅ Due-date scheduler started")
+        except Exception as e:
+            print(f"❌ Failed to start due-date scheduler: {e}")
+
+    # Optional local read replica (READ_REPLICA=true, see read_replica.py)
+    try:
+        from read_replica import read_replica
+        if read_replica.enabled:
+            read_replica.start()
+            print(f"✅ Read replica sync started ({read_replica.path})")
+    except Exception as e:
+        print(f"❌ Failed to start read replica: {e}")
+
+    # Optional notification retention job (NOTIFICATION_MAINTENANCE=true, see notification_maintenance.py)
+    try:
+        from notification_maintenance import notification_maintenance
+        if notification_maintenance.enabled:
+            notification_maintenance.start()
+            print(f"✅ Notification maintenance started ({notification_maintenance.mode} archive)")
+    except Exception as e:
+        print(f"❌ Failed to start notification maintenance: {e}")
 
 
     # Unified login endpoint
@@ -99,6 +172,7 @@ def create_app():
     # Employee profile endpoint
     @app.route('/api/employee/profile', methods=['GET'])
     @token_required
+    @cached_response(['employees'])
     def get_employee_profile():
         """Get employee profile (for employees) or all employees (for admin)"""
         try:
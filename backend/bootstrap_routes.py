@@ -0,0 +1,76 @@
+from flask import Blueprint, request, jsonify, g, current_app, copy_current_request_context
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import os
+from auth import token_required
+from read_replica import read_replica
+from response_cache import response_cache
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+# Section name -> endpoint whose JSON body is returned under that name
+BOOTSTRAP_SECTIONS = {
+    'profile': 'get_employee_profile',
+    'dashboard': 'tasks.get_dashboard',
+    'tasks': 'tasks.get_tasks',
+    'notifications': 'notifications.get_notifications',
+    'notification_count': 'notifications.get_notification_count'
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BOOTSTRAP_WORKERS', str(len(BOOTSTRAP_SECTIONS)))),
+    thread_name_prefix='bootstrap'
+)
+
+
+def run_section(endpoint, user):
+    """Call an endpoint's view body (without its auth/ETag decorators, but still
+    through its response cache or read replica) and return (status, json)"""
+    g.user = user
+    view = inspect.unwrap(
+        current_app.view_functions[endpoint],
+        stop=lambda f: f in response_cache.views or f in read_replica.views
+    )
+    response = current_app.make_response(view())
+    return response.status_code, response.get_json(silent=True)
+
+
+@bootstrap_bp.route('/api/bootstrap', methods=['GET'])
+@token_required
+def bootstrap():
+    """Everything the app needs after login in one response
+
+    The token is verified once here; the sections (profile, dashboard, tasks,
+    notifications, notification_count, or a subset via ?sections=a,b) run
+    concurrently and each comes back with the same body as its own endpoint.
+    A failing section is reported in ``errors`` without failing the others.
+    """
+    requested = request.args.get('sections')
+    if requested:
+        sections = [s.strip() for s in requested.split(',') if s.strip()]
+        unknown = [s for s in sections if s not in BOOTSTRAP_SECTIONS]
+        if unknown:
+            return jsonify({'success': False, 'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+    else:
+        sections = list(BOOTSTRAP_SECTIONS)
+
+    user = dict(g.user)
+    futures = {
+        name: executor.submit(copy_current_request_context(run_section), BOOTSTRAP_SECTIONS[name], user)
+        for name in sections
+    }
+
+    body = {'success': True, 'user': user, 'errors': {}}
+    for name, future in futures.items():
+        try:
+            status, payload = future.result()
+        except Exception as e:
+            print(f"❌ Bootstrap section {name} failed: {e}")
+            body['errors'][name] = str(e)
+            continue
+        if status != 200 or not payload or payload.get('success') is False:
+            body['errors'][name] = (payload or {}).get('error') or f"HTTP {status}"
+        else:
+            payload.pop('success', None)
+            body[name] = payload
+    return jsonify(body)
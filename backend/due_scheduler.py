@@ -0,0 +1,210 @@
+import os
+import time
+import heapq
+import threading
+from datetime import datetime, date, timezone
+from leader import LeaderLock
+from search_index import newest_timestamp
+from paging import fetch_all
+
+DUE_COLUMNS = "id, title, due_date, status, assigned_to, assigned_to_multiple, created_by, updated_at"
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def day_start(value):
+    """Epoch seconds of 00:00 UTC on a 'YYYY-MM-DD' day"""
+    day = date.fromisoformat(str(value)[:10])
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+class DueScheduler:
+    """Fires task_due_soon and task_overdue reminders from a min-heap of fire times.
+
+    One worker per host runs the loop (file-lock leader). Heap entries are
+    ``(fire_at, task_id, kind, due_date)`` and are checked against the latest
+    known task row when popped, so a moved due date or a completed task simply
+    leaves a stale entry behind. The task routes push changes through
+    ``schedule_task``/``unschedule_task``; writes handled by other workers are
+    pulled by a delta sync on updated_at and deleted_records.
+
+    Reminders are claimed in task_reminders before notifying, which makes each
+    (task, kind, due date) fire once even when two hosts run a leader.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.wakeup = threading.Event()
+        self.heap = []
+        self.tasks = {}            # task_id -> latest task row (open tasks with a due date)
+        self.loaded = False
+        self.last_sync = None
+        self.leader = LeaderLock('due_scheduler')
+        self.thread = None
+        self.due_soon_hours = int(os.getenv('DUE_SOON_HOURS', '24'))
+        self.sync_seconds = int(os.getenv('DUE_SCHEDULER_SYNC_SECONDS', '60'))
+        self.max_overdue_days = int(os.getenv('DUE_REMINDER_MAX_AGE_DAYS', '7'))
+
+    # ---------- schedule maintenance ----------
+
+    def fire_times(self, task):
+        """(fire_at, kind) reminders for a task's current due date"""
+        due = day_start(task['due_date'])
+        return [
+            (due - self.due_soon_hours * 3600, 'task_due_soon'),
+            (due + 86400, 'task_overdue')     # the whole due day has passed
+        ]
+
+    def schedule_task(self, task):
+        """Add or refresh a task's reminders (partial rows are merged); no-op outside the leader"""
+        if self.loaded:
+            self._schedule(task)
+
+    def _schedule(self, task):
+        if not task or not task.get('id'):
+            return
+        with self.lock:
+            merged = dict(self.tasks.get(task['id'], {}))
+            merged.update({k: v for k, v in task.items() if k in DUE_COLUMNS.split(', ')})
+            if not merged.get('due_date') or merged.get('status') in CLOSED_STATUSES:
+                self.tasks.pop(task['id'], None)
+                return
+            previous = self.tasks.get(task['id'])
+            self.tasks[task['id']] = merged
+            if previous and previous.get('due_date') == merged['due_date']:
+                return
+            for fire_at, kind in self.fire_times(merged):
+                heapq.heappush(self.heap, (fire_at, task['id'], kind, str(merged['due_date'])[:10]))
+        self.wakeup.set()
+
+    def unschedule_task(self, task_id):
+        with self.lock:
+            self.tasks.pop(task_id, None)
+
+    def load(self, supabase):
+        """Fill the heap with every open task that has a due date"""
+        tasks = fetch_all(lambda: (
+            supabase.table("tasks").select(DUE_COLUMNS)
+            .not_.is_("due_date", "null")
+            .not_.in_("status", list(CLOSED_STATUSES))
+            .order("updated_at").order("id")
+        ))
+        with self.lock:
+            self.heap, self.tasks = [], {}
+            for task in tasks:
+                self._schedule(task)
+            self.last_sync = newest_timestamp([t.get('updated_at') for t in tasks]) or datetime.now(timezone.utc).isoformat()
+            self.loaded = True
+        print(f"⏰ Due scheduler loaded {len(self.tasks)} tasks, {len(self.heap)} reminders")
+
+    def sync(self, supabase):
+        """Pick up task writes and deletions handled by other workers"""
+        since = self.last_sync
+        changed = fetch_all(lambda: (
+            supabase.table("tasks").select(DUE_COLUMNS)
+            .gt("updated_at", since).order("updated_at").order("id")
+        ))
+        deleted = fetch_all(lambda: (
+            supabase.table("deleted_records").select("id, record_id, deleted_at")
+            .eq("table_name", "tasks").gt("deleted_at", since)
+            .order("deleted_at").order("id")
+        ))
+        for task in changed:
+            self.schedule_task(task)
+        for record in deleted:
+            self.unschedule_task(record['record_id'])
+        self.last_sync = newest_timestamp([since] + [t.get('updated_at') for t in changed] + [d.get('deleted_at') for d in deleted])
+
+    # ---------- firing ----------
+
+    def pop_due(self, now):
+        """Pop every heap entry due by ``now`` that still matches its task"""
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                fire_at, task_id, kind, due_date = heapq.heappop(self.heap)
+                task = self.tasks.get(task_id)
+                if not task or str(task.get('due_date'))[:10] != due_date:
+                    continue    # stale entry: task closed, deleted or due date moved
+                if kind == 'task_overdue' and now - fire_at > self.max_overdue_days * 86400:
+                    continue    # long-overdue tasks found at start-up are not re-announced
+                if kind == 'task_due_soon' and now >= day_start(due_date) + 86400:
+                    continue    # already overdue; the overdue reminder covers it
+                due.append((kind, task))
+        return due
+
+    def fire(self, supabase, reminders):
+        """Claim reminders in task_reminders, then notify only for the ones this process claimed"""
+        if not reminders:
+            return 0
+        try:
+            return self._claim_and_notify(supabase, reminders)
+        except Exception:
+            # Put them back so the next tick retries
+            with self.lock:
+                for kind, task in reminders:
+                    heapq.heappush(self.heap, (time.time(), task['id'], kind, str(task['due_date'])[:10]))
+            raise
+
+    def _claim_and_notify(self, supabase, reminders):
+        from notification_routes import create_due_reminder_notifications
+        claims = [{'task_id': task['id'], 'kind': kind, 'due_date': str(task['due_date'])[:10]} for kind, task in reminders]
+        claimed = supabase.table("task_reminders").upsert(
+            claims, on_conflict="task_id,kind,due_date", ignore_duplicates=True
+        ).execute().data or []
+        claimed_keys = {(c['task_id'], c['kind']) for c in claimed}
+        to_send = [(kind, task) for kind, task in reminders if (task['id'], kind) in claimed_keys]
+        if not to_send:
+            return 0
+        try:
+            return create_due_reminder_notifications(supabase, to_send)
+        except Exception:
+            # Release the claims so the retry can claim them again
+            for kind, task in to_send:
+                supabase.table("task_reminders").delete().eq("task_id", task['id']).eq("kind", kind).eq("due_date", str(task['due_date'])[:10]).execute()
+            raise
+
+    def next_wait(self, now):
+        with self.lock:
+            until_next = self.heap[0][0] - now if self.heap else self.sync_seconds
+        return max(0.0, min(until_next, self.sync_seconds))
+
+    # ---------- background thread ----------
+
+    def start(self):
+        """Start the scheduler thread in this worker (only the lock holder fires reminders)"""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name='due-scheduler', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        last_sync_time = 0
+        while True:
+            wait = self.sync_seconds
+            try:
+                if self.leader.try_acquire():
+                    supabase = get_supabase_client()
+                    if not self.loaded:
+                        self.load(supabase)
+                        last_sync_time = time.time()
+                    elif time.time() - last_sync_time >= self.sync_seconds:
+                        self.sync(supabase)
+                        last_sync_time = time.time()
+                    self.fire(supabase, self.pop_due(time.time()))
+                    wait = self.next_wait(time.time())
+            except Exception as e:
+                print(f"⚠️ Due scheduler tick failed: {e}")
+            self.wakeup.wait(wait)
+            self.wakeup.clear()
+
+
+due_scheduler = DueScheduler()
@@ -0,0 +1,167 @@
+import os
+import re
+import time
+import bisect
+import threading
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+LOOKUP_COLUMNS = "id, name, email, role, department, photo_url, is_active, updated_at"
+RESULT_FIELDS = ['id', 'name', 'email', 'role', 'department', 'photo_url']
+
+# Lower rank sorts first: where the query matched
+RANK_NAME_START = 0
+RANK_NAME_WORD = 1
+RANK_EMAIL = 2
+RANK_DEPARTMENT = 3
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def employee_keys(employee):
+    """(key, rank) pairs an employee can be found by"""
+    keys = []
+    name = (employee.get('name') or '').lower().strip()
+    if name:
+        keys.append((name, RANK_NAME_START))
+        keys += [(token, RANK_NAME_WORD) for token in TOKEN_RE.findall(name)]
+    email = (employee.get('email') or '').lower().strip()
+    if email:
+        keys.append((email, RANK_EMAIL))
+        keys += [(token, RANK_EMAIL) for token in TOKEN_RE.findall(email.split('@')[0])]
+    department = (employee.get('department') or '').lower().strip()
+    if department:
+        keys.append((department, RANK_DEPARTMENT))
+        keys += [(token, RANK_DEPARTMENT) for token in TOKEN_RE.findall(department)]
+    return keys
+
+
+class EmployeeLookupIndex:
+    """Sorted-prefix index over active employees' name, email and department.
+
+    Kept current by the employee routes on every write. Other workers' writes
+    are picked up by comparing the employees table version (row count and
+    newest updated_at) at most every EMPLOYEE_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.employees = {}     # employee_id -> row (active employees only)
+        self.entries = []       # sorted (key, employee_id, rank)
+        self.version = None
+        self.checked_at = 0
+        self.refresh_seconds = int(os.getenv('EMPLOYEE_INDEX_REFRESH_SECONDS', '60'))
+
+    def load(self, supabase):
+        """Rebuild from the employees table"""
+        rows = supabase.table("employees").select(LOOKUP_COLUMNS).eq("is_active", True).execute().data or []
+        with self.lock:
+            self.employees = {row['id']: row for row in rows}
+            self.entries = sorted(
+                (key, employee_id, rank)
+                for employee_id, row in self.employees.items()
+                for key, rank in employee_keys(row)
+            )
+        print(f"👥 Employee lookup index loaded: {len(rows)} employees")
+
+    def refresh_if_stale(self, supabase):
+        """Reload when another worker changed the employees table since the last check"""
+        if self.version is not None and time.time() - self.checked_at < self.refresh_seconds:
+            return
+        from etag import table_version
+        version = table_version(supabase, "employees")
+        if version != self.version:
+            self.load(supabase)
+        with self.lock:
+            self.version = version
+            self.checked_at = time.time()
+
+    def upsert_employee(self, employee):
+        """Index a created or updated employee row (inactive employees are dropped)"""
+        if not employee or not employee.get('id'):
+            return
+        with self.lock:
+            merged = dict(self.employees.get(employee['id'], {}))
+            merged.update(employee)
+            self.remove_employee(employee['id'])
+            if merged.get('is_active') is False:
+                return
+            self.employees[merged['id']] = merged
+            for key, rank in employee_keys(merged):
+                bisect.insort(self.entries, (key, merged['id'], rank))
+
+    def remove_employee(self, employee_id):
+        with self.lock:
+            if self.employees.pop(employee_id, None) is not None:
+                self.entries = [entry for entry in self.entries if entry[1] != employee_id]
+
+    def names(self, supabase, employee_ids):
+        """{employee_id: {name, email, role}} from the index, with one query for ids it does not hold (inactive employees)"""
+        self.refresh_if_stale(supabase)
+        found, missing = {}, []
+        with self.lock:
+            for employee_id in set(employee_ids):
+                row = self.employees.get(employee_id)
+                if row:
+                    found[employee_id] = {'name': row.get('name'), 'email': row.get('email'), 'role': row.get('role')}
+                elif employee_id:
+                    missing.append(employee_id)
+        if missing:
+            rows = supabase.table("employees").select("id, name, email, role").in_("id", missing).execute().data or []
+            for row in rows:
+                found[row['id']] = {'name': row.get('name'), 'email': row.get('email'), 'role': row.get('role')}
+        return found
+
+    def _prefix_matches(self, prefix):
+        """employee_id -> best rank among keys starting with prefix"""
+        matches = {}
+        position = bisect.bisect_left(self.entries, (prefix,))
+        while position < len(self.entries) and self.entries[position][0].startswith(prefix):
+            _, employee_id, rank = self.entries[position]
+            if rank < matches.get(employee_id, RANK_DEPARTMENT + 1):
+                matches[employee_id] = rank
+            position += 1
+        return matches
+
+    def lookup(self, query, limit=10):
+        """Employees where every query word prefixes their name, email or department"""
+        query = (query or '').lower().strip()
+        with self.lock:
+            if not query:
+                ranked = {employee_id: RANK_NAME_START for employee_id in self.employees}
+            else:
+                # The whole query first (e.g. "john sm" against the full name), then word by word
+                ranked = self._prefix_matches(query)
+                terms = TOKEN_RE.findall(query)
+                if terms:
+                    by_words = None
+                    for term in terms:
+                        matches = self._prefix_matches(term)
+                        if by_words is None:
+                            by_words = matches
+                        else:
+                            by_words = {
+                                employee_id: max(rank, matches[employee_id])
+                                for employee_id, rank in by_words.items() if employee_id in matches
+                            }
+                    for employee_id, rank in by_words.items():
+                        if rank < ranked.get(employee_id, RANK_DEPARTMENT + 1):
+                            ranked[employee_id] = rank
+
+            ordered = sorted(
+                ranked.items(),
+                key=lambda item: (item[1], (self.employees[item[0]].get('name') or '').lower())
+            )
+            return [
+                {field: self.employees[employee_id].get(field) for field in RESULT_FIELDS}
+                for employee_id, _ in ordered[:limit]
+            ], len(ordered)
+
+
+employee_lookup_index = EmployeeLookupIndex()
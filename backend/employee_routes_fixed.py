@@ -2,6 +2,13 @@ from flask import Blueprint, request, jsonify, g
 import os
 from datetime import datetime
 from auth import token_required
+from etag import conditional_get
+from employee_index import employee_lookup_index
+from watchers import watcher_index
+from read_replica import read_replica, replica_read
+from response_cache import response_cache, cached_response
+import identity_map
+from fieldsets import Fieldset
 from notification_routes import create_admin_event_notification
 import secrets
 import uuid
@@ -24,23 +31,75 @@ def get_supabase_client():
 
 employee_bp = Blueprint('employees', __name__)
 
+# Only fetch JSON-serializable columns to avoid PostgREST 556 errors when binary fields exist
+EMPLOYEE_LIST_COLUMNS = [
+    "id", "name", "email", "role", "department",
+    "skills", "photo_url", "is_active",
+    "created_at", "updated_at"
+]
+EMPLOYEE_LIST_FIELDS = Fieldset(",".join(EMPLOYEE_LIST_COLUMNS), columns=EMPLOYEE_LIST_COLUMNS)
+
+# ============================================
+# WRITE HOOKS (keep in-process indexes and caches current)
+# ============================================
+
+def employee_changed(employee):
+    """Call after an employee row was inserted or updated"""
+    employee_lookup_index.upsert_employee(employee)
+    read_replica.upsert('employees', employee)
+    response_cache.invalidate('employees')
+    identity_map.forget('employees', employee['id'])
+
+def employee_deactivated(employee):
+    """Call after an employee was soft-deleted"""
+    employee_lookup_index.remove_employee(employee['id'])
+    read_replica.upsert('employees', employee)
+    response_cache.invalidate('employees')
+    identity_map.forget('employees', employee['id'])
+
+def employee_removed(employee_id):
+    """Call after an employee was permanently deleted"""
+    employee_lookup_index.remove_employee(employee_id)
+    watcher_index.forget_employee(employee_id)
+    read_replica.remove('employees', employee_id)
+    response_cache.invalidate('employees')
+    identity_map.forget('employees', employee_id)
+
+def get_employees_from_replica():
+    """get_employees served from the read replica"""
+    try:
+        fields = EMPLOYEE_LIST_FIELDS.requested()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    employees = read_replica.rows('employees', None if include_inactive else "is_active = 1", order="created_at DESC")
+    columns = fields or EMPLOYEE_LIST_COLUMNS
+    return jsonify({'success': True, 'employees': [{c: e.get(c) for c in EMPLOYEE_LIST_COLUMNS if c in columns} for e in employees]})
+
+def get_employee_from_replica(employee_id):
+    """get_employee served from the read replica"""
+    employee = read_replica.get('employees', employee_id)
+    if not employee:
+        return jsonify({'success': False, 'error': 'Employee not found'}), 404
+    return jsonify({'success': True, 'employee': employee})
+
 def generate_temp_password(length: int = 12) -> str:
     return secrets.token_urlsafe(length)[:length]
 
 @employee_bp.route('/api/employees', methods=['GET'])
 @token_required
+@cached_response(['employees'])
+@conditional_get(lambda: [("employees", None)])
+@replica_read(get_employees_from_replica)
 def get_employees():
-    """Get all employees with proper table structure"""
+    """Get all employees with proper table structure (?fields= narrows the columns)"""
     try:
         supabase = get_supabase_client()
 
-        # Only fetch JSON-serializable columns to avoid PostgREST 556 errors when binary fields exist
-        base_columns = [
-            "id", "name", "email", "role", "department",
-            "skills", "photo_url", "is_active",
-            "created_at", "updated_at"
-        ]
-        select_clause = ",".join(base_columns)
+        try:
+            select_clause = EMPLOYEE_LIST_FIELDS.select(EMPLOYEE_LIST_FIELDS.requested())
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
         include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
 
@@ -55,6 +114,23 @@ def get_employees():
     except Exception as e:
         print(f"❌ Error fetching employees: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@employee_bp.route('/api/employees/lookup', methods=['GET'])
+@token_required
+def lookup_employees():
+    """Typeahead for assignment dropdowns: active employees whose name, email or department starts with q"""
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be a number'}), 400
+
+        employee_lookup_index.refresh_if_stale(get_supabase_client())
+        employees, total = employee_lookup_index.lookup(request.args.get('q', ''), limit=limit)
+        return jsonify({'success': True, 'employees': employees, 'total': total})
+    except Exception as e:
+        print(f"❌ Error looking up employees: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
     
 @employee_bp.route('/api/employees', methods=['POST'])
 @token_required
@@ -110,6 +186,7 @@ def create_employee():
         
         if result.data:
             employee = result.data[0]
+            employee_changed(employee)
             
             # Notify admins of the new employee (exclude creator if they have employee_id)
             creator_employee_id = None
@@ -120,11 +197,7 @@ def create_employee():
                 create_admin_event_notification(
                     notification_type="employee_created",
                     message=f"New employee added: {employee.get('name', 'Unnamed')} ({employee.get('department', 'General')})",
-                    meta={
-                        "employee_id": employee.get('id'),
-                        "email": employee.get('email'),
-                        "name": employee.get('name')
-                    },
+                    meta={"employee_id": employee.get('id')},   # name/email joined at read time
                     exclude_employee_id=creator_employee_id
                 )
             except Exception as notify_error:
@@ -148,6 +221,7 @@ def create_employee():
 
 @employee_bp.route('/api/employees/<employee_id>', methods=['GET'])
 @token_required
+@replica_read(get_employee_from_replica)
 def get_employee(employee_id):
     """Get specific employee details"""
     try:
@@ -189,6 +263,7 @@ def update_employee(employee_id):
         result = supabase.table("employees").update(update_data).eq("id", employee_id).execute()
         
         if result.data:
+            employee_changed(result.data[0])
             return jsonify({'success': True, 'employee': result.data[0]})
         else:
             return jsonify({'success': False, 'error': 'Employee not found'}), 404
@@ -209,6 +284,7 @@ def delete_employee(employee_id):
         }).eq("id", employee_id).execute()
         
         if result.data:
+            employee_deactivated(result.data[0])
             return jsonify({'success': True, 'message': 'Employee deactivated successfully'})
         else:
             return jsonify({'success': False, 'error': 'Employee not found'}), 404
@@ -235,6 +311,7 @@ def permanent_delete_employee(employee_id):
         
         if result.data:
             print(f"✅ Employee {employee_id} permanently deleted")
+            employee_removed(employee_id)
             return jsonify({
                 'success': True, 
                 'message': 'Employee permanently deleted from system'
@@ -396,6 +473,7 @@ def upload_employee_photo(employee_id):
             }).eq('id', employee_id).execute()
             
             if hasattr(update_result, 'data') and update_result.data:
+                employee_changed(update_result.data[0])
                 return jsonify({
                     'success': True, 
                     'photo_url': photo_url,
@@ -460,6 +538,7 @@ def remove_employee_photo(employee_id):
         }).eq('id', employee_id).execute()
         
         if hasattr(update_result, 'data') and update_result.data:
+            employee_changed(update_result.data[0])
             return jsonify({'success': True, 'message': 'Photo removed successfully'})
         else:
             return jsonify({'success': False, 'error': 'Failed to update employee record'}), 500
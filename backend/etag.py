@@ -0,0 +1,127 @@
+from flask import request, make_response, g
+from functools import wraps
+import hashlib
+import json
+import os
+from datetime import datetime
+from read_replica import read_replica, REPLICA_TABLES
+from singleflight import singleflight
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def table_version(supabase, table, filters=None, ts_column='updated_at'):
+    """Return (row_count, newest timestamp) for a table without fetching the rows.
+
+    PostgREST reports the exact count in the Content-Range header, so asking for a
+    single column of a single row is enough to know whether anything changed.
+    Deletes lower the count and inserts/updates move the newest timestamp.
+    """
+    query = supabase.table(table).select(ts_column, count="exact")
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    # Every client polling a list probes the same version; share in-flight probes
+    key = ('table_version', table, json.dumps(filters, sort_keys=True, default=str), ts_column)
+    result = singleflight.do(key, lambda: query.order(ts_column, desc=True).limit(1).execute())
+    newest = result.data[0].get(ts_column) if result.data else None
+    return (result.count or 0, newest)
+
+def request_scope():
+    """Everything besides the data that changes the response body for this caller"""
+    user = g.user if hasattr(g, 'user') and g.user else {}
+    scope = {
+        'path': request.path,
+        'args': sorted(request.args.items(multi=True)),
+        'role': user.get('role'),
+        'employee_id': user.get('employee_id')
+    }
+    # overdue=true compares due dates with today, so the body changes at midnight without a write
+    if request.args.get('overdue', 'false').lower() == 'true':
+        scope['today'] = datetime.utcnow().date().isoformat()
+    return scope
+
+def build_etag(versions, scope):
+    """Hash table versions and caller scope into an opaque (weak) ETag value"""
+    payload = json.dumps({'versions': versions, 'scope': scope}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def conditional_get(version_sources):
+    """Decorator adding weak ETags and If-None-Match handling to a list endpoint.
+
+    ``version_sources`` is called inside the request (after authentication) and
+    returns the ``(table, filters)`` pairs the response body is built from. When
+    the client's ETag still matches, a 304 is returned before the view runs, so
+    the list is never queried or serialized.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                sources = version_sources()
+                if read_replica.is_fresh() and all(t in REPLICA_TABLES and not f for t, f in sources):
+                    # The body will come from the replica too, so version it from there
+                    versions = [[table, list(read_replica.table_version(table))] for table, _ in sources]
+                else:
+                    supabase = get_supabase_client()
+                    versions = [
+                        [table, table_version(supabase, table, filters)]
+                        for table, filters in sources
+                    ]
+                etag = build_etag(versions, request_scope())
+            except Exception as e:
+                # Never fail a read because the version probe failed
+                print(f"⚠️ ETag version check failed for {request.path}: {e}")
+                return f(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated
+    return decorator
+
+def row_etag(row):
+    """Strong ETag for a single row: its updated_at, which the DB trigger bumps on every write"""
+    return row.get('updated_at') if row else None
+
+def if_match_versions():
+    """Row versions the client sent in If-Match, or None when no precondition applies"""
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    versions = list(if_match.as_set(include_weak=True))
+    return versions or None
+
+def apply_if_match(query, versions, column='updated_at'):
+    """Add the If-Match precondition to a conditional UPDATE/DELETE"""
+    if not versions:
+        return query
+    if len(versions) == 1:
+        return query.eq(column, versions[0])
+    return query.in_(column, versions)
+
+def with_row_etag(response, row):
+    """Attach the row's ETag so the client can send it back in If-Match"""
+    response = make_response(response)
+    etag = row_etag(row)
+    if etag:
+        response.set_etag(etag)
+    return response
+
+def apply_row_version(query, row, column='updated_at'):
+    """Only write if the row is still at the version that was read"""
+    version = row.get(column) if row else None
+    return query.eq(column, version) if version else query.is_(column, "null")
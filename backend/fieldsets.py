@@ -0,0 +1,51 @@
+from flask import request
+
+
+class Fieldset:
+    """Allowlist for a list endpoint's ``?fields=`` parameter.
+
+    ``columns`` are plain table columns. ``embeds`` map a response field to the
+    PostgREST embed that produces it (e.g. ``'objectives': 'objectives(title)'``).
+    ``derived`` map fields added after the query (enrichment) to the columns
+    they are computed from. Without ``?fields=`` the endpoint keeps its full
+    ``default_select`` and response shape.
+    """
+
+    def __init__(self, default_select, columns, embeds=None, derived=None):
+        self.default_select = default_select
+        self.columns = list(columns)
+        self.embeds = embeds or {}
+        self.derived = derived or {}
+        self.allowed = set(self.columns) | set(self.embeds) | set(self.derived)
+
+    def requested(self):
+        """Fields asked for in ?fields= (None when absent); raises ValueError for unknown fields"""
+        raw = request.args.get('fields')
+        if raw is None:
+            return None
+        fields = {f.strip() for f in raw.split(',') if f.strip()}
+        unknown = sorted(fields - self.allowed)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(self.allowed))}")
+        return fields | {'id'}
+
+    def select(self, fields, required=()):
+        """PostgREST select clause for the requested fields plus the columns the endpoint itself needs"""
+        if fields is None:
+            return self.default_select
+        columns = {f for f in fields if f in self.columns} | set(required)
+        for field in fields:
+            columns.update(self.derived.get(field, []))
+        parts = [c for c in self.columns if c in columns]
+        parts += [self.embeds[f] for f in self.embeds if f in fields]
+        return ", ".join(parts)
+
+    def wants(self, fields, *names):
+        """True when any of ``names`` is part of the response"""
+        return fields is None or any(name in fields for name in names)
+
+    def trim(self, rows, fields):
+        """Drop helper columns that were selected but not requested"""
+        if fields is None:
+            return rows
+        return [{k: v for k, v in row.items() if k in fields} for row in rows]
@@ -10,6 +10,9 @@ backlog = 2048
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = 'sync'
+# More than one thread switches to gthread workers, which lets concurrent identical
+# reads in a worker share one upstream query (singleflight.py)
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
 worker_connections = 1000
 timeout = 120
 keepalive = 5
@@ -0,0 +1,77 @@
+from flask import g, has_app_context
+
+
+class IdentityMap:
+    """Rows already read during the current request, keyed by (table, id).
+
+    Lives on ``g``, so it is dropped with the request. A row read with
+    ``select("*")`` answers any later read of it; a row read with a column
+    list answers reads of those columns only. Named list queries (e.g. the
+    admin list) are kept whole. Writes made in the request go through
+    ``remember``/``forget`` so later reads see them.
+    """
+
+    def __init__(self):
+        self.rows = {}           # (table, id) -> row
+        self.complete = set()    # (table, id) read with every column
+        self.queries = {}        # (table, name) -> rows
+
+
+def current_map():
+    """This request's identity map (None outside an app context, e.g. background threads)"""
+    if not has_app_context():
+        return None
+    if 'identity_map' not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+def remember(table, rows, complete=False):
+    """Record rows read or written in this request (merged into what is already known)"""
+    identity_map = current_map()
+    if identity_map is None:
+        return
+    for row in rows or []:
+        if not row or not row.get('id'):
+            continue
+        key = (table, row['id'])
+        identity_map.rows[key] = {**identity_map.rows.get(key, {}), **row}
+        if complete:
+            identity_map.complete.add(key)
+
+def forget(table, row_id=None):
+    """Drop a row (or every row when row_id is None) and all named queries of a table"""
+    identity_map = current_map()
+    if identity_map is None:
+        return
+    for key in [k for k in identity_map.rows if k[0] == table and (row_id is None or k[1] == row_id)]:
+        identity_map.rows.pop(key, None)
+        identity_map.complete.discard(key)
+    for key in [k for k in identity_map.queries if k[0] == table]:
+        identity_map.queries.pop(key, None)
+
+def get_row(supabase, table, row_id, columns="*"):
+    """One row by id, read from the DB only if this request has not seen it with these columns"""
+    identity_map = current_map()
+    key = (table, row_id)
+    if identity_map is not None and key in identity_map.rows:
+        row = identity_map.rows[key]
+        wanted = [c.strip() for c in columns.split(',')]
+        if key in identity_map.complete or (columns != "*" and all(c in row for c in wanted)):
+            return dict(row)
+    result = supabase.table(table).select(columns).eq("id", row_id).execute()
+    if not result.data:
+        return None
+    remember(table, result.data, complete=(columns == "*"))
+    return dict(result.data[0])
+
+def get_rows(table, name, loader):
+    """Rows of a named list query (``loader()`` runs at most once per request)"""
+    identity_map = current_map()
+    if identity_map is None:
+        return loader()
+    key = (table, name)
+    if key not in identity_map.queries:
+        rows = loader()
+        identity_map.queries[key] = rows
+        remember(table, rows)
+    return [dict(row) for row in identity_map.queries[key]]
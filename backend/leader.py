@@ -0,0 +1,40 @@
+import os
+import fcntl
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock on a local file, used to pick one gunicorn
+    worker (per host) to run a background job.
+
+    The OS drops the lock when the holding process exits, so another worker
+    takes over on its next ``try_acquire``.
+    """
+
+    def __init__(self, name):
+        lock_dir = os.getenv('LEADER_LOCK_DIR', '/tmp')
+        self.path = os.path.join(lock_dir, f"erp_{name}.lock")
+        self.handle = None
+
+    @property
+    def is_leader(self):
+        return self.handle is not None
+
+    def try_acquire(self):
+        """Become leader if nobody else is; returns True while this process holds the lock"""
+        if self.handle is not None:
+            return True
+        handle = open(self.path, 'a')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self.handle = handle
+        print(f"👑 Process {os.getpid()} is leader for {self.path}")
+        return True
+
+    def release(self):
+        if self.handle is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
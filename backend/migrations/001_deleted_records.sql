@@ -0,0 +1,23 @@
+-- ============================================
+-- 001: Tombstones for hard-deleted rows
+-- ============================================
+-- delete_task and delete_objective hard-delete rows (tasks cascade with their
+-- objective). The change feed at GET /api/tasks/changes reads this table so
+-- clients holding a local copy can drop rows that no longer exist.
+
+CREATE TABLE IF NOT EXISTS public.deleted_records (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  table_name text NOT NULL CHECK (table_name IN ('tasks', 'objectives')),
+  record_id uuid NOT NULL,
+  deleted_by uuid,
+  deleted_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT deleted_records_pkey PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_records_deleted_at ON public.deleted_records(deleted_at);
+
+-- Cursor scans for the change feed
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON public.tasks(updated_at);
+CREATE INDEX IF NOT EXISTS idx_task_updates_created_at ON public.task_updates(created_at);
+
+COMMENT ON TABLE public.deleted_records IS 'Tombstones for hard-deleted tasks and objectives, read by the task change feed';
@@ -0,0 +1,26 @@
+-- ============================================
+-- 002: Record tombstones from AFTER DELETE triggers
+-- ============================================
+-- Deletes are now single conditional statements, so the backend no longer
+-- reads an objective's task ids before deleting it. Triggers record every
+-- deleted task and objective instead, including tasks removed by the
+-- ON DELETE CASCADE from objectives.
+
+CREATE OR REPLACE FUNCTION record_deleted_row()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.deleted_records (table_name, record_id)
+  VALUES (TG_TABLE_NAME, OLD.id);
+  RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS tasks_record_tombstone ON public.tasks;
+CREATE TRIGGER tasks_record_tombstone
+  AFTER DELETE ON public.tasks
+  FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+DROP TRIGGER IF EXISTS objectives_record_tombstone ON public.objectives;
+CREATE TRIGGER objectives_record_tombstone
+  AFTER DELETE ON public.objectives
+  FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
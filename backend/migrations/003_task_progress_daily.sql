@@ -0,0 +1,43 @@
+-- ============================================
+-- 003: Daily progress buckets per task
+-- ============================================
+-- One row per task per day holding the last progress value reported that day
+-- in task_updates. Burndown and progress-history charts read these buckets
+-- instead of scanning task_updates. The trigger keeps them current on every
+-- insert; run `python progress_history.py backfill` once for older history.
+
+CREATE TABLE IF NOT EXISTS public.task_progress_daily (
+  task_id uuid NOT NULL,
+  day date NOT NULL,
+  progress integer NOT NULL CHECK (progress >= 0 AND progress <= 100),
+  update_count integer NOT NULL DEFAULT 1,
+  last_update_at timestamp with time zone NOT NULL,
+  CONSTRAINT task_progress_daily_pkey PRIMARY KEY (task_id, day),
+  CONSTRAINT task_progress_daily_task_id_fkey FOREIGN KEY (task_id) REFERENCES public.tasks(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_progress_daily_day ON public.task_progress_daily(day);
+
+CREATE OR REPLACE FUNCTION bump_task_progress_bucket()
+RETURNS TRIGGER AS $$
+DECLARE
+  update_time timestamp with time zone := COALESCE(NEW.created_at, now());
+BEGIN
+  INSERT INTO public.task_progress_daily AS bucket (task_id, day, progress, update_count, last_update_at)
+  VALUES (NEW.task_id, (update_time AT TIME ZONE 'UTC')::date, NEW.progress, 1, update_time)
+  ON CONFLICT (task_id, day) DO UPDATE SET
+    progress = CASE WHEN EXCLUDED.last_update_at >= bucket.last_update_at THEN EXCLUDED.progress ELSE bucket.progress END,
+    last_update_at = GREATEST(bucket.last_update_at, EXCLUDED.last_update_at),
+    update_count = bucket.update_count + 1;
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS task_updates_progress_bucket ON public.task_updates;
+CREATE TRIGGER task_updates_progress_bucket
+  AFTER INSERT ON public.task_updates
+  FOR EACH ROW
+  WHEN (NEW.progress IS NOT NULL)
+  EXECUTE FUNCTION bump_task_progress_bucket();
+
+COMMENT ON TABLE public.task_progress_daily IS 'Last reported progress per task per UTC day, maintained from task_updates';
@@ -0,0 +1,22 @@
+-- ============================================
+-- 004: Due-date reminders sent
+-- ============================================
+-- The due scheduler claims a reminder by inserting its row here with
+-- ON CONFLICT DO NOTHING and only notifies for rows it actually inserted, so
+-- each (task, kind, due date) reminder fires once even across hosts and
+-- restarts. Moving a task's due date produces a new reminder.
+
+CREATE TABLE IF NOT EXISTS public.task_reminders (
+  task_id uuid NOT NULL,
+  kind text NOT NULL CHECK (kind IN ('task_due_soon', 'task_overdue')),
+  due_date date NOT NULL,
+  sent_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT task_reminders_pkey PRIMARY KEY (task_id, kind, due_date),
+  CONSTRAINT task_reminders_task_id_fkey FOREIGN KEY (task_id) REFERENCES public.tasks(id) ON DELETE CASCADE
+);
+
+-- Scheduler start-up load of open tasks with a due date
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date_open ON public.tasks(due_date)
+  WHERE due_date IS NOT NULL AND status NOT IN ('completed', 'cancelled');
+
+COMMENT ON TABLE public.task_reminders IS 'Due-soon and overdue reminders already sent, one row per task, kind and due date';
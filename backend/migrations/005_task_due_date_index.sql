@@ -0,0 +1,9 @@
+-- ============================================
+-- 005: Due-date range queries
+-- ============================================
+-- GET /api/tasks?due_after=&due_before=&sort=due_date and
+-- GET /api/tasks/calendar?from=&to= filter and order on due_date. The partial
+-- index from 004 only covers open tasks (overdue=true); calendar views also
+-- show completed work, so they need a full index.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON public.tasks(due_date);
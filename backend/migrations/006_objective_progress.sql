@@ -0,0 +1,107 @@
+-- ============================================
+-- 006: Objective progress rollups
+-- ============================================
+-- One row per objective with task counts by status and the sum of
+-- completion_percentage, adjusted by delta from a trigger on every task
+-- insert, update and delete (single endpoints, batch writes and notes alike).
+-- The objective list embeds it so progress needs no per-objective fetch.
+-- Kept in its own table so task writes do not bump objectives.updated_at,
+-- which is the objective's ETag.
+
+CREATE TABLE IF NOT EXISTS public.objective_progress (
+  objective_id uuid NOT NULL,
+  task_count integer NOT NULL DEFAULT 0,
+  not_started_count integer NOT NULL DEFAULT 0,
+  in_progress_count integer NOT NULL DEFAULT 0,
+  completed_count integer NOT NULL DEFAULT 0,
+  cancelled_count integer NOT NULL DEFAULT 0,
+  completion_sum bigint NOT NULL DEFAULT 0,
+  average_completion numeric GENERATED ALWAYS AS (
+    CASE WHEN task_count > 0 THEN round(completion_sum::numeric / task_count, 1) ELSE 0 END
+  ) STORED,
+  updated_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT objective_progress_pkey PRIMARY KEY (objective_id),
+  CONSTRAINT objective_progress_objective_id_fkey FOREIGN KEY (objective_id) REFERENCES public.objectives(id) ON DELETE CASCADE
+);
+
+-- Add (sign = 1) or remove (sign = -1) one task's contribution
+CREATE OR REPLACE FUNCTION adjust_objective_progress(target uuid, task_status text, completion integer, sign integer)
+RETURNS void AS $$
+BEGIN
+  IF target IS NULL THEN
+    RETURN;
+  END IF;
+  INSERT INTO public.objective_progress AS p (
+    objective_id, task_count, not_started_count, in_progress_count, completed_count, cancelled_count, completion_sum
+  )
+  VALUES (
+    target, sign,
+    CASE WHEN task_status = 'not_started' THEN sign ELSE 0 END,
+    CASE WHEN task_status = 'in_progress' THEN sign ELSE 0 END,
+    CASE WHEN task_status = 'completed' THEN sign ELSE 0 END,
+    CASE WHEN task_status = 'cancelled' THEN sign ELSE 0 END,
+    sign * COALESCE(completion, 0)
+  )
+  ON CONFLICT (objective_id) DO UPDATE SET
+    task_count = p.task_count + EXCLUDED.task_count,
+    not_started_count = p.not_started_count + EXCLUDED.not_started_count,
+    in_progress_count = p.in_progress_count + EXCLUDED.in_progress_count,
+    completed_count = p.completed_count + EXCLUDED.completed_count,
+    cancelled_count = p.cancelled_count + EXCLUDED.cancelled_count,
+    completion_sum = p.completion_sum + EXCLUDED.completion_sum,
+    updated_at = now();
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION track_objective_progress()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'UPDATE'
+     AND NEW.objective_id IS NOT DISTINCT FROM OLD.objective_id
+     AND NEW.status IS NOT DISTINCT FROM OLD.status
+     AND NEW.completion_percentage IS NOT DISTINCT FROM OLD.completion_percentage THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    -- The objective row is already gone when its delete cascades to the task
+    IF EXISTS (SELECT 1 FROM public.objectives WHERE id = OLD.objective_id) THEN
+      PERFORM adjust_objective_progress(OLD.objective_id, OLD.status, OLD.completion_percentage, -1);
+    END IF;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM adjust_objective_progress(NEW.objective_id, NEW.status, NEW.completion_percentage, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS tasks_objective_progress ON public.tasks;
+CREATE TRIGGER tasks_objective_progress
+  AFTER INSERT OR UPDATE OR DELETE ON public.tasks
+  FOR EACH ROW EXECUTE FUNCTION track_objective_progress();
+
+-- Backfill from existing tasks
+INSERT INTO public.objective_progress (
+  objective_id, task_count, not_started_count, in_progress_count, completed_count, cancelled_count, completion_sum
+)
+SELECT
+  o.id,
+  count(t.id),
+  count(t.id) FILTER (WHERE t.status = 'not_started'),
+  count(t.id) FILTER (WHERE t.status = 'in_progress'),
+  count(t.id) FILTER (WHERE t.status = 'completed'),
+  count(t.id) FILTER (WHERE t.status = 'cancelled'),
+  COALESCE(sum(t.completion_percentage), 0)
+FROM public.objectives o
+LEFT JOIN public.tasks t ON t.objective_id = o.id
+GROUP BY o.id
+ON CONFLICT (objective_id) DO UPDATE SET
+  task_count = EXCLUDED.task_count,
+  not_started_count = EXCLUDED.not_started_count,
+  in_progress_count = EXCLUDED.in_progress_count,
+  completed_count = EXCLUDED.completed_count,
+  cancelled_count = EXCLUDED.cancelled_count,
+  completion_sum = EXCLUDED.completion_sum,
+  updated_at = now();
+
+COMMENT ON TABLE public.objective_progress IS 'Per-objective task counts by status and completion, maintained by a trigger on tasks';
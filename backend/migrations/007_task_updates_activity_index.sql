@@ -0,0 +1,8 @@
+-- ============================================
+-- 007: Objective activity feed
+-- ============================================
+-- GET /api/objectives/<id>/activity joins task_updates to the objective's
+-- tasks (idx_tasks_objective_id already exists) and pages newest first on
+-- (created_at, id). This index serves the per-task lookup in keyset order.
+
+CREATE INDEX IF NOT EXISTS idx_task_updates_task_created ON public.task_updates(task_id, created_at DESC, id DESC);
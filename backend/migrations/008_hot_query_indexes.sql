@@ -0,0 +1,26 @@
+-- ============================================
+-- 008: Indexes for the hot notification and task query shapes
+-- ============================================
+-- Every shape below runs on most page loads or on every notification write.
+-- check_plans.py runs each query under EXPLAIN and checks that it uses the
+-- index listed here. task_updates by task_id ordered by created_at is already
+-- served by idx_task_updates_task_created (007).
+
+-- GET /api/notifications/count: to_employee = ? AND is_read = false
+CREATE INDEX IF NOT EXISTS idx_notifications_unread
+  ON public.notifications(to_employee)
+  WHERE is_read = false;
+
+-- GET /api/notifications: to_employee = ? ORDER BY created_at DESC LIMIT 200
+CREATE INDEX IF NOT EXISTS idx_notifications_feed
+  ON public.notifications(to_employee, created_at DESC);
+
+-- Duplicate checks before every notification insert:
+--   to_employee = ? AND meta->>'type' = ? [AND meta->>'task_id' = ?] AND created_at >= now() - 2 min
+-- (task_id is left out of the key so admin-event checks, which have none, use it too)
+CREATE INDEX IF NOT EXISTS idx_notifications_dedup
+  ON public.notifications(to_employee, (meta->>'type'), created_at DESC);
+
+-- assigned_to_multiple @> '{<employee>}' (dashboard, employee task filters)
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to_multiple
+  ON public.tasks USING GIN (assigned_to_multiple);
@@ -0,0 +1,89 @@
+-- ============================================
+-- 009: Dashboard aggregate and notification fan-out functions
+-- ============================================
+-- dashboard_stats replaces loading every visible task and objective row into
+-- GET /api/tasks/dashboard just to count them. fan_out_notifications replaces
+-- the per-recipient duplicate check + insert round trips when one event
+-- notifies many employees. Both are called through supabase.rpc().
+
+-- Task counts by status plus the objective count; pass NULL for the admin
+-- view (everything), an employee id for tasks assigned to them (directly or
+-- via assigned_to_multiple) and objectives they created.
+CREATE OR REPLACE FUNCTION dashboard_stats(p_employee_id uuid DEFAULT NULL)
+RETURNS json AS $$
+DECLARE
+  stats json;
+  objective_count bigint;
+BEGIN
+  -- Separate statements per branch so each is planned with its indexes
+  IF p_employee_id IS NULL THEN
+    SELECT json_build_object(
+      'total', count(*),
+      'not_started', count(*) FILTER (WHERE status = 'not_started'),
+      'in_progress', count(*) FILTER (WHERE status = 'in_progress'),
+      'completed', count(*) FILTER (WHERE status = 'completed'),
+      'cancelled', count(*) FILTER (WHERE status = 'cancelled')
+    ) INTO stats
+    FROM public.tasks;
+    SELECT count(*) INTO objective_count FROM public.objectives;
+  ELSE
+    SELECT json_build_object(
+      'total', count(*),
+      'not_started', count(*) FILTER (WHERE status = 'not_started'),
+      'in_progress', count(*) FILTER (WHERE status = 'in_progress'),
+      'completed', count(*) FILTER (WHERE status = 'completed'),
+      'cancelled', count(*) FILTER (WHERE status = 'cancelled')
+    ) INTO stats
+    FROM public.tasks
+    WHERE assigned_to = p_employee_id OR assigned_to_multiple @> ARRAY[p_employee_id];
+    SELECT count(*) INTO objective_count FROM public.objectives WHERE created_by = p_employee_id;
+  END IF;
+  RETURN (stats::jsonb || jsonb_build_object('objectives', objective_count))::json;
+END;
+$$ language 'plpgsql' STABLE;
+
+-- Insert one notification per recipient in a single statement, skipping
+-- recipients who already got the same meta.type (and meta.task_id, when the
+-- notification has one) within p_dedup_minutes. p_notification carries the
+-- notification columns: message, type, channel, priority, related_task_id,
+-- related_objective_id and meta. Returns the number of rows inserted.
+CREATE OR REPLACE FUNCTION fan_out_notifications(
+  p_recipients uuid[],
+  p_notification jsonb,
+  p_dedup_minutes integer DEFAULT 2
+)
+RETURNS integer AS $$
+DECLARE
+  inserted integer;
+  dedup_type text := p_notification->'meta'->>'type';
+  dedup_task text := p_notification->'meta'->>'task_id';
+BEGIN
+  INSERT INTO public.notifications (
+    to_employee, channel, message, type, priority, related_task_id, related_objective_id, meta, is_read
+  )
+  SELECT
+    recipient,
+    COALESCE(p_notification->>'channel', 'in_app'),
+    p_notification->>'message',
+    COALESCE(p_notification->>'type', 'task_update'),   -- the column default
+    COALESCE(p_notification->>'priority', 'normal'),
+    (p_notification->>'related_task_id')::uuid,
+    (p_notification->>'related_objective_id')::uuid,
+    COALESCE(p_notification->'meta', '{}'::jsonb),
+    false
+  FROM (SELECT DISTINCT unnest(p_recipients) AS recipient) r
+  WHERE recipient IS NOT NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM public.notifications n
+      WHERE n.to_employee = r.recipient
+        AND n.meta->>'type' = dedup_type
+        AND (dedup_task IS NULL OR n.meta->>'task_id' = dedup_task)
+        AND n.created_at >= now() - make_interval(mins => p_dedup_minutes)
+    );
+  GET DIAGNOSTICS inserted = ROW_COUNT;
+  RETURN inserted;
+END;
+$$ language 'plpgsql';
+
+COMMENT ON FUNCTION dashboard_stats(uuid) IS 'Task counts by status and objective count for GET /api/tasks/dashboard';
+COMMENT ON FUNCTION fan_out_notifications(uuid[], jsonb, integer) IS 'Deduplicated bulk insert of one notification per recipient';
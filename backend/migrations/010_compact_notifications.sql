@@ -0,0 +1,191 @@
+-- ============================================
+-- 010: Compact notification rows
+-- ============================================
+-- Notifications used to repeat the task title, the actor's name and role,
+-- the type and task id, a second timestamp and flags derived from the type
+-- inside meta on every row. Rows now keep those as typed columns (type,
+-- related_task_id, related_objective_id and the new actor_id); the API
+-- rebuilds the display fields at read time from cached task and employee
+-- rows. meta keeps only what cannot be joined (note preview, attached
+-- employees, batch task ids, ...).
+
+-- The backend has always written types outside this list (note_added,
+-- file_uploaded, task_due_soon, employee_created, ...)
+ALTER TABLE public.notifications DROP CONSTRAINT IF EXISTS notifications_type_check;
+
+ALTER TABLE public.notifications
+  ADD COLUMN IF NOT EXISTS actor_id uuid REFERENCES public.employees(id) ON DELETE SET NULL;
+
+-- Duplicate checks now match the type column instead of meta->>'type'
+DROP INDEX IF EXISTS idx_notifications_dedup;
+CREATE INDEX IF NOT EXISTS idx_notifications_dedup
+  ON public.notifications(to_employee, type, created_at DESC);
+
+-- Same as 009, but the duplicate check uses the typed columns and actor_id is written
+CREATE OR REPLACE FUNCTION fan_out_notifications(
+  p_recipients uuid[],
+  p_notification jsonb,
+  p_dedup_minutes integer DEFAULT 2
+)
+RETURNS integer AS $$
+DECLARE
+  inserted integer;
+  dedup_type text := COALESCE(p_notification->>'type', 'task_update');
+  dedup_task uuid := (p_notification->>'related_task_id')::uuid;
+BEGIN
+  INSERT INTO public.notifications (
+    to_employee, channel, message, type, priority, related_task_id, related_objective_id, actor_id, meta, is_read
+  )
+  SELECT
+    recipient,
+    COALESCE(p_notification->>'channel', 'in_app'),
+    p_notification->>'message',
+    dedup_type,
+    COALESCE(p_notification->>'priority', 'normal'),
+    dedup_task,
+    (p_notification->>'related_objective_id')::uuid,
+    (p_notification->>'actor_id')::uuid,
+    COALESCE(p_notification->'meta', '{}'::jsonb),
+    false
+  FROM (SELECT DISTINCT unnest(p_recipients) AS recipient) r
+  WHERE recipient IS NOT NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM public.notifications n
+      WHERE n.to_employee = r.recipient
+        AND n.type = dedup_type
+        AND (dedup_task IS NULL OR n.related_task_id = dedup_task)
+        AND n.created_at >= now() - make_interval(mins => p_dedup_minutes)
+    );
+  GET DIAGNOSTICS inserted = ROW_COUNT;
+  RETURN inserted;
+END;
+$$ language 'plpgsql';
+
+-- Task completion trigger (base schema) without the copied title
+CREATE OR REPLACE FUNCTION notify_task_completion()
+RETURNS TRIGGER AS $$
+DECLARE
+  task_title text;
+  completed_by_name text;
+BEGIN
+  IF NEW.status = 'completed' AND (OLD.status IS NULL OR OLD.status != 'completed') THEN
+    SELECT title INTO task_title FROM public.tasks WHERE id = NEW.id;
+    SELECT name INTO completed_by_name FROM public.employees WHERE id = NEW.assigned_to;
+
+    NEW.completed_at = now();
+
+    IF NEW.created_by != NEW.assigned_to THEN
+      INSERT INTO public.notifications (to_employee, message, type, priority, related_task_id, actor_id)
+      VALUES (
+        NEW.created_by,
+        format('Task "%s" has been completed by %s', task_title, completed_by_name),
+        'task_completed', 'normal', NEW.id, NEW.assigned_to
+      );
+    END IF;
+
+    INSERT INTO public.notifications (to_employee, message, type, priority, related_task_id, actor_id)
+    SELECT
+      id,
+      format('Task "%s" has been completed by %s', task_title, completed_by_name),
+      'task_completed', 'normal', NEW.id, NEW.assigned_to
+    FROM public.employees
+    WHERE is_active = true
+      AND id != NEW.assigned_to
+      AND id != NEW.created_by;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- ============================================
+-- Rewrite existing rows
+-- ============================================
+-- Keys that only ever held copies of other columns or joinable data. A row
+-- still carrying any of them has not been rewritten yet.
+CREATE OR REPLACE FUNCTION notification_meta_copied_keys()
+RETURNS text[] AS $$
+  SELECT ARRAY[
+    'type', 'task_id', 'task_title', 'added_by', 'user_role', 'timestamp',
+    'is_note_notification', 'is_attachment_notification', 'specially_attached',
+    'completed_by', 'objective_id', 'objective_title', 'created_by', 'created_by_id'
+  ];
+$$ language 'sql' IMMUTABLE;
+
+-- Rewrite up to p_batch_size rows; returns how many were rewritten (0 when done)
+CREATE OR REPLACE FUNCTION compact_notifications_batch(p_batch_size integer DEFAULT 5000)
+RETURNS integer AS $$
+DECLARE
+  rewritten integer;
+BEGIN
+  WITH batch AS (
+    SELECT id, meta FROM public.notifications
+    WHERE meta ?| notification_meta_copied_keys()
+    ORDER BY id
+    LIMIT p_batch_size
+  ),
+  resolved AS (
+    SELECT b.id, b.meta,
+      CASE WHEN b.meta->>'task_id' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+           THEN (b.meta->>'task_id')::uuid END AS meta_task_id,
+      CASE WHEN b.meta->>'objective_id' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+           THEN (b.meta->>'objective_id')::uuid END AS meta_objective_id,
+      -- Actor: the stored id when there is one, else the only employee with the stored name
+      COALESCE(
+        CASE WHEN COALESCE(b.meta->>'completed_by', b.meta->>'created_by_id') ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+             THEN COALESCE(b.meta->>'completed_by', b.meta->>'created_by_id')::uuid END,
+        (SELECT min(e.id::text)::uuid FROM public.employees e
+         WHERE e.name = COALESCE(b.meta->>'added_by', b.meta->>'created_by')
+         HAVING count(*) = 1)
+      ) AS meta_actor_id
+    FROM batch b
+  )
+  UPDATE public.notifications n
+  SET
+    type = COALESCE(NULLIF(b.meta->>'type', ''), n.type),
+    related_task_id = COALESCE(n.related_task_id, (SELECT t.id FROM public.tasks t WHERE t.id = b.meta_task_id)),
+    related_objective_id = COALESCE(n.related_objective_id, (SELECT o.id FROM public.objectives o WHERE o.id = b.meta_objective_id)),
+    actor_id = COALESCE(n.actor_id, (SELECT e.id FROM public.employees e WHERE e.id = b.meta_actor_id)),
+    meta = jsonb_strip_nulls(
+      (b.meta - notification_meta_copied_keys() - 'is_task_owner_confirmation')
+      -- an actor name that matched no single employee is kept for display
+      || CASE WHEN b.meta_actor_id IS NULL AND COALESCE(b.meta->>'added_by', b.meta->>'created_by') IS NOT NULL
+              THEN jsonb_build_object('actor_name', COALESCE(b.meta->>'added_by', b.meta->>'created_by'))
+              ELSE '{}'::jsonb END
+      || CASE WHEN (b.meta->>'is_task_owner_confirmation')::boolean
+              THEN '{"is_task_owner_confirmation": true}'::jsonb
+              ELSE '{}'::jsonb END
+    )
+  FROM resolved b
+  WHERE n.id = b.id;
+  GET DIAGNOSTICS rewritten = ROW_COUNT;
+  RETURN rewritten;
+END;
+$$ language 'plpgsql';
+
+-- Rewrite everything, committing after each batch so locks stay short
+CREATE OR REPLACE PROCEDURE compact_notifications(p_batch_size integer DEFAULT 5000)
+AS $$
+DECLARE
+  rewritten integer;
+  total bigint := 0;
+BEGIN
+  LOOP
+    rewritten := compact_notifications_batch(p_batch_size);
+    EXIT WHEN rewritten = 0;
+    total := total + rewritten;
+    RAISE NOTICE 'compact_notifications: % rows rewritten', total;
+    COMMIT;
+  END LOOP;
+END;
+$$ language 'plpgsql';
+
+-- CALL cannot COMMIT inside an explicit transaction. If your client wraps this
+-- file in one, skip the CALL and run
+--   SELECT compact_notifications_batch(5000);
+-- repeatedly until it returns 0. New rows are written compact by the backend,
+-- so the rewrite can run while the app is live.
+CALL compact_notifications(5000);
+
+COMMENT ON COLUMN public.notifications.actor_id IS 'Employee whose action produced the notification (display name joined at read time)';
+COMMENT ON FUNCTION compact_notifications_batch(integer) IS 'Rewrites one batch of pre-010 notification rows to the compact layout';
@@ -0,0 +1,69 @@
+-- ============================================
+-- 011: Notification archive
+-- ============================================
+-- The notification maintenance job (notification_maintenance.py) moves read
+-- notifications older than NOTIFICATION_RETENTION_READ_DAYS and unread ones
+-- older than NOTIFICATION_RETENTION_UNREAD_DAYS out of the hot table, so the
+-- feed and admin_all queries scan a bounded number of rows.
+-- GET /api/notifications?include_archived=true reads this table as well.
+
+CREATE TABLE IF NOT EXISTS public.notifications_archive (
+  LIKE public.notifications INCLUDING DEFAULTS
+);
+ALTER TABLE public.notifications_archive ADD COLUMN IF NOT EXISTS archived_at timestamp with time zone DEFAULT now();
+ALTER TABLE public.notifications_archive DROP CONSTRAINT IF EXISTS notifications_archive_pkey;
+ALTER TABLE public.notifications_archive ADD CONSTRAINT notifications_archive_pkey PRIMARY KEY (id);
+ALTER TABLE public.notifications_archive DROP CONSTRAINT IF EXISTS notifications_archive_to_employee_fkey;
+ALTER TABLE public.notifications_archive ADD CONSTRAINT notifications_archive_to_employee_fkey
+  FOREIGN KEY (to_employee) REFERENCES public.employees(id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_archive_feed
+  ON public.notifications_archive(to_employee, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_archive_created_at
+  ON public.notifications_archive(created_at DESC);
+
+-- Only the backend (service role) reads the archive
+ALTER TABLE public.notifications_archive ENABLE ROW LEVEL SECURITY;
+
+-- Move one batch of expired notifications, oldest first; returns how many
+-- left the hot table (fewer than p_batch_size once it is within retention).
+-- Rows locked by a concurrent write are skipped until the next run.
+CREATE OR REPLACE FUNCTION archive_notifications(
+  p_read_before timestamptz,
+  p_unread_before timestamptz,
+  p_batch_size integer DEFAULT 1000
+)
+RETURNS integer AS $$
+DECLARE
+  moved integer;
+BEGIN
+  WITH batch AS (
+    SELECT id FROM public.notifications
+    WHERE (is_read AND created_at < p_read_before)
+       OR (NOT COALESCE(is_read, false) AND created_at < p_unread_before)
+    ORDER BY created_at
+    LIMIT p_batch_size
+    FOR UPDATE SKIP LOCKED
+  ),
+  removed AS (
+    DELETE FROM public.notifications n
+    USING batch b
+    WHERE n.id = b.id
+    RETURNING n.*
+  ),
+  -- The archive was created LIKE notifications, so its columns line up with
+  -- n.* followed by archived_at. Add any new notifications column to both.
+  archived AS (
+    INSERT INTO public.notifications_archive
+    SELECT removed.*, now() FROM removed
+    ON CONFLICT (id) DO NOTHING
+  )
+  -- Count deleted rows: a row already in the archive is skipped by the
+  -- INSERT but still left the hot table
+  SELECT count(*) INTO moved FROM removed;
+  RETURN moved;
+END;
+$$ language 'plpgsql';
+
+COMMENT ON TABLE public.notifications_archive IS 'Notifications moved out of the hot table by the maintenance job';
+COMMENT ON FUNCTION archive_notifications(timestamptz, timestamptz, integer) IS 'Moves one batch of expired notifications to notifications_archive';
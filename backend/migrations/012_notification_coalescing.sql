@@ -0,0 +1,96 @@
+-- ============================================
+-- 012: Coalesce bursts of task notifications
+-- ============================================
+-- A run of notes, progress updates or uploads on one task used to create one
+-- notification per event per recipient (or drop the later ones inside the
+-- 2-minute duplicate window). Within p_window_minutes of a recipient's
+-- unread notification for the same task, a new event is merged into it
+-- instead: meta.event_count, meta.event_types (per-type counts) and
+-- meta.actor_ids (in order of first appearance) are updated, and meta keys
+-- from the new event (e.g. the latest note_preview) replace the old ones.
+-- The API renders "5 updates on <task> by A, B" from these at read time.
+-- Read notifications are never merged into; the next event starts a new one.
+
+CREATE OR REPLACE FUNCTION coalesce_task_notifications(
+  p_recipients uuid[],
+  p_notification jsonb,
+  p_merge_types text[],
+  p_window_minutes integer DEFAULT 10
+)
+RETURNS json AS $$
+DECLARE
+  task uuid := (p_notification->>'related_task_id')::uuid;
+  event_type text := COALESCE(p_notification->>'type', 'task_update');
+  actor uuid := (p_notification->>'actor_id')::uuid;
+  merged integer;
+  created integer;
+BEGIN
+  -- Two workers handling events for the same task must not both start a new row
+  PERFORM pg_advisory_xact_lock(hashtext('notifications:' || task::text));
+
+  WITH targets AS (
+    SELECT DISTINCT ON (n.to_employee) n.id
+    FROM public.notifications n
+    WHERE n.to_employee = ANY(p_recipients)
+      AND n.related_task_id = task
+      AND n.type = ANY(p_merge_types)
+      AND NOT COALESCE(n.is_read, false)
+      AND n.created_at >= now() - make_interval(mins => p_window_minutes)
+    ORDER BY n.to_employee, n.created_at DESC
+  ),
+  previous AS (
+    SELECT n.id,
+      COALESCE((n.meta->>'event_count')::integer, 1) AS event_count,
+      COALESCE(n.meta->'event_types', jsonb_build_object(n.type, 1)) AS event_types,
+      COALESCE(n.meta->'actor_ids', CASE WHEN n.actor_id IS NULL THEN '[]'::jsonb ELSE jsonb_build_array(n.actor_id) END) AS actor_ids
+    FROM public.notifications n
+    JOIN targets t ON t.id = n.id
+  )
+  UPDATE public.notifications n
+  SET
+    type = event_type,
+    actor_id = COALESCE(actor, n.actor_id),
+    meta = n.meta || COALESCE(p_notification->'meta', '{}'::jsonb) || jsonb_build_object(
+      'event_count', p.event_count + 1,
+      'event_types', p.event_types || jsonb_build_object(event_type, COALESCE((p.event_types->>event_type)::integer, 0) + 1),
+      'actor_ids', CASE
+        WHEN actor IS NULL OR p.actor_ids @> jsonb_build_array(actor) THEN p.actor_ids
+        ELSE p.actor_ids || jsonb_build_array(actor)
+      END
+    )
+  FROM previous p
+  WHERE n.id = p.id;
+  GET DIAGNOSTICS merged = ROW_COUNT;
+
+  -- Everyone without a row to merge into gets a new one
+  INSERT INTO public.notifications (
+    to_employee, channel, message, type, priority, related_task_id, related_objective_id, actor_id, meta, is_read
+  )
+  SELECT
+    recipient,
+    COALESCE(p_notification->>'channel', 'in_app'),
+    p_notification->>'message',
+    event_type,
+    COALESCE(p_notification->>'priority', 'normal'),
+    task,
+    (p_notification->>'related_objective_id')::uuid,
+    actor,
+    COALESCE(p_notification->'meta', '{}'::jsonb),
+    false
+  FROM (SELECT DISTINCT unnest(p_recipients) AS recipient) r
+  WHERE recipient IS NOT NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM public.notifications n
+      WHERE n.to_employee = r.recipient
+        AND n.related_task_id = task
+        AND n.type = ANY(p_merge_types)
+        AND NOT COALESCE(n.is_read, false)
+        AND n.created_at >= now() - make_interval(mins => p_window_minutes)
+    );
+  GET DIAGNOSTICS created = ROW_COUNT;
+
+  RETURN json_build_object('created', created, 'merged', merged);
+END;
+$$ language 'plpgsql';
+
+COMMENT ON FUNCTION coalesce_task_notifications(uuid[], jsonb, text[], integer) IS 'Merges a task event into recipients'' recent unread notification for the task, or creates one';
@@ -0,0 +1,43 @@
+-- ============================================
+-- 013: Task and objective watchers
+-- ============================================
+-- Notes, progress updates and uploads used to notify every active employee
+-- plus all admins. They now notify a task's watchers only (watchers.py):
+-- its assignees, its creator and the admins by default, plus these rows.
+-- A row either follows ('watching') or mutes ('muted') a task or objective;
+-- following an objective watches all of its tasks. Employees attached to a
+-- note get a 'watching' row for the task. Deleting the row goes back to the
+-- default.
+
+CREATE TABLE IF NOT EXISTS public.task_watchers (
+  task_id uuid NOT NULL REFERENCES public.tasks(id) ON DELETE CASCADE,
+  employee_id uuid NOT NULL REFERENCES public.employees(id) ON DELETE CASCADE,
+  state text NOT NULL DEFAULT 'watching' CHECK (state IN ('watching', 'muted')),
+  created_at timestamp with time zone DEFAULT now(),
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT task_watchers_pkey PRIMARY KEY (task_id, employee_id)
+);
+
+CREATE TABLE IF NOT EXISTS public.objective_watchers (
+  objective_id uuid NOT NULL REFERENCES public.objectives(id) ON DELETE CASCADE,
+  employee_id uuid NOT NULL REFERENCES public.employees(id) ON DELETE CASCADE,
+  state text NOT NULL DEFAULT 'watching' CHECK (state IN ('watching', 'muted')),
+  created_at timestamp with time zone DEFAULT now(),
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT objective_watchers_pkey PRIMARY KEY (objective_id, employee_id)
+);
+
+-- "What am I watching" and the employee delete cascade
+CREATE INDEX IF NOT EXISTS idx_task_watchers_employee ON public.task_watchers(employee_id);
+CREATE INDEX IF NOT EXISTS idx_objective_watchers_employee ON public.objective_watchers(employee_id);
+
+-- The index version probe (etag.table_version) orders by updated_at
+CREATE INDEX IF NOT EXISTS idx_task_watchers_updated_at ON public.task_watchers(updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_objective_watchers_updated_at ON public.objective_watchers(updated_at DESC);
+
+-- Only the backend (service role) reads and writes subscriptions
+ALTER TABLE public.task_watchers ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.objective_watchers ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.task_watchers IS 'Explicit follows/mutes of a task (assignees, creator and admins watch by default)';
+COMMENT ON TABLE public.objective_watchers IS 'Explicit follows/mutes of an objective, applied to all of its tasks';
@@ -0,0 +1,66 @@
+-- ============================================
+-- 014: Who attached an employee to a task note
+-- ============================================
+-- When an employee replies on a task, the note's author who attached them
+-- gets a "you got a response" notification. Finding that author used to mean
+-- reading every task_updates row of the task and scanning them in Python.
+-- The backend now upserts one row per (task, attached employee) when a note
+-- attaches someone, so the reply looks it up by primary key. The latest
+-- note wins; attaching yourself is not recorded.
+
+CREATE TABLE IF NOT EXISTS public.task_note_attachers (
+  task_id uuid NOT NULL REFERENCES public.tasks(id) ON DELETE CASCADE,
+  employee_id uuid NOT NULL REFERENCES public.employees(id) ON DELETE CASCADE,
+  attached_by uuid NOT NULL REFERENCES public.employees(id) ON DELETE CASCADE,
+  update_id uuid REFERENCES public.task_updates(id) ON DELETE SET NULL,
+  attached_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT task_note_attachers_pkey PRIMARY KEY (task_id, employee_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_note_attachers_attached_by ON public.task_note_attachers(attached_by);
+
+-- Only the backend (service role) reads and writes it
+ALTER TABLE public.task_note_attachers ENABLE ROW LEVEL SECURITY;
+
+-- Backfill from notes that stored their attachments (task_updates.attached_to
+-- uuid and attached_to_multiple uuid[] or jsonb, where those columns exist)
+DO $$
+DECLARE
+  multiple_type text;
+  attached_expr text;
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = 'task_updates' AND column_name = 'attached_to'
+  ) THEN
+    RAISE NOTICE 'task_updates has no attached_to column; nothing to backfill';
+    RETURN;
+  END IF;
+
+  SELECT data_type INTO multiple_type FROM information_schema.columns
+  WHERE table_schema = 'public' AND table_name = 'task_updates' AND column_name = 'attached_to_multiple';
+
+  attached_expr := CASE multiple_type
+    WHEN 'ARRAY' THEN 'array_append(COALESCE(u.attached_to_multiple::text[], ''{}''), u.attached_to::text)'
+    WHEN 'jsonb' THEN 'array_append(COALESCE(ARRAY(SELECT jsonb_array_elements_text(CASE WHEN jsonb_typeof(u.attached_to_multiple) = ''array'' THEN u.attached_to_multiple END)), ''{}''), u.attached_to::text)'
+    ELSE 'ARRAY[u.attached_to::text]'
+  END;
+
+  EXECUTE format($sql$
+    INSERT INTO public.task_note_attachers (task_id, employee_id, attached_by, update_id, attached_at)
+    SELECT DISTINCT ON (a.task_id, a.employee_id) a.task_id, a.employee_id, a.updated_by, a.id, a.created_at
+    FROM (
+      SELECT u.task_id, u.updated_by, u.id, u.created_at, attached.employee_id::uuid AS employee_id
+      FROM public.task_updates u
+      CROSS JOIN LATERAL unnest(%s) AS attached(employee_id)
+      WHERE attached.employee_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+    ) a
+    WHERE a.employee_id <> a.updated_by
+      AND EXISTS (SELECT 1 FROM public.employees e WHERE e.id = a.employee_id)
+    ORDER BY a.task_id, a.employee_id, a.created_at DESC
+    ON CONFLICT (task_id, employee_id) DO NOTHING
+  $sql$, attached_expr);
+END;
+$$;
+
+COMMENT ON TABLE public.task_note_attachers IS 'Latest note author who attached each employee to a task (for reply notifications)';
@@ -0,0 +1,45 @@
+-- ============================================
+-- 015: Tasks reassigned away from an employee
+-- ============================================
+-- Employees only sync tasks they created or are assigned to. When a task is
+-- reassigned, the employees who lost it never saw it change again, so their
+-- delta sync (GET /api/tasks/changes) kept a stale copy. This trigger records
+-- one row per employee who stopped being the creator or an assignee; the
+-- feed hands those out as deleted entries with reason 'not_visible'.
+
+CREATE TABLE IF NOT EXISTS public.task_visibility_changes (
+  id uuid NOT NULL DEFAULT gen_random_uuid(),
+  task_id uuid NOT NULL REFERENCES public.tasks(id) ON DELETE CASCADE,
+  employee_id uuid NOT NULL REFERENCES public.employees(id) ON DELETE CASCADE,
+  changed_at timestamp with time zone NOT NULL DEFAULT now(),
+  CONSTRAINT task_visibility_changes_pkey PRIMARY KEY (id)
+);
+
+-- The feed reads one employee's rows after a (changed_at, id) cursor
+CREATE INDEX IF NOT EXISTS idx_task_visibility_changes_employee
+  ON public.task_visibility_changes(employee_id, changed_at, id);
+CREATE INDEX IF NOT EXISTS idx_task_visibility_changes_changed_at
+  ON public.task_visibility_changes(changed_at DESC);
+
+ALTER TABLE public.task_visibility_changes ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION record_task_visibility_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.task_visibility_changes (task_id, employee_id)
+  SELECT DISTINCT NEW.id, lost.employee_id
+  FROM unnest(ARRAY[OLD.created_by, OLD.assigned_to] || COALESCE(OLD.assigned_to_multiple, '{}')) AS lost(employee_id)
+  WHERE lost.employee_id IS NOT NULL
+    AND NOT COALESCE(lost.employee_id = ANY(
+      array_remove(ARRAY[NEW.created_by, NEW.assigned_to] || COALESCE(NEW.assigned_to_multiple, '{}'), NULL)
+    ), false);
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS tasks_record_visibility_change ON public.tasks;
+CREATE TRIGGER tasks_record_visibility_change
+  AFTER UPDATE OF created_by, assigned_to, assigned_to_multiple ON public.tasks
+  FOR EACH ROW EXECUTE FUNCTION record_task_visibility_change();
+
+COMMENT ON TABLE public.task_visibility_changes IS 'Employees who stopped seeing a task after a reassignment, read by the task change feed';
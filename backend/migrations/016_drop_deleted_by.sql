@@ -0,0 +1,8 @@
+-- ============================================
+-- 016: Drop deleted_records.deleted_by
+-- ============================================
+-- Tombstones are written by the AFTER DELETE triggers from 002. Every write
+-- goes through the service role, so a trigger cannot tell which employee made
+-- the request and deleted_by was always NULL.
+
+ALTER TABLE public.deleted_records DROP COLUMN IF EXISTS deleted_by;
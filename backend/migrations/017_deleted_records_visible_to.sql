@@ -0,0 +1,34 @@
+-- ============================================
+-- 017: Who could see a deleted task
+-- ============================================
+-- The change feed (GET /api/tasks/changes) handed every task tombstone to
+-- every employee, which told them the ids of tasks they were never allowed to
+-- see. The tombstone trigger now also stores the task's creator and assignees
+-- at delete time, and employees only get task tombstones that list them.
+-- Objective tombstones stay visible to everyone, like the objectives list.
+-- Task tombstones recorded before this migration have no visible_to and are
+-- only handed to admins.
+
+ALTER TABLE public.deleted_records ADD COLUMN IF NOT EXISTS visible_to uuid[];
+
+CREATE OR REPLACE FUNCTION record_deleted_row()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'tasks' THEN
+    INSERT INTO public.deleted_records (table_name, record_id, visible_to)
+    VALUES (
+      TG_TABLE_NAME, OLD.id,
+      array_remove(ARRAY[OLD.created_by, OLD.assigned_to] || COALESCE(OLD.assigned_to_multiple, '{}'), NULL)
+    );
+  ELSE
+    INSERT INTO public.deleted_records (table_name, record_id)
+    VALUES (TG_TABLE_NAME, OLD.id);
+  END IF;
+  RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+-- Containment filter of the employee change feed
+CREATE INDEX IF NOT EXISTS idx_deleted_records_visible_to ON public.deleted_records USING gin (visible_to);
+
+COMMENT ON COLUMN public.deleted_records.visible_to IS 'Creator and assignees of a deleted task (NULL for objectives)';
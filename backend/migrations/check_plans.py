@@ -0,0 +1,266 @@
+"""Check the hot query shapes against a local Postgres.
+
+Seeds synthetic employees, tasks, task updates and notifications inside a
+transaction, runs each query the backend issues under EXPLAIN and checks that
+the planner picks the index the migrations create for it, then checks the
+dashboard_stats, fan_out_notifications, compact_notifications_batch,
+coalesce_task_notifications and archive_notifications functions do what they
+should.
+Everything is rolled back at the end.
+
+    # scratch database with the base schema and every migration applied
+    createdb erp_plans
+    DATABASE_URL=postgresql://localhost/erp_plans python migrations/check_plans.py --setup
+
+    # database that already has the schema and migrations
+    DATABASE_URL=postgresql://localhost/erp_plans python migrations/check_plans.py
+
+Needs the psql client on PATH; exits non-zero when any check fails.
+"""
+import os
+import sys
+import json
+import glob
+import argparse
+import subprocess
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_SCHEMA = os.path.join(MIGRATIONS_DIR, '..', '..', 'sql_chema.md')
+
+PROBE_EMPLOYEE = '00000000-0000-4000-8000-000000000001'
+PROBE_TASK = '00000000-0000-4000-8000-000000000002'
+PROBE_LEGACY_NOTIFICATION = '00000000-0000-4000-8000-000000000003'
+
+SEED_SQL = f"""
+INSERT INTO public.employees (id, email, name, role)
+VALUES ('{PROBE_EMPLOYEE}', 'probe@plans.local', 'Probe', 'employee');
+INSERT INTO public.employees (email, name, role)
+SELECT 'check' || i || '@plans.local', 'Check ' || i, CASE WHEN i % 20 = 0 THEN 'admin' ELSE 'employee' END
+FROM generate_series(1, 300) i;
+
+CREATE TEMP TABLE seed_employees AS
+SELECT id, row_number() OVER (ORDER BY id) AS n FROM public.employees;
+
+INSERT INTO public.tasks (id, title, created_by, assigned_to, assigned_to_multiple, status, completion_percentage)
+VALUES ('{PROBE_TASK}', 'Probe task', '{PROBE_EMPLOYEE}', '{PROBE_EMPLOYEE}', ARRAY['{PROBE_EMPLOYEE}'::uuid], 'in_progress', 40);
+INSERT INTO public.tasks (title, created_by, assigned_to, assigned_to_multiple, status, completion_percentage)
+SELECT
+  'Task ' || i,
+  (SELECT id FROM seed_employees WHERE n = 1 + i % 300),
+  (SELECT id FROM seed_employees WHERE n = 1 + (i * 7) % 300),
+  ARRAY[(SELECT id FROM seed_employees WHERE n = 1 + (i * 13) % 300)],
+  (ARRAY['not_started', 'in_progress', 'completed', 'cancelled'])[1 + i % 4],
+  (i * 10) % 101
+FROM generate_series(1, 20000) i;
+
+INSERT INTO public.task_updates (task_id, updated_by, progress, notes, created_at)
+SELECT t.id, t.created_by, 50, 'Update ' || g, now() - (g || ' hours')::interval
+FROM (SELECT id, created_by FROM public.tasks ORDER BY id LIMIT 4000) t, generate_series(1, 10) g;
+
+INSERT INTO public.notifications (to_employee, message, type, related_task_id, actor_id, is_read, created_at)
+SELECT
+  (SELECT id FROM seed_employees WHERE n = 1 + i % 301),
+  'Notification ' || i,
+  (ARRAY['note_added', 'progress_updated', 'task_assigned'])[1 + i % 3],
+  '{PROBE_TASK}',
+  (SELECT id FROM seed_employees WHERE n = 1 + (i * 7) % 301),
+  i % 10 <> 0,
+  now() - ((1 + i % 2000) || ' hours')::interval
+FROM generate_series(1, 100000) i;
+
+ANALYZE public.employees;
+ANALYZE public.tasks;
+ANALYZE public.task_updates;
+ANALYZE public.notifications;
+"""
+
+# (name, query as the backend issues it, index the migrations provide for it)
+PLAN_CHECKS = [
+    (
+        'unread count (GET /api/notifications/count)',
+        f"SELECT count(*) FROM public.notifications WHERE to_employee = '{PROBE_EMPLOYEE}' AND is_read = false",
+        'idx_notifications_unread'
+    ),
+    (
+        'notification feed (GET /api/notifications)',
+        f"SELECT * FROM public.notifications WHERE to_employee = '{PROBE_EMPLOYEE}' ORDER BY created_at DESC LIMIT 200",
+        'idx_notifications_feed'
+    ),
+    (
+        'notification duplicate check',
+        f"SELECT id FROM public.notifications WHERE related_task_id = '{PROBE_TASK}' AND type = 'note_added' "
+        f"AND to_employee = '{PROBE_EMPLOYEE}' AND created_at >= now() - interval '2 minutes'",
+        'idx_notifications_dedup'
+    ),
+    (
+        'assigned_to_multiple containment',
+        f"SELECT id FROM public.tasks WHERE assigned_to_multiple @> ARRAY['{PROBE_EMPLOYEE}'::uuid]",
+        'idx_tasks_assigned_to_multiple'
+    ),
+    (
+        'task updates newest first (GET /api/tasks/<id>/updates)',
+        f"SELECT * FROM public.task_updates WHERE task_id = '{PROBE_TASK}' ORDER BY created_at DESC",
+        'idx_task_updates_task_created'
+    ),
+]
+
+# (name, SQL whose last statement returns a single boolean)
+FUNCTION_CHECKS = [
+    (
+        'dashboard_stats(NULL) matches direct counts',
+        """SELECT (s->>'total')::bigint = (SELECT count(*) FROM public.tasks)
+              AND (s->>'completed')::bigint = (SELECT count(*) FROM public.tasks WHERE status = 'completed')
+              AND (s->>'objectives')::bigint = (SELECT count(*) FROM public.objectives)
+           FROM (SELECT dashboard_stats(NULL)::jsonb AS s) d"""
+    ),
+    (
+        'dashboard_stats(employee) counts only their tasks',
+        f"""SELECT (s->>'total')::bigint = (
+                SELECT count(*) FROM public.tasks
+                WHERE assigned_to = '{PROBE_EMPLOYEE}' OR assigned_to_multiple @> ARRAY['{PROBE_EMPLOYEE}'::uuid])
+           FROM (SELECT dashboard_stats('{PROBE_EMPLOYEE}')::jsonb AS s) d"""
+    ),
+    (
+        'fan_out_notifications inserts once per recipient, then skips duplicates',
+        """WITH recipients AS (SELECT array_agg(id) AS ids FROM (SELECT id FROM seed_employees ORDER BY n LIMIT 5) e)
+           SELECT fan_out_notifications(ids || ids[1:1] || ARRAY[NULL::uuid],
+                    '{"message": "check", "type": "plan_check"}'::jsonb) = 5
+              AND fan_out_notifications(ids, '{"message": "check", "type": "plan_check"}'::jsonb) = 0
+           FROM recipients"""
+    ),
+    (
+        'compact_notifications_batch rewrites pre-010 rows',
+        f"""INSERT INTO public.notifications (id, to_employee, message, is_read, meta)
+            VALUES ('{PROBE_LEGACY_NOTIFICATION}', '{PROBE_EMPLOYEE}', 'legacy', true, jsonb_build_object(
+              'type', 'note_added', 'task_id', '{PROBE_TASK}', 'task_title', 'Probe task',
+              'added_by', 'Probe', 'user_role', 'employee', 'note_preview', 'hi',
+              'timestamp', now(), 'is_note_notification', true, 'is_task_owner_confirmation', false));
+            SELECT compact_notifications_batch(1000000) >= 1
+              AND (SELECT type = 'note_added' AND related_task_id = '{PROBE_TASK}' AND actor_id = '{PROBE_EMPLOYEE}'
+                          AND meta = '{{"note_preview": "hi"}}'::jsonb
+                   FROM public.notifications WHERE id = '{PROBE_LEGACY_NOTIFICATION}')"""
+    ),
+    (
+        'coalesce_task_notifications merges a second event into the first',
+        f"""CREATE TEMP TABLE coalesce_first AS
+            SELECT coalesce_task_notifications(ARRAY['{PROBE_EMPLOYEE}'::uuid],
+              '{{"message": "n", "type": "note_added", "related_task_id": "{PROBE_TASK}", "meta": {{"note_preview": "one"}}}}'::jsonb,
+              ARRAY['note_added', 'progress_updated', 'file_uploaded']) AS result;
+            CREATE TEMP TABLE coalesce_second AS
+            SELECT coalesce_task_notifications(ARRAY['{PROBE_EMPLOYEE}'::uuid],
+              '{{"message": "p", "type": "progress_updated", "related_task_id": "{PROBE_TASK}", "actor_id": "{PROBE_EMPLOYEE}"}}'::jsonb,
+              ARRAY['note_added', 'progress_updated', 'file_uploaded']) AS result;
+            SELECT (f.result->>'created')::integer = 1
+              AND (s.result->>'merged')::integer = 1
+              AND (SELECT meta->>'event_count' = '2'
+                      AND meta->'event_types' = '{{"note_added": 1, "progress_updated": 1}}'::jsonb
+                      AND meta->'actor_ids' = '["{PROBE_EMPLOYEE}"]'::jsonb
+                      AND meta->>'note_preview' = 'one'
+                   FROM public.notifications
+                   WHERE to_employee = '{PROBE_EMPLOYEE}' AND related_task_id = '{PROBE_TASK}'
+                     AND created_at >= now() - interval '10 minutes')
+            FROM coalesce_first f, coalesce_second s"""
+    ),
+    (
+        'archive_notifications moves every expired row to notifications_archive',
+        """CREATE TEMP TABLE archive_check AS
+            SELECT (SELECT count(*) FROM public.notifications_archive) AS archived_before,
+                   archive_notifications(now() - interval '30 days', now() - interval '60 days', 1000000) AS moved;
+            SELECT moved > 0
+              AND archived_before + moved = (SELECT count(*) FROM public.notifications_archive)
+              AND NOT EXISTS (
+                SELECT 1 FROM public.notifications
+                WHERE (is_read AND created_at < now() - interval '30 days')
+                   OR (NOT is_read AND created_at < now() - interval '60 days'))
+            FROM archive_check"""
+    ),
+]
+
+
+def run_psql(database_url, sql):
+    result = subprocess.run(
+        ['psql', database_url, '-X', '-q', '-A', '-t', '-v', 'ON_ERROR_STOP=1'],
+        input=sql, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"psql exited with {result.returncode}")
+    return result.stdout
+
+def setup(database_url):
+    """Apply the base schema and every numbered migration, in order"""
+    files = [BASE_SCHEMA] + sorted(glob.glob(os.path.join(MIGRATIONS_DIR, '[0-9][0-9][0-9]_*.sql')))
+    for path in files:
+        print(f"📦 Applying {os.path.basename(path)}")
+        with open(path) as f:
+            run_psql(database_url, f.read())
+
+def index_names(plan):
+    """Every index a JSON EXPLAIN plan uses"""
+    names = set()
+    if isinstance(plan, dict):
+        if 'Index Name' in plan:
+            names.add(plan['Index Name'])
+        for value in plan.values():
+            names |= index_names(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            names |= index_names(value)
+    return names
+
+def sections(output):
+    """Split psql output on the @@name markers echoed between statements"""
+    found, name, lines = {}, None, []
+    for line in output.splitlines():
+        if line.startswith('@@'):
+            if name:
+                found[name] = "\n".join(lines).strip()
+            name, lines = line[2:], []
+        else:
+            lines.append(line)
+    if name:
+        found[name] = "\n".join(lines).strip()
+    return found
+
+def check(database_url):
+    script = ["BEGIN;", SEED_SQL]
+    for i, (_, query, _) in enumerate(PLAN_CHECKS):
+        script += [f"\\echo @@plan{i}", f"EXPLAIN (FORMAT JSON) {query};"]
+    for i, (_, query) in enumerate(FUNCTION_CHECKS):
+        script += [f"\\echo @@function{i}", f"{query};"]
+    script.append("ROLLBACK;")
+    results = sections(run_psql(database_url, "\n".join(script)))
+
+    failures = 0
+    for i, (name, query, expected) in enumerate(PLAN_CHECKS):
+        used = index_names(json.loads(results[f"plan{i}"]))
+        if expected in used:
+            print(f"✅ {name}: {expected}")
+        else:
+            failures += 1
+            print(f"❌ {name}: expected {expected}, plan used {sorted(used) or 'no index'}")
+    for i, (name, _) in enumerate(FUNCTION_CHECKS):
+        if results[f"function{i}"] == 't':
+            print(f"✅ {name}")
+        else:
+            failures += 1
+            print(f"❌ {name}: got {results[f'function{i}']!r}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='defaults to $DATABASE_URL')
+    parser.add_argument('--setup', action='store_true', help='apply sql_chema.md and all migrations first (scratch databases only)')
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error('set DATABASE_URL or pass --database-url')
+
+    if args.setup:
+        setup(args.database_url)
+    failures = check(args.database_url)
+    print(f"{'❌' if failures else '✅'} {len(PLAN_CHECKS) + len(FUNCTION_CHECKS) - failures} passed, {failures} failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import os
+import json
+import gzip
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from leader import LeaderLock
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+
+class NotificationMaintenance:
+    """Keeps the notifications table bounded by moving expired rows out of it.
+
+    Enabled with NOTIFICATION_MAINTENANCE=true. Read notifications older than
+    NOTIFICATION_RETENTION_READ_DAYS and unread ones older than
+    NOTIFICATION_RETENTION_UNREAD_DAYS are moved, oldest first and in batches
+    of NOTIFICATION_MAINTENANCE_BATCH_SIZE, every
+    NOTIFICATION_MAINTENANCE_INTERVAL_SECONDS by one worker per host
+    (file-lock leader). NOTIFICATION_ARCHIVE picks where they go:
+
+    - ``table`` (default): the notifications_archive table, moved by the
+      archive_notifications() function (migration 011) in one statement per batch.
+    - ``ndjson``: gzip-compressed NDJSON files in NOTIFICATION_ARCHIVE_DIR, one
+      per month. Rows are written and fsynced before they are deleted, so a
+      crash can only leave a row in both places. The files are local to the
+      host running the job; run it on a single host in this mode. They are
+      write-only as far as the API is concerned (export/audit copies).
+
+    ``archived()`` serves ``GET /api/notifications?include_archived=true``,
+    which is only available in table mode.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('NOTIFICATION_MAINTENANCE', 'false').lower() == 'true'
+        self.mode = os.getenv('NOTIFICATION_ARCHIVE', 'table').lower()
+        self.archive_dir = os.getenv('NOTIFICATION_ARCHIVE_DIR', '/tmp/erp_notification_archive')
+        self.read_days = int(os.getenv('NOTIFICATION_RETENTION_READ_DAYS', '30'))
+        self.unread_days = int(os.getenv('NOTIFICATION_RETENTION_UNREAD_DAYS', '90'))
+        self.batch_size = int(os.getenv('NOTIFICATION_MAINTENANCE_BATCH_SIZE', '1000'))
+        self.max_batches = int(os.getenv('NOTIFICATION_MAINTENANCE_MAX_BATCHES', '100'))
+        self.interval = int(os.getenv('NOTIFICATION_MAINTENANCE_INTERVAL_SECONDS', '3600'))
+        self.leader = LeaderLock('notification_maintenance')
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_run = None        # {'at', 'moved', 'seconds'} of the latest run in this process
+
+    # ---------- moving expired rows ----------
+
+    def cutoffs(self, now=None):
+        """(read_before, unread_before) ISO timestamps for the retention windows"""
+        now = now or datetime.now(timezone.utc)
+        return (
+            (now - timedelta(days=self.read_days)).isoformat(),
+            (now - timedelta(days=self.unread_days)).isoformat()
+        )
+
+    def run_once(self, supabase):
+        """Move expired notifications until none are left or max_batches is reached; returns the count"""
+        started = time.time()
+        read_before, unread_before = self.cutoffs()
+        moved = 0
+        for _ in range(self.max_batches):
+            if self.mode == 'ndjson':
+                batch = self.archive_batch_to_file(supabase, read_before, unread_before)
+            else:
+                batch = supabase.rpc("archive_notifications", {
+                    "p_read_before": read_before,
+                    "p_unread_before": unread_before,
+                    "p_batch_size": self.batch_size
+                }).execute().data or 0
+            moved += batch
+            if batch < self.batch_size:
+                break
+        self.last_run = {'at': datetime.now(timezone.utc).isoformat(), 'moved': moved, 'seconds': round(time.time() - started, 3)}
+        if moved:
+            print(f"🗄️ Archived {moved} notifications ({self.mode}) in {self.last_run['seconds']}s")
+        return moved
+
+    def archive_batch_to_file(self, supabase, read_before, unread_before):
+        """Append one batch to this month's NDJSON file, then delete it from the table"""
+        rows = (
+            supabase.table("notifications").select("*")
+            .or_(f'and(is_read.eq.true,created_at.lt."{read_before}"),and(is_read.eq.false,created_at.lt."{unread_before}")')
+            .order("created_at")
+            .limit(self.batch_size)
+            .execute()
+        ).data or []
+        if not rows:
+            return 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived_at = datetime.now(timezone.utc).isoformat()
+        path = os.path.join(self.archive_dir, f"notifications-{archived_at[:7]}.ndjson.gz")
+        # Appending to a gzip file adds a member; readers see one stream
+        with open(path, 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='ab') as archive:
+                for row in rows:
+                    archive.write((json.dumps({**row, 'archived_at': archived_at}, default=str) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+        supabase.table("notifications").delete().in_("id", [row['id'] for row in rows]).execute()
+        return len(rows)
+
+    # ---------- reading the archive ----------
+
+    @property
+    def readable(self):
+        """Whether archived rows can be served back (table mode only)"""
+        return self.mode != 'ndjson'
+
+    def archived(self, supabase, to_employee, select_clause, limit):
+        """Archived notifications, newest first (all of them when to_employee is None)"""
+        query = supabase.table("notifications_archive").select(select_clause)
+        if to_employee:
+            query = query.eq("to_employee", to_employee)
+        return query.order("created_at", desc=True).limit(limit).execute().data or []
+
+    # ---------- background thread ----------
+
+    def start(self):
+        """Start the maintenance thread in this worker (only the lock holder moves rows)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name='notification-maintenance', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if self.leader.try_acquire():
+                    self.run_once(get_supabase_client())
+            except Exception as e:
+                print(f"⚠️ Notification maintenance failed: {e}")
+            time.sleep(self.interval)
+
+
+notification_maintenance = NotificationMaintenance()
@@ -1,14 +1,39 @@
-from flask import Blueprint, request, jsonify, g, current_app
+from flask import Blueprint, request, jsonify, g, current_app, has_request_context
 import os
 from datetime import datetime
 from supabase import create_client
 import traceback
+import uuid
 import jwt
 from functools import wraps
+from etag import conditional_get, if_match_versions, apply_if_match, row_etag, with_row_etag
+from fieldsets import Fieldset
+from singleflight import singleflight
+from search_index import task_search_index
+from employee_index import employee_lookup_index
+from notification_maintenance import notification_maintenance
+from watchers import watcher_index
+import identity_map
 
 # Create the main notifications blueprint
 notification_bp = Blueprint('notifications', __name__)
 
+NOTIFICATION_LIST_COLUMNS = [
+    "id", "to_employee", "channel", "message", "type", "related_task_id",
+    "related_objective_id", "actor_id", "meta", "priority", "is_read", "created_at"
+]
+NOTIFICATION_LIST_FIELDS = Fieldset(
+    ",".join(NOTIFICATION_LIST_COLUMNS),
+    columns=NOTIFICATION_LIST_COLUMNS,
+    # meta is rebuilt from the typed columns (expand_notification_meta);
+    # archived is only set with ?include_archived=true
+    derived={
+        'meta': ["type", "related_task_id", "related_objective_id", "actor_id", "created_at"],
+        'message': ["meta", "related_task_id", "actor_id"],   # merged notifications (coalesced_message)
+        'archived': []
+    }
+)
+
 def get_supabase_client():
     try:
         supabase_url = os.getenv('SUPABASE_URL')
@@ -94,6 +119,57 @@ def get_user_notification_target():
         print(f"❌ get_user_notification_target ERROR: {str(e)}")
         return None
 
+def scope_notification_query(query, user_target):
+    """Restrict a notifications query to the rows the user may touch (None if no valid scope)"""
+    target_scope = user_target.get('scope')
+    target_value = user_target.get('value')
+    if target_scope == "admin_all":
+        return query
+    if target_scope == "employee" and target_value:
+        return query.eq("to_employee", target_value)
+    return None
+
+def explain_failed_notification_write(supabase, notification_id, user_target, versions):
+    """Response for a conditional notification write that matched no rows"""
+    if versions:
+        # Only a precondition can fail on a row the user can see - check for that case
+        current = scope_notification_query(
+            supabase.table("notifications").select("id, updated_at").eq("id", notification_id), user_target
+        ).execute()
+        if current.data and row_etag(current.data[0]) not in versions:
+            return with_row_etag(jsonify({
+                'success': False,
+                'error': 'Notification has been modified since it was loaded',
+                'current_version': row_etag(current.data[0])
+            }), current.data[0]), 412
+    return jsonify({'success': False, 'error': 'Notification not found or not authorized'}), 404
+
+def notification_version_sources():
+    """Tables (and filters) the current user's notification feed is built from"""
+    user_target = get_user_notification_target()
+    # Task/objective titles and actor names are joined in at read time (expand_notification_meta)
+    display_sources = [("tasks", None), ("objectives", None), ("employees", None)]
+    if user_target and user_target.get('scope') == 'employee' and user_target.get('value'):
+        return [("notifications", {"to_employee": user_target['value']})] + display_sources
+    return [("notifications", None)] + display_sources
+
+
+def record_note_attachers(supabase, task_id, attached_by, employee_ids, update_id=None):
+    """Remember who attached each employee to a note on a task (latest note wins, migration 014)"""
+    attached_at = datetime.utcnow().isoformat()
+    rows = [
+        {'task_id': task_id, 'employee_id': employee_id, 'attached_by': attached_by, 'update_id': update_id, 'attached_at': attached_at}
+        for employee_id in sorted({e for e in employee_ids if e and e != attached_by})
+    ]
+    if rows:
+        supabase.table("task_note_attachers").upsert(rows, on_conflict="task_id,employee_id").execute()
+
+def note_attacher(supabase, task_id, employee_id):
+    """Who last attached employee_id to a note on the task (None if nobody did)"""
+    result = supabase.table("task_note_attachers").select("attached_by") \
+        .eq("task_id", task_id).eq("employee_id", employee_id).limit(1).execute()
+    return result.data[0].get('attached_by') if result.data else None
+
 
 def create_enhanced_task_notification(task_id, notification_type, message, assigned_by=None, note_preview=None, attached_to=None, attached_to_multiple=None, old_progress=None, new_progress=None):
     """CORRECTED notification function that properly includes attached employees for notes"""
@@ -101,12 +177,12 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
         supabase = get_supabase_client()
         
         # Get task details
-        task_result = supabase.table("tasks").select("title, description, assigned_to, assigned_to_multiple").eq("id", task_id).execute()
-        if not task_result.data:
+        # Reads below are usually answered by rows the calling endpoint already loaded
+        task = identity_map.get_row(supabase, "tasks", task_id, "title, description, assigned_to, assigned_to_multiple, created_by, objective_id")
+        if not task:
             print(f"❌ Task {task_id} not found for notification")
             return
         
-        task = task_result.data[0]
         task_title = task.get('title') or task.get('description', 'Task')[:50]
         
         # Get admin employees (including superadmin from environment)
@@ -119,9 +195,9 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
         current_user_name = "Unknown"
         
         if current_user_employee_id:
-            employee_result = supabase.table("employees").select("name").eq("id", current_user_employee_id).execute()
-            if employee_result.data:
-                current_user_name = employee_result.data[0].get('name', 'Unknown')
+            employee = identity_map.get_row(supabase, "employees", current_user_employee_id, "name")
+            if employee:
+                current_user_name = employee.get('name', 'Unknown')
         else:
             current_user_name = g.user.get('name', 'Unknown')
 
@@ -152,25 +228,9 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
         
         # 1. PROGRESS UPDATES (Separate notification)
         if notification_type == "progress_updated":
-            # Notify ALL employees and ALL admins for any progress update
-            # Get all active employees
-            try:
-                all_employees_result = supabase.table("employees").select("id").eq("is_active", True).execute()
-                if all_employees_result.data:
-                    all_employee_ids = [emp['id'] for emp in all_employees_result.data]
-                    recipients.update(all_employee_ids)
-                    recipients.update(admin_employee_ids)  # Also include admins
-                    print(f"📊 Progress update - notifying ALL employees ({len(all_employee_ids)}) and ALL admins ({len(admin_employee_ids)})")
-                else:
-                    # Fallback: notify admins and assigned employees
-                    recipients.update(admin_employee_ids)
-                    recipients.update(assigned_employees)
-                    print("📊 Progress update - notifying admins and assigned employees (fallback)")
-            except Exception as e:
-                print(f"⚠️ Error getting all employees, using fallback: {e}")
-                # Fallback: notify admins and assigned employees
-                recipients.update(admin_employee_ids)
-                recipients.update(assigned_employees)
+            # Notify the task's watchers (assignees, creator, admins, followers; minus mutes)
+            recipients.update(watcher_index.task_watchers(supabase, task_id, task, admin_employee_ids))
+            print(f"📊 Progress update - notifying {len(recipients)} watchers")
             
             # Remove current user from recipients (no self-notifications)
             if current_user_employee_id and current_user_employee_id in recipients:
@@ -193,103 +253,27 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
             # Return after progress notification - don't create additional notifications
             return
 
-        # 2. NOTES & MESSAGES (Separate notification) - Notify ALL employees and ALL admins
+        # 2. NOTES & MESSAGES (Separate notification) - Notify the task's watchers
         elif notification_type == "note_added":
-            # Notify ALL employees and ALL admins for any note
-            # Get all active employees
-            try:
-                all_employees_result = supabase.table("employees").select("id").eq("is_active", True).execute()
-                if all_employees_result.data:
-                    all_employee_ids = [emp['id'] for emp in all_employees_result.data]
-                    recipients.update(all_employee_ids)
-                    recipients.update(admin_employee_ids)  # Also include admins
-                    print(f"📝 Note added - notifying ALL employees ({len(all_employee_ids)}) and ALL admins ({len(admin_employee_ids)})")
-                else:
-                    # Fallback: notify admins, assigned employees, and attached employees
-                    recipients.update(admin_employee_ids)
-                    recipients.update(assigned_employees)
-                    recipients.update(attached_employees)
-                    print("📝 Note added - notifying admins, assigned, and attached employees (fallback)")
-            except Exception as e:
-                print(f"⚠️ Error getting all employees, using fallback: {e}")
-                # Fallback: notify admins, assigned employees, and attached employees
-                recipients.update(admin_employee_ids)
-                recipients.update(assigned_employees)
-                recipients.update(attached_employees)
+            # Watchers plus everyone attached to this note, even if they muted the task
+            recipients.update(watcher_index.task_watchers(supabase, task_id, task, admin_employee_ids))
+            recipients.update(attached_employees)
+            print(f"📝 Note added - notifying {len(recipients)} watchers and attached employees")
             
             # Track who originally attached the current employee (for response notifications)
             attached_by_employee_id = None
             if current_user_role == 'employee':
                 # CRITICAL: Find who originally attached this employee and notify them
                 print(f"📝 Employee {current_user_employee_id} adding note to task {task_id}")
-                
-                print(f"🎯 Recipients after initial update: {recipients}")
-
                 try:
-                    # Find the note where THIS employee was attached (the one that triggered their ability to respond)
-                    employee_id_str = str(current_user_employee_id)
-                    print(f"🔍 Looking for who attached employee {employee_id_str} in task {task_id}")
-                    
-                    # Query all notes for this task (including the one just created)
-                    all_updates = supabase.table("task_updates") \
-                        .select("id, updated_by, attached_to, attached_to_multiple, created_at") \
-                        .eq("task_id", task_id) \
-                        .order("created_at", desc=True) \
-                        .execute()
-                    
-                    print(f"🔍 Found {len(all_updates.data) if all_updates.data else 0} total updates for this task")
-                    
-                    if all_updates.data:
-                        # Find the most recent note where this employee was attached
-                        for idx, update in enumerate(all_updates.data):
-                            update_creator = update.get('updated_by')
-                            
-                            # Skip the current update (the response itself)
-                            if update_creator == current_user_employee_id:
-                                print(f"⏭️  Skipping update {idx} - created by current user")
-                                continue
-                            
-                            # Check if this employee was attached in this note
-                            update_attached_to = update.get('attached_to')
-                            update_attached_multiple = update.get('attached_to_multiple') or []
-                            
-                            print(f"🔍 Checking update {idx}: creator={update_creator}, attached_to={update_attached_to}, attached_to_multiple={update_attached_multiple}")
-                            
-                            was_attached_here = False
-                            
-                            # Check attached_to
-                            if update_attached_to:
-                                if str(update_attached_to) == employee_id_str:
-                                    was_attached_here = True
-                                    print(f"✅ Found match in attached_to: {update_attached_to}")
-                            
-                            # Check attached_to_multiple
-                            if not was_attached_here and isinstance(update_attached_multiple, list):
-                                attached_multiple_str = [str(id) for id in update_attached_multiple]
-                                if employee_id_str in attached_multiple_str:
-                                    was_attached_here = True
-                                    print(f"✅ Found match in attached_to_multiple: {attached_multiple_str}")
-                            
-                            # If this employee was attached in this note, notify the person who created it
-                            if was_attached_here:
-                                note_creator_id = update.get('updated_by')
-                                if note_creator_id and note_creator_id != current_user_employee_id:
-                                    recipients.add(note_creator_id)
-                                    attached_by_employee_id = note_creator_id
-                                    print(f"🧭 ✅ FOUND! Employee {current_user_employee_id} was attached by {note_creator_id} - adding to recipients")
-                                    print(f"🎯 Recipients before: {recipients}")
-                                    break  # Only notify the most recent one who attached them
-                        else:
-                            print(f"⚠️ No note found where employee {current_user_employee_id} was attached")
+                    attached_by_employee_id = note_attacher(supabase, task_id, current_user_employee_id)
+                    if attached_by_employee_id:
+                        recipients.add(attached_by_employee_id)
+                        print(f"🧭 ✅ FOUND! Employee {current_user_employee_id} was attached by {attached_by_employee_id} - adding to recipients")
                     else:
-                        print(f"⚠️ No updates found for task {task_id}")
-                                    
+                        print(f"⚠️ No note found where employee {current_user_employee_id} was attached")
                 except Exception as e:
                     print(f"⚠️ Failed to find who attached this employee for notifications: {e}")
-                    import traceback
-                    traceback.print_exc()
-                
-                print(f"🎯 Final recipients after lookup: {recipients}")
 
                 print("📝 Employee added note - notifying admins, task assignees, attached employees AND the person who attached them")
             
@@ -354,29 +338,11 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
                     )
             return
 
-        # 3. FILE UPLOADS & ATTACHMENTS - Notify ALL employees and ALL admins
+        # 3. FILE UPLOADS & ATTACHMENTS - Notify the task's watchers
         elif notification_type == "file_uploaded":
-            # Notify ALL employees and ALL admins for any file upload
-            # Get all active employees
-            try:
-                all_employees_result = supabase.table("employees").select("id").eq("is_active", True).execute()
-                if all_employees_result.data:
-                    all_employee_ids = [emp['id'] for emp in all_employees_result.data]
-                    recipients.update(all_employee_ids)
-                    recipients.update(admin_employee_ids)  # Also include admins
-                    print(f"📎 File uploaded - notifying ALL employees ({len(all_employee_ids)}) and ALL admins ({len(admin_employee_ids)})")
-                else:
-                    # Fallback: notify admins and assigned employees
-                    recipients.update(admin_employee_ids)
-                    recipients.update(assigned_employees)
-                    recipients.update(attached_employees)
-                    print("📎 File uploaded - notifying admins, assigned, and attached employees (fallback)")
-            except Exception as e:
-                print(f"⚠️ Error getting all employees, using fallback: {e}")
-                # Fallback: notify admins and assigned employees
-                recipients.update(admin_employee_ids)
-                recipients.update(assigned_employees)
-                recipients.update(attached_employees)
+            recipients.update(watcher_index.task_watchers(supabase, task_id, task, admin_employee_ids))
+            recipients.update(attached_employees)
+            print(f"📎 File uploaded - notifying {len(recipients)} watchers and attached employees")
         
         # 4. TASK ASSIGNMENTS & UPDATES
         elif notification_type == "task_assigned":
@@ -443,16 +409,121 @@ def create_enhanced_task_notification(task_id, notification_type, message, assig
         print(f"⚠️ Failed to create notification: {e}")
         traceback.print_exc()
 
+# Window in which a repeat notification (same recipient, type and task) is skipped
+NOTIFICATION_DEDUP_MINUTES = 2
+
+# Task events merged into the recipient's recent unread notification for the
+# task (0 turns merging off), and how each is counted in the merged message
+NOTIFICATION_COALESCE_MINUTES = int(os.getenv('NOTIFICATION_COALESCE_MINUTES', '10'))
+COALESCED_NOTIFICATION_TYPES = {
+    "note_added": ("note", "notes"),
+    "progress_updated": ("progress update", "progress updates"),
+    "file_uploaded": ("file", "files")
+}
+
+def current_actor_id():
+    """Employee id of the user whose action is being notified about (None for
+    the env superadmin and outside a request, e.g. the due scheduler)"""
+    if not has_request_context() or not getattr(g, 'user', None):
+        return None
+    valid = notification_recipients([g.user.get('employee_id')])
+    return valid[0] if valid else None
+
+def compact_meta(meta):
+    """Drop empty values so a row's meta only stores what it actually carries"""
+    return {k: v for k, v in meta.items() if v not in (None, False, [], '')}
+
+def expand_notification_meta(supabase, notifications):
+    """Rebuild the meta fields clients read from the compact row (migration 010).
+
+    Task and objective titles come from the task search index, actor names and
+    roles from the employee lookup index; ids either index does not hold are
+    fetched with one query each. Keys a row still stores itself (rows written
+    before 010 and not yet rewritten) win over derived ones. Notifications
+    that merged several events (migration 012) get their message rendered here.
+    """
+    task_titles = task_search_index.lookup_task_titles(supabase, [n.get('related_task_id') for n in notifications])
+    objective_titles = task_search_index.lookup_objective_titles(supabase, [n.get('related_objective_id') for n in notifications])
+    people = employee_lookup_index.names(supabase, [
+        employee_id for n in notifications
+        for employee_id in [n.get('actor_id'), (n.get('meta') or {}).get('employee_id')] + ((n.get('meta') or {}).get('actor_ids') or [])
+        if employee_id
+    ])
+
+    for notification in notifications:
+        meta = notification.get('meta') or {}
+        notification_type = meta.get('type') or notification.get('type')
+        task_id = notification.get('related_task_id')
+        objective_id = notification.get('related_objective_id')
+        actor = people.get(notification.get('actor_id')) or {}
+        actor_name = actor.get('name') or meta.get('actor_name')
+        derived = {
+            "type": notification_type,
+            "task_id": task_id,
+            "task_title": task_titles.get(task_id),
+            "added_by": actor_name,
+            "user_role": actor.get('role'),
+            "specially_attached": bool(meta.get('attached_to') or meta.get('attached_to_multiple')),
+            "is_note_notification": notification_type == "note_added",
+            "is_attachment_notification": notification_type == "file_uploaded",
+            "is_task_owner_confirmation": False,
+            "timestamp": notification.get('created_at')
+        }
+        if objective_id:
+            derived.update({
+                "objective_id": objective_id,
+                "objective_title": objective_titles.get(objective_id),
+                "created_by": actor_name,
+                "created_by_id": notification.get('actor_id')
+            })
+        subject = people.get(meta.get('employee_id'))
+        if subject:
+            derived.update({"name": subject.get('name'), "email": subject.get('email')})
+        if (meta.get('event_count') or 1) > 1:
+            derived["actor_names"] = [people[a]['name'] for a in meta.get('actor_ids') or [] if (people.get(a) or {}).get('name')]
+            if 'message' in notification:
+                notification['message'] = coalesced_message(meta, task_titles.get(task_id), derived["actor_names"] or [actor_name])
+        notification['meta'] = {**{k: v for k, v in derived.items() if v is not None}, **meta}
+        notification['meta'].pop('actor_name', None)
+    return notifications
+
+def coalesced_message(meta, task_title, actor_names):
+    """'🔔 5 updates on <task> by A, B (3 notes, 2 files)' for a merged notification (migration 012)"""
+    event_types = meta.get('event_types') or {}
+    counts = []
+    for event_type, count in event_types.items():
+        singular, plural = COALESCED_NOTIFICATION_TYPES.get(event_type, ("update", "updates"))
+        counts.append(f"{count} {singular if count == 1 else plural}")
+    label = "updates"
+    if len(event_types) == 1:
+        label = COALESCED_NOTIFICATION_TYPES.get(next(iter(event_types)), (None, "updates"))[1]
+    message = f"🔔 {meta['event_count']} {label} on {task_title or 'a task'}"
+    names = [name for name in actor_names if name]
+    if names:
+        message += " by " + ", ".join(names[:3]) + (f" and {len(names) - 3} others" if len(names) > 3 else "")
+    if len(counts) > 1:
+        message += f" ({', '.join(counts)})"
+    return message
+
+def notification_recipients(recipients):
+    """Recipient ids that can own a notification row (drops None and the
+    'superadmin-default' placeholder, which is not an employee)"""
+    valid = []
+    for recipient in recipients:
+        try:
+            valid.append(str(uuid.UUID(str(recipient))))
+        except (ValueError, AttributeError):
+            continue
+    return valid
+
 def get_admin_employees():
     """Get all admin employee IDs, including superadmin from environment"""
     supabase = get_supabase_client()
     
-    # First, get all admins and superadmins from the database
-    result = supabase.table("employees").select("id, email, name, role").in_("role", ["admin", "superadmin"]).execute()
-    
-    admin_employees = []
-    if result.data:
-        admin_employees = result.data
+    # First, get all admins and superadmins from the database (once per request)
+    admin_employees = identity_map.get_rows("employees", "admins", lambda: (
+        supabase.table("employees").select("id, email, name, role").in_("role", ["admin", "superadmin"]).execute()
+    ).data or [])
     
     # If no admins found in database, use the superadmin from environment
     if not admin_employees:
@@ -486,54 +557,170 @@ def create_single_notification(
     assigned_by=None,
     is_task_owner_confirmation=False
 ):
-    """Helper function to create notifications for one or more recipients"""
-    for recipient in recipients:
-        if recipient:  # Ensure recipient is not None
-            # DEDUPLICATION: Check for recent duplicate notification (last 2 minutes)
-            duplicate_check = supabase.table("notifications").select("id").eq("meta->>task_id", task_id).eq("meta->>type", notification_type).eq("to_employee", recipient).gte("created_at", (datetime.utcnow() - timedelta(minutes=2)).isoformat()).execute()
-            
-            if duplicate_check.data:
-                print(f"⏭️  Skipping duplicate notification for task {task_id}, type {notification_type}")
-                continue
+    """Helper function to create notifications for one or more recipients
+    
+    Notes, progress updates and uploads go through coalesce_task_notifications
+    (migration 012), which merges the event into each recipient's unread
+    notification for the task from the last NOTIFICATION_COALESCE_MINUTES.
+    Other events use fan_out_notifications (migration 009), which skips
+    recipients who got the same type for this task in the last 2 minutes.
+    """
+    recipients = notification_recipients(recipients)
+    if not recipients:
+        return 0
 
-            # Remove double emoji formatting since it's already done in the calling function
-            final_message = message
+    # Remove double emoji formatting since it's already done in the calling function
+    final_message = message
 
-            notification_data = {
-                "to_employee": recipient,
-                "channel": "in_app",
-                "message": final_message,
-                "type": notification_type,
-                "related_task_id": task_id if task_id else None,
-                "meta": {
-                    "task_id": task_id,
-                    "task_title": task.get('title') or task.get('description', 'Task')[:100], 
-                    "type": notification_type,
-                    "assigned_by": assigned_by,
-                    "added_by": current_user_name,
-                    "user_role": current_user_role,
-                    "note_preview": note_preview if is_note else None,  # Only include note preview for note notifications
-                    "specially_attached": True if attached_to or attached_to_multiple else False,
-                    "attached_to": attached_to,
-                    "attached_to_multiple": attached_to_multiple,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "is_note_notification": is_note,
-                    "is_attachment_notification": not is_note and notification_type == "file_uploaded",
-                    "is_task_owner_confirmation": is_task_owner_confirmation
-                },
-                "priority": "normal",
-                "created_at": datetime.utcnow().isoformat(),
-                "is_read": False
-            }
-            
-            try:
-                result = supabase.table("notifications").insert(notification_data).execute()
-                if result.data:
-                    print(f"✅ Notification created for {recipient}: {final_message}")
-                else:
-                    print(f"❌ Failed to create notification for {recipient}")
-            except Exception as e:
-                print(f"❌ Error creating notification for {recipient}: {e}")
+    # Task title, actor name/role and the type flags are joined in at read
+    # time (expand_notification_meta); meta only keeps what cannot be
+    actor_id = current_actor_id()
+    notification_data = {
+        "channel": "in_app",
+        "message": final_message,
+        "type": notification_type,
+        "related_task_id": task_id if task_id else None,
+        "actor_id": actor_id,
+        "meta": compact_meta({
+            "actor_name": None if actor_id else current_user_name,   # env superadmin has no employee row
+            "assigned_by": assigned_by,
+            "note_preview": note_preview if is_note else None,  # Only include note preview for note notifications
+            "attached_to": attached_to,
+            "attached_to_multiple": attached_to_multiple,
+            "is_task_owner_confirmation": is_task_owner_confirmation
+        }),
+        "priority": "normal"
+    }
+    
+    try:
+        if task_id and notification_type in COALESCED_NOTIFICATION_TYPES and not is_task_owner_confirmation and NOTIFICATION_COALESCE_MINUTES > 0:
+            result = supabase.rpc("coalesce_task_notifications", {
+                "p_recipients": list(recipients),
+                "p_notification": notification_data,
+                "p_merge_types": list(COALESCED_NOTIFICATION_TYPES),
+                "p_window_minutes": NOTIFICATION_COALESCE_MINUTES
+            }).execute()
+            counts = result.data or {}
+            print(f"✅ {counts.get('created', 0)} notifications created, {counts.get('merged', 0)} merged: {final_message}")
+            return counts.get('created', 0) + counts.get('merged', 0)
+
+        result = supabase.rpc("fan_out_notifications", {
+            "p_recipients": list(recipients),
+            "p_notification": notification_data,
+            "p_dedup_minutes": NOTIFICATION_DEDUP_MINUTES
+        }).execute()
+        created = result.data or 0
+        print(f"✅ {created} notifications created ({len(recipients) - created} duplicates skipped): {final_message}")
+        return created
+    except Exception as e:
+        print(f"❌ Error creating notifications for {len(recipients)} recipients: {e}")
+        return 0
+
+
+def create_batch_assignment_notifications(supabase, assignments, current_user_name, current_user_role):
+    """Send ONE coalesced task_assigned notification per recipient for a batch of tasks
+    
+    ``assignments`` maps recipient employee id -> list of task rows assigned to them.
+    All rows are written with a single insert.
+    """
+    current_user_employee_id = g.user.get('employee_id') if hasattr(g, 'user') and g.user else None
+    actor_id = current_actor_id()
+    notification_rows = []
+    
+    for recipient, tasks in assignments.items():
+        if not recipient or recipient == current_user_employee_id or not tasks:
+            continue
+        
+        titles = [(t.get('title') or 'Task')[:100] for t in tasks]
+        if len(tasks) == 1:
+            message = f"📋 New task assigned: {titles[0]}..."
+        else:
+            preview = ", ".join(titles[:3])
+            if len(titles) > 3:
+                preview += f" and {len(titles) - 3} more"
+            message = f"📋 {len(tasks)} tasks assigned to you by {current_user_name}: {preview}"
+        
+        first_task_id = tasks[0].get('id')
+        notification_rows.append({
+            "to_employee": recipient,
+            "channel": "in_app",
+            "message": message,
+            "type": "task_assigned",
+            "related_task_id": first_task_id if len(tasks) == 1 else None,
+            "actor_id": actor_id,
+            "meta": compact_meta({
+                "task_ids": [t.get('id') for t in tasks] if len(tasks) > 1 else None,
+                "task_count": len(tasks),
+                "actor_name": None if actor_id else current_user_name,
+                "is_batch": True
+            }),
+            "priority": "normal",
+            "is_read": False
+        })
+    
+    if not notification_rows:
+        return 0
+    
+    try:
+        supabase.table("notifications").insert(notification_rows).execute()
+        print(f"✅ Batch assignment notifications created for {len(notification_rows)} recipients")
+        return len(notification_rows)
+    except Exception as e:
+        print(f"❌ Error creating batch assignment notifications: {e}")
+        return 0
+
+
+def create_due_reminder_notifications(supabase, reminders):
+    """Send task_due_soon / task_overdue reminders, ONE notification per recipient and kind
+
+    ``reminders`` is a list of ``(kind, task)`` pairs. Tasks go to their
+    assignees, or to their creator when unassigned. All rows are written with a
+    single insert. Runs outside a request (from the due scheduler).
+    """
+    grouped = {}
+    for kind, task in reminders:
+        recipients = set(task.get('assigned_to_multiple') or [])
+        if task.get('assigned_to'):
+            recipients.add(task['assigned_to'])
+        if not recipients and task.get('created_by'):
+            recipients.add(task['created_by'])
+        for recipient in recipients:
+            grouped.setdefault((recipient, kind), []).append(task)
+
+    notification_rows = []
+    for (recipient, kind), tasks in grouped.items():
+        titles = [(t.get('title') or 'Task')[:100] for t in tasks]
+        if kind == "task_overdue":
+            headline = "⏰ Task overdue" if len(tasks) == 1 else f"⏰ {len(tasks)} tasks overdue"
+        else:
+            headline = "📅 Task due soon" if len(tasks) == 1 else f"📅 {len(tasks)} tasks due soon"
+        preview = ", ".join(titles[:3])
+        if len(titles) > 3:
+            preview += f" and {len(titles) - 3} more"
+
+        first_task = tasks[0]
+        notification_rows.append({
+            "to_employee": recipient,
+            "channel": "in_app",
+            "message": f"{headline}: {preview}",
+            "type": kind,
+            "related_task_id": first_task.get('id') if len(tasks) == 1 else None,
+            "meta": compact_meta({
+                "task_ids": [t.get('id') for t in tasks] if len(tasks) > 1 else None,
+                "task_count": len(tasks),
+                "due_date": first_task.get('due_date') if len(tasks) == 1 else None,
+                "is_batch": len(tasks) > 1
+            }),
+            "priority": "high" if kind == "task_overdue" else "normal",
+            "is_read": False
+        })
+
+    if not notification_rows:
+        return 0
+
+    supabase.table("notifications").insert(notification_rows).execute()
+    print(f"✅ Due reminders created: {len(notification_rows)} notifications for {len(reminders)} reminders")
+    return len(notification_rows)
 
 
 def create_admin_event_notification(notification_type, message, meta=None, exclude_employee_id=None):
@@ -551,55 +738,35 @@ def create_admin_event_notification(notification_type, message, meta=None, exclu
                 continue
             recipients.add(str(admin_id))
         
+        recipients = notification_recipients(recipients)
         if not recipients:
             print("⚠️ No admin recipients for admin event notification")
             return
         
-        for recipient in recipients:
-            duplicate_check = (
-                supabase
-                .table("notifications")
-                .select("id")
-                .eq("meta->>type", notification_type)
-                .eq("to_employee", recipient)
-                .gte("created_at", (datetime.utcnow() - timedelta(minutes=2)).isoformat())
-                .execute()
-            )
-            if duplicate_check.data:
-                print(f"⏭️  Skipping duplicate admin event notification ({notification_type}) for {recipient}")
-                continue
-            
-            notification_meta = {
-                "type": notification_type,
-                "category": "admin_event",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            if meta:
-                notification_meta.update(meta)
-            
-            notification_data = {
-                "to_employee": recipient,
+        notification_meta = {"category": "admin_event"}
+        if meta:
+            notification_meta.update(meta)
+        
+        # One call for all admins; skips admins who got this type in the last 2 minutes
+        result = supabase.rpc("fan_out_notifications", {
+            "p_recipients": list(recipients),
+            "p_notification": {
                 "channel": "in_app",
                 "message": message,
-                "meta": notification_meta,
-                "priority": "normal",
-                "created_at": datetime.utcnow().isoformat(),
-                "is_read": False
-            }
-            
-            try:
-                result = supabase.table("notifications").insert(notification_data).execute()
-                if result.data:
-                    print(f"✅ Admin event notification created for {recipient}: {message}")
-                else:
-                    print(f"❌ Failed to create admin event notification for {recipient}")
-            except Exception as e:
-                print(f"❌ Error creating admin event notification for {recipient}: {e}")
+                "type": notification_type,
+                "actor_id": current_actor_id(),
+                "meta": compact_meta(notification_meta),
+                "priority": "normal"
+            },
+            "p_dedup_minutes": NOTIFICATION_DEDUP_MINUTES
+        }).execute()
+        print(f"✅ Admin event notification created for {result.data or 0} of {len(recipients)} admins: {message}")
     except Exception as e:
         print(f"❌ create_admin_event_notification ERROR: {e}")
 # ===== MAIN NOTIFICATIONS ENDPOINT - FIXED =====
 @notification_bp.route('/api/notifications', methods=['GET'])
 @notifications_token_required  # ← THIS IS THE KEY FIX
+@conditional_get(notification_version_sources)
 def get_notifications():
     """Get notifications for current user - FIXED VERSION"""
     try:
@@ -622,38 +789,59 @@ def get_notifications():
         user_role = user_target.get('role')
         
         # Admin sees all notifications only when no employee ID is available
-        base_columns = [
-            "id", "to_employee", "channel", "message",
-            "meta", "priority", "is_read", "created_at"
-        ]
-        select_clause = ",".join(base_columns)
+        try:
+            fields = NOTIFICATION_LIST_FIELDS.requested()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+        if include_archived and not notification_maintenance.readable:
+            return jsonify({'success': False, 'error': 'include_archived needs NOTIFICATION_ARCHIVE=table (NDJSON archives are not served)'}), 400
+        # is_read is always fetched for unread_count, created_at to merge in archived rows
+        select_clause = NOTIFICATION_LIST_FIELDS.select(fields, required=['is_read', 'created_at'] if include_archived else ['is_read'])
 
+        # Concurrent polls of the same feed share one query (see singleflight.py)
         if target_scope == "admin_all":
             print("👑 Admin (no employee record) - fetching ALL notifications")
-            result = (
+            result = singleflight.do(('notifications.list', 'admin_all', None, select_clause), lambda: (
                 supabase.table("notifications")
                 .select(select_clause)
                 .order("created_at", desc=True)
                 .limit(500)
                 .execute()
-            )
+            ))
             feed_scope = 'admin_all'
         elif target_scope == "employee" and target_value:
             print(f"🎯 Scoped notifications for employee: {target_value}")
-            result = (
+            result = singleflight.do(('notifications.list', 'employee', target_value, select_clause), lambda: (
                 supabase.table("notifications")
                 .select(select_clause)
                 .eq("to_employee", target_value)
                 .order("created_at", desc=True)
                 .limit(200)
                 .execute()
-            )
+            ))
             feed_scope = 'admin' if user_role in ['admin', 'superadmin'] else 'employee'
         else:
             return jsonify({'success': False, 'error': 'Invalid notification target'}), 400
         
-        notifications = result.data if result.data else []
+        # Copies: the result may be shared with concurrent callers (singleflight)
+        notifications = [dict(n) for n in result.data] if result.data else []
         unread_count = len([n for n in notifications if not n.get('is_read', False)])
+
+        # Rows moved out by the maintenance job (notification_maintenance.py);
+        # they are not counted as unread
+        if include_archived:
+            limit = 500 if feed_scope == 'admin_all' else 200
+            archive_owner = None if feed_scope == 'admin_all' else target_value
+            archived = singleflight.do(('notifications.archived', archive_owner, select_clause), lambda: (
+                notification_maintenance.archived(supabase, archive_owner, select_clause, limit)
+            ))
+            notifications = [{**n, 'archived': False} for n in notifications] + [{**n, 'archived': True} for n in archived]
+            notifications.sort(key=lambda n: n.get('created_at') or '', reverse=True)
+            notifications = notifications[:limit]
+        if NOTIFICATION_LIST_FIELDS.wants(fields, 'meta', 'message'):
+            expand_notification_meta(supabase, notifications)
+        notifications = NOTIFICATION_LIST_FIELDS.trim(notifications, fields)
         
         print(f"✅ SUCCESS - {len(notifications)} notifications, {unread_count} unread")
         
@@ -674,43 +862,37 @@ def get_notifications():
 @notification_bp.route('/api/notifications/<notification_id>/read', methods=['PUT'])
 @notifications_token_required
 def mark_notification_read(notification_id):
-    """Mark a notification as read"""
+    """Mark a notification as read (one conditional write scoped to the user's feed)"""
     try:
         supabase = get_supabase_client()
         user_target = get_user_notification_target()
+        versions = if_match_versions()
         
         if not user_target:
             return jsonify({'success': False, 'error': 'Could not identify user'}), 400
         
-        target_scope = user_target.get('scope')
-        target_value = user_target.get('value')
-        
-        if target_scope == "admin_all":
-            notification_result = supabase.table("notifications").select("*").eq("id", notification_id).execute()
-        elif target_scope == "employee" and target_value:
-            notification_result = supabase.table("notifications").select("*").eq("id", notification_id).eq("to_employee", target_value).execute()
-        else:
-            return jsonify({'success': False, 'error': 'Invalid notification target'}), 400
-        
-        if not notification_result.data:
-            return jsonify({'success': False, 'error': 'Notification not found or not authorized'}), 404
-        
         update_data = {
             "is_read": True,
             "read_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table("notifications").update(update_data).eq("id", notification_id).execute()
+        query = scope_notification_query(
+            supabase.table("notifications").update(update_data).eq("id", notification_id), user_target
+        )
+        if query is None:
+            return jsonify({'success': False, 'error': 'Invalid notification target'}), 400
+        
+        result = apply_if_match(query, versions).execute()
         
         if result.data:
-            return jsonify({
+            return with_row_etag(jsonify({
                 'success': True,
                 'message': 'Notification marked as read',
                 'notification': result.data[0]
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Failed to update notification'}), 500
+            }), result.data[0])
+        
+        return explain_failed_notification_write(supabase, notification_id, user_target, versions)
             
     except Exception as e:
         print(f"❌ mark_notification_read ERROR: {str(e)}")
@@ -767,9 +949,13 @@ def get_notification_count():
         target_value = user_target.get('value')
         
         if target_scope == "admin_all":
-            result = supabase.table("notifications").select("id", count="exact").eq("is_read", False).execute()
+            result = singleflight.do(('notifications.count', 'admin_all', None), lambda: (
+                supabase.table("notifications").select("id", count="exact").eq("is_read", False).execute()
+            ))
         elif target_scope == "employee" and target_value:
-            result = supabase.table("notifications").select("id", count="exact").eq("to_employee", target_value).eq("is_read", False).execute()
+            result = singleflight.do(('notifications.count', 'employee', target_value), lambda: (
+                supabase.table("notifications").select("id", count="exact").eq("to_employee", target_value).eq("is_read", False).execute()
+            ))
         else:
             return jsonify({'success': False, 'error': 'Invalid notification target'}), 400
         
@@ -787,36 +973,30 @@ def get_notification_count():
 @notification_bp.route('/api/notifications/<notification_id>', methods=['DELETE'])
 @notifications_token_required
 def delete_notification(notification_id):
-    """Delete a notification"""
+    """Delete a notification (one conditional write scoped to the user's feed)"""
     try:
         supabase = get_supabase_client()
         user_target = get_user_notification_target()
+        versions = if_match_versions()
         
         if not user_target:
             return jsonify({'success': False, 'error': 'Could not identify user'}), 400
         
-        target_scope = user_target.get('scope')
-        target_value = user_target.get('value')
-        
-        if target_scope == "admin_all":
-            notification_result = supabase.table("notifications").select("*").eq("id", notification_id).execute()
-        elif target_scope == "employee" and target_value:
-            notification_result = supabase.table("notifications").select("*").eq("id", notification_id).eq("to_employee", target_value).execute()
-        else:
+        query = scope_notification_query(
+            supabase.table("notifications").delete().eq("id", notification_id), user_target
+        )
+        if query is None:
             return jsonify({'success': False, 'error': 'Invalid notification target'}), 400
         
-        if not notification_result.data:
-            return jsonify({'success': False, 'error': 'Notification not found or not authorized'}), 404
-        
-        result = supabase.table("notifications").delete().eq("id", notification_id).execute()
+        result = apply_if_match(query, versions).execute()
         
         if result.data:
             return jsonify({
                 'success': True,
                 'message': 'Notification deleted'
             })
-        else:
-            return jsonify({'success': False, 'error': 'Failed to delete notification'}), 500
+        
+        return explain_failed_notification_write(supabase, notification_id, user_target, versions)
             
     except Exception as e:
         print(f"❌ delete_notification ERROR: {str(e)}")
@@ -0,0 +1,16 @@
+PAGE_SIZE = 1000
+
+
+def fetch_all(query_factory, page_size=PAGE_SIZE):
+    """Run a PostgREST query page by page (the API caps each response) and return every row
+
+    ``query_factory()`` must return a fresh query with a stable order
+    (e.g. the cursor column, then id) each time it is called.
+    """
+    rows, start = [], 0
+    while True:
+        page = query_factory().range(start, start + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
@@ -0,0 +1,183 @@
+"""
+Progress time series built from the task_progress_daily buckets
+(see migrations/003_task_progress_daily.sql).
+
+Run `python progress_history.py backfill` once to bucket task_updates rows
+written before the trigger existed.
+"""
+import os
+import sys
+from datetime import datetime, date, timedelta, timezone
+from dotenv import load_dotenv
+from paging import fetch_all
+
+BACKFILL_PAGE_SIZE = 1000
+UPSERT_CHUNK_SIZE = 500
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def parse_timestamp(timestamp):
+    """ISO timestamp -> aware datetime (naive values are taken as UTC)"""
+    parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def utc_day(timestamp):
+    """UTC calendar day of an ISO timestamp"""
+    return parse_timestamp(timestamp).astimezone(timezone.utc).date()
+
+def parse_day(value):
+    """'YYYY-MM-DD' -> date (None when empty); raises ValueError when malformed"""
+    return date.fromisoformat(value[:10]) if value else None
+
+def bucket_updates(updates, buckets=None):
+    """Fold task_updates rows into {(task_id, day): bucket}, same rules as the trigger"""
+    buckets = {} if buckets is None else buckets
+    for update in updates:
+        if update.get('progress') is None or not update.get('created_at'):
+            continue
+        key = (update['task_id'], utc_day(update['created_at']).isoformat())
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = {
+                'task_id': key[0],
+                'day': key[1],
+                'progress': update['progress'],
+                'update_count': 1,
+                'last_update_at': update['created_at']
+            }
+            continue
+        bucket['update_count'] += 1
+        if parse_timestamp(update['created_at']) >= parse_timestamp(bucket['last_update_at']):
+            bucket['progress'] = update['progress']
+            bucket['last_update_at'] = update['created_at']
+    return buckets
+
+def backfill_progress_buckets(supabase):
+    """Rebuild every bucket from the full task_updates history (safe to re-run)"""
+    buckets = {}
+    offset = 0
+    while True:
+        page = (
+            supabase.table("task_updates")
+            .select("task_id, progress, created_at")
+            .not_.is_("progress", "null")
+            .order("created_at")
+            .order("id")
+            .range(offset, offset + BACKFILL_PAGE_SIZE - 1)
+            .execute()
+        ).data or []
+        bucket_updates(page, buckets)
+        offset += len(page)
+        if len(page) < BACKFILL_PAGE_SIZE:
+            break
+
+    rows = list(buckets.values())
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        supabase.table("task_progress_daily").upsert(rows[start:start + UPSERT_CHUNK_SIZE], on_conflict="task_id,day").execute()
+    print(f"✅ Backfilled {len(rows)} progress buckets from {offset} task updates")
+    return len(rows)
+
+def task_progress_history(supabase, task_id, start=None, end=None):
+    """Daily progress points for one task"""
+    def build_query():
+        query = supabase.table("task_progress_daily").select("day, progress, update_count").eq("task_id", task_id)
+        if start:
+            query = query.gte("day", start.isoformat())
+        if end:
+            query = query.lte("day", end.isoformat())
+        return query.order("day")
+    return fetch_all(build_query)
+
+def objective_burndown(supabase, objective, start=None, end=None):
+    """Remaining work per day for an objective's tasks
+
+    Each task counts 100 points from the day it was created, minus the last
+    progress reported on or before that day. Today's point uses the tasks'
+    current completion_percentage, which also covers progress set directly
+    through the task edit form.
+    """
+    tasks = fetch_all(lambda: (
+        supabase.table("tasks").select("id, created_at, completion_percentage")
+        .eq("objective_id", objective['id']).order("id")
+    ))
+    today = datetime.utcnow().date()
+    end = min(end or today, today)
+    # Nothing happens before the objective or its first task existed, so the window starts there at the earliest
+    created_day = utc_day(objective['created_at']) if objective.get('created_at') else today
+    first_day = min([created_day] + [utc_day(t['created_at']) for t in tasks if t.get('created_at')])
+    start = max(start or first_day, first_day)
+    if start > end:
+        return {'points': [], 'ideal': []}
+
+    # Events per day: task created (progress 0) and daily progress buckets
+    events = {}
+    for task in tasks:
+        day = utc_day(task['created_at']) if task.get('created_at') else start
+        events.setdefault(day, []).append((task['id'], 0))
+    if tasks:
+        # Joined on objective_id rather than an IN list of every task id, which
+        # outgrows the request URL on large objectives
+        buckets = fetch_all(lambda: (
+            supabase.table("task_progress_daily")
+            .select("task_id, day, progress, tasks!inner(objective_id)")
+            .eq("tasks.objective_id", objective['id'])
+            .lte("day", end.isoformat())
+            .order("day")
+            .order("task_id")
+        ))
+        for bucket in buckets:
+            events.setdefault(parse_day(bucket['day']), []).append((bucket['task_id'], bucket['progress']))
+
+    progress = {}
+    remaining = 0
+    points = []
+
+    def apply(day_events):
+        nonlocal remaining
+        for task_id, value in day_events:
+            remaining += progress.get(task_id, 100) - value
+            progress[task_id] = value
+
+    # Replay everything before the window without emitting points
+    for day in sorted(d for d in events if d < start):
+        apply(events[day])
+
+    day = start
+    while day <= end:
+        apply(events.get(day, []))
+        if day == today:
+            apply([(t['id'], t.get('completion_percentage') or 0) for t in tasks if t['id'] in progress])
+        total = len(progress)
+        points.append({
+            'day': day.isoformat(),
+            'remaining': remaining,
+            'total_tasks': total,
+            'completed_tasks': sum(1 for value in progress.values() if value >= 100),
+            'remaining_ratio': round(remaining / (100 * total), 4) if total else 0
+        })
+        day += timedelta(days=1)
+
+    # Straight line from the first point to zero at the objective deadline
+    ideal = []
+    deadline = parse_day(objective.get('deadline'))
+    if points and deadline and deadline > start:
+        span = (deadline - start).days
+        for offset, point in enumerate(points):
+            ideal.append({'day': point['day'], 'remaining': round(max(points[0]['remaining'] * (1 - offset / span), 0), 2)})
+    return {'points': points, 'ideal': ideal}
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        print("🚀 Backfilling task progress buckets...")
+        backfill_progress_buckets(get_supabase_client())
+    else:
+        print("Usage: python progress_history.py backfill")
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from functools import wraps
+from flask import request, make_response
+from leader import LeaderLock
+from search_index import newest_timestamp
+from paging import fetch_all
+
+
+# Mirrored tables: columns pulled, incremental cursor column, and the columns
+# copied out of the JSON row so the read endpoints can filter/sort in SQL.
+# Employees never include password/auth columns.
+REPLICA_TABLES = {
+    'employees': {
+        'columns': ['id', 'name', 'email', 'role', 'department', 'skills', 'photo_url', 'is_active', 'created_at', 'updated_at'],
+        'cursor': 'updated_at',
+        'indexed': ['is_active', 'created_at']
+    },
+    'objectives': {
+        'columns': None,
+        'cursor': 'updated_at',
+        'indexed': ['created_by', 'created_at']
+    },
+    'tasks': {
+        'columns': None,
+        'cursor': 'updated_at',
+        'indexed': ['objective_id', 'assigned_to', 'created_by', 'status', 'priority', 'due_date', 'created_at']
+    },
+    'task_updates': {
+        'columns': None,
+        'cursor': 'created_at',
+        'indexed': ['task_id', 'updated_by']
+    }
+}
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+class ReadReplica:
+    """Optional local SQLite mirror of employees, objectives, tasks and task_updates.
+
+    Enabled with READ_REPLICA=true. One worker per host (file-lock leader) pulls
+    rows changed since the stored cursor (updated_at, or created_at for the
+    insert-only task_updates) plus tombstones every READ_REPLICA_SYNC_SECONDS;
+    every worker applies its own writes right away through the task and
+    employee write hooks. All workers share the file, so the sync time stored
+    in it tells each of them how stale the copy is.
+
+    Endpoints decorated with ``replica_read`` answer from the file while the
+    last sync is at most READ_REPLICA_MAX_STALENESS_SECONDS old, and fall back
+    to it (whatever its age) when the primary read fails.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('READ_REPLICA', 'false').lower() == 'true'
+        self.path = os.getenv('READ_REPLICA_PATH', '/tmp/erp_read_replica.sqlite3')
+        self.sync_seconds = int(os.getenv('READ_REPLICA_SYNC_SECONDS', '5'))
+        self.max_staleness = int(os.getenv('READ_REPLICA_MAX_STALENESS_SECONDS', '30'))
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.leader = LeaderLock('read_replica')
+        self.thread = None
+        self.views = set()      # decorated endpoint functions (see bootstrap_routes)
+
+    # ---------- storage ----------
+
+    def connection(self):
+        """Per-thread connection to the replica file (created on first use)"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema(conn)
+            self.local.conn = conn
+        return conn
+
+    def _create_schema(self, conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS replica_meta (key TEXT PRIMARY KEY, value TEXT)")
+        for table, spec in REPLICA_TABLES.items():
+            columns = [spec['cursor']] + [c for c in spec['indexed'] if c != spec['cursor']]
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, "
+                + ", ".join(columns) + ", data TEXT NOT NULL)"
+            )
+            for column in columns:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+
+    def get_meta(self, key):
+        row = self.connection().execute("SELECT value FROM replica_meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO replica_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _write(self, conn, table, row):
+        spec = REPLICA_TABLES[table]
+        if spec['columns']:
+            row = {k: v for k, v in row.items() if k in spec['columns']}
+        columns = [spec['cursor']] + [c for c in spec['indexed'] if c != spec['cursor']]
+        values = [row.get(c) for c in columns]
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} (id, {', '.join(columns)}, data) VALUES ({', '.join('?' * (len(columns) + 2))})",
+            [row['id']] + values + [json.dumps(row, default=str)]
+        )
+
+    def _delete(self, conn, table, column, ids):
+        ids = [i for i in ids if i]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            conn.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join('?' * len(chunk))})", chunk)
+
+    def _remove_tasks(self, conn, task_ids):
+        self._delete(conn, 'task_updates', 'task_id', task_ids)
+        self._delete(conn, 'tasks', 'id', task_ids)
+
+    def _remove_objectives(self, conn, objective_ids):
+        for start in range(0, len(objective_ids), 500):
+            chunk = objective_ids[start:start + 500]
+            task_ids = [r['id'] for r in conn.execute(
+                f"SELECT id FROM tasks WHERE objective_id IN ({', '.join('?' * len(chunk))})", chunk
+            )]
+            self._remove_tasks(conn, task_ids)
+        self._delete(conn, 'objectives', 'id', objective_ids)
+
+    # ---------- reads ----------
+
+    def is_fresh(self):
+        """True when reads may be served from the replica without asking the primary"""
+        if not self.enabled:
+            return False
+        synced_at = self.get_meta('synced_at')
+        return bool(synced_at) and time.time() - float(synced_at) <= self.max_staleness
+
+    def has_data(self):
+        """True when a full copy exists, however old (used when the primary is down)"""
+        return self.enabled and self.get_meta('synced_at') is not None
+
+    def age(self):
+        synced_at = self.get_meta('synced_at')
+        return time.time() - float(synced_at) if synced_at else None
+
+    def rows(self, table, where=None, params=(), order=None):
+        """Rows (as dicts) matching an SQL condition on the id/indexed columns"""
+        sql = f"SELECT data FROM {table}"
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        return [json.loads(r['data']) for r in self.connection().execute(sql, list(params))]
+
+    def get(self, table, row_id):
+        rows = self.rows(table, "id = ?", [row_id])
+        return rows[0] if rows else None
+
+    def by_id(self, table, ids):
+        """{id: row} for the given ids"""
+        ids = list({i for i in ids if i})
+        found = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for row in self.rows(table, f"id IN ({', '.join('?' * len(chunk))})", chunk):
+                found[row['id']] = row
+        return found
+
+    def table_version(self, table):
+        """Same (row_count, newest timestamp) pair etag.table_version reads from the primary"""
+        cursor = REPLICA_TABLES[table]['cursor']
+        row = self.connection().execute(f"SELECT count(*) AS n, max({cursor}) AS newest FROM {table}").fetchone()
+        return (row['n'], row['newest'])
+
+    # ---------- write-through (called from the route write hooks) ----------
+
+    def upsert(self, table, row):
+        """Apply a row written to the primary; partial rows are merged into the stored one"""
+        if not self.enabled or not row or not row.get('id'):
+            return
+        try:
+            conn = self.connection()
+            with self.lock:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    stored = conn.execute(f"SELECT data FROM {table} WHERE id = ?", (row['id'],)).fetchone()
+                    merged = json.loads(stored['data']) if stored else {}
+                    merged.update(row)
+                    self._write(conn, table, merged)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            # The next sync picks the row up anyway
+            print(f"⚠️ Read replica write-through failed for {table}: {e}")
+
+    def remove(self, table, row_id):
+        """Apply a delete (objectives and tasks take their tasks and updates with them)"""
+        if not self.enabled or not row_id:
+            return
+        try:
+            conn = self.connection()
+            with self.lock:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if table == 'objectives':
+                        self._remove_objectives(conn, [row_id])
+                    elif table == 'tasks':
+                        self._remove_tasks(conn, [row_id])
+                    else:
+                        self._delete(conn, table, 'id', [row_id])
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            print(f"⚠️ Read replica delete failed for {table}: {e}")
+
+    # ---------- sync ----------
+
+    def _pull(self, supabase, table, since):
+        spec = REPLICA_TABLES[table]
+        select = ", ".join(spec['columns']) if spec['columns'] else "*"
+
+        def query():
+            q = supabase.table(table).select(select)
+            if since:
+                q = q.gt(spec['cursor'], since)
+            return q.order(spec['cursor']).order("id")
+        return fetch_all(query)
+
+    def sync(self, supabase):
+        """Pull every row changed since the stored cursors (everything on the first run)"""
+        started = time.time()
+        pulled = {table: self._pull(supabase, table, self.get_meta(f"cursor:{table}")) for table in REPLICA_TABLES}
+        deleted_since = self.get_meta('cursor:deleted_records')
+        if deleted_since:
+            deleted = fetch_all(lambda: (
+                supabase.table("deleted_records").select("table_name, record_id, deleted_at")
+                .gt("deleted_at", deleted_since).order("deleted_at")
+            ))
+        else:
+            # First run: the full pull has no deleted rows, only the tombstone cursor is needed
+            deleted = []
+            newest = supabase.table("deleted_records").select("deleted_at").order("deleted_at", desc=True).limit(1).execute().data
+            deleted_since = newest[0]['deleted_at'] if newest else '1970-01-01T00:00:00+00:00'
+        # Employees are hard-deleted without a tombstone; the id list is small
+        employee_ids = {r['id'] for r in fetch_all(lambda: supabase.table("employees").select("id").order("id"))}
+
+        conn = self.connection()
+        with self.lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table, rows in pulled.items():
+                    for row in rows:
+                        self._write(conn, table, row)
+                    cursor = newest_timestamp([self.get_meta(f"cursor:{table}")] + [r.get(REPLICA_TABLES[table]['cursor']) for r in rows])
+                    if cursor:
+                        self._set_meta(conn, f"cursor:{table}", cursor)
+                self._remove_objectives(conn, [d['record_id'] for d in deleted if d['table_name'] == 'objectives'])
+                self._remove_tasks(conn, [d['record_id'] for d in deleted if d['table_name'] == 'tasks'])
+                gone = [r['id'] for r in conn.execute("SELECT id FROM employees") if r['id'] not in employee_ids]
+                self._delete(conn, 'task_updates', 'updated_by', gone)
+                self._delete(conn, 'employees', 'id', gone)
+                self._set_meta(conn, 'cursor:deleted_records', newest_timestamp([deleted_since] + [d.get('deleted_at') for d in deleted]))
+                # Freshness counts from when the pull started, not when it finished
+                self._set_meta(conn, 'synced_at', str(started))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        changed = sum(len(rows) for rows in pulled.values())
+        if changed or deleted or gone:
+            print(f"🔁 Read replica synced {changed} changed rows, {len(deleted) + len(gone)} deletions")
+
+    # ---------- background thread ----------
+
+    def start(self):
+        """Start the sync thread in this worker (only the lock holder pulls from the primary)"""
+        if not self.enabled:
+            return
+        self.connection()
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name='read-replica-sync', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if self.leader.try_acquire():
+                    self.sync(get_supabase_client())
+            except Exception as e:
+                print(f"⚠️ Read replica sync failed: {e}")
+            time.sleep(self.sync_seconds)
+
+
+read_replica = ReadReplica()
+
+
+def replica_read(replica_view):
+    """Decorator serving a GET endpoint from the read replica.
+
+    ``replica_view`` takes the same arguments as the endpoint and builds the
+    same response from ``read_replica``. It is used while the replica is fresh
+    and, with an ``X-Replica-Stale`` header, when the primary read fails.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if read_replica.is_fresh():
+                try:
+                    return replica_view(*args, **kwargs)
+                except Exception as e:
+                    print(f"⚠️ Replica read failed for {request.path}, using primary: {e}")
+            response = make_response(f(*args, **kwargs))
+            if response.status_code >= 500 and read_replica.has_data():
+                print(f"⚠️ Primary read failed for {request.path}, serving replica {read_replica.age():.0f}s old")
+                try:
+                    fallback = make_response(replica_view(*args, **kwargs))
+                except Exception as e:
+                    print(f"⚠️ Replica fallback failed for {request.path}, returning the primary's error: {e}")
+                    return response
+                if fallback.status_code < 500:
+                    fallback.headers['X-Replica-Stale'] = 'true'
+                    return fallback
+            return response
+        read_replica.views.add(decorated)
+        return decorated
+    return decorator
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from functools import wraps
+from flask import request, make_response, g
+from werkzeug.http import unquote_etag
+
+
+class ResponseCache:
+    """Response cache for read endpoints kept in a SQLite file that every
+    gunicorn worker on the host shares.
+
+    Entries are keyed on the endpoint, its URL arguments and the caller's role
+    and employee id, and tagged with the tables the body is built from. Write
+    hooks call ``invalidate(table)``, which bumps a per-table generation; an
+    entry stored under older generations (or older than RESPONSE_CACHE_TTL_SECONDS)
+    is stale. The first worker to see a stale entry takes a short refresh lease
+    and rebuilds it, while the others keep serving the stale body (for at most
+    RESPONSE_CACHE_MAX_STALE_SECONDS) instead of all querying the DB at once.
+
+    Writes on another host only reach this cache through the TTL.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('RESPONSE_CACHE', 'true').lower() != 'false'
+        self.path = os.getenv('RESPONSE_CACHE_PATH', '/tmp/erp_response_cache.sqlite3')
+        self.ttl = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '30'))
+        self.max_stale = int(os.getenv('RESPONSE_CACHE_MAX_STALE_SECONDS', '300'))
+        self.lease_seconds = int(os.getenv('RESPONSE_CACHE_LEASE_SECONDS', '30'))
+        self.local = threading.local()
+        self.views = set()      # decorated endpoint functions (see bootstrap_routes)
+
+    def connection(self):
+        """Per-thread connection to the cache file (created on first use)"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, body BLOB, etag TEXT, "
+                "generations TEXT NOT NULL, stored_at REAL NOT NULL, refreshing_until REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_generations (tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+            self.local.conn = conn
+        return conn
+
+    def generations(self, tags):
+        """{tag: generation} for the given tables (0 when never invalidated)"""
+        rows = self.connection().execute(
+            f"SELECT tag, generation FROM cache_generations WHERE tag IN ({', '.join('?' * len(tags))})", list(tags)
+        ).fetchall()
+        found = {r['tag']: r['generation'] for r in rows}
+        return {tag: found.get(tag, 0) for tag in tags}
+
+    def invalidate(self, *tags):
+        """Mark every entry built from these tables stale; call after a write"""
+        if not self.enabled:
+            return
+        try:
+            conn = self.connection()
+            for tag in tags:
+                conn.execute(
+                    "INSERT INTO cache_generations (tag, generation) VALUES (?, 1) "
+                    "ON CONFLICT(tag) DO UPDATE SET generation = generation + 1",
+                    (tag,)
+                )
+        except Exception as e:
+            # Entries still expire through the TTL
+            print(f"⚠️ Response cache invalidation failed for {tags}: {e}")
+
+    def get(self, key):
+        return self.connection().execute("SELECT * FROM cache_entries WHERE key = ?", (key,)).fetchone()
+
+    def try_lease(self, key, now):
+        """Claim the right to rebuild a stale entry; False while another worker holds it"""
+        updated = self.connection().execute(
+            "UPDATE cache_entries SET refreshing_until = ? WHERE key = ? AND (refreshing_until IS NULL OR refreshing_until < ?)",
+            (now + self.lease_seconds, key, now)
+        )
+        return updated.rowcount == 1
+
+    def release(self, key):
+        self.connection().execute("UPDATE cache_entries SET refreshing_until = NULL WHERE key = ?", (key,))
+
+    def store(self, key, body, etag, generations):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, body, etag, generations, stored_at, refreshing_until) "
+            "VALUES (?, ?, ?, ?, ?, NULL)",
+            (key, body, etag, json.dumps(generations, sort_keys=True), time.time())
+        )
+
+
+response_cache = ResponseCache()
+
+
+def cache_key(f, kwargs):
+    user = g.user if hasattr(g, 'user') and g.user else {}
+    return json.dumps({
+        'view': f"{f.__module__}.{f.__name__}",
+        'kwargs': kwargs,
+        'args': sorted(request.args.items(multi=True)),
+        'role': user.get('role'),
+        'employee_id': user.get('employee_id')
+    }, sort_keys=True, default=str)
+
+def cached_response(tags):
+    """Decorator caching a GET endpoint's 200 responses in the shared response cache.
+
+    ``tags`` are the tables the body is built from; the write hooks for those
+    tables invalidate it. Goes under ``token_required`` (the key uses g.user)
+    and above ``conditional_get``, whose ETag is stored with the body.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not response_cache.enabled:
+                return f(*args, **kwargs)
+            try:
+                key = cache_key(f, kwargs)
+                now = time.time()
+                current = response_cache.generations(tags)
+                entry = response_cache.get(key)
+                leased = False
+                if entry is not None:
+                    fresh = json.loads(entry['generations']) == current and now - entry['stored_at'] <= response_cache.ttl
+                    if fresh:
+                        return cached(entry, 'HIT')
+                    leased = response_cache.try_lease(key, now)
+                    if not leased and now - entry['stored_at'] <= response_cache.max_stale:
+                        return cached(entry, 'STALE')
+            except Exception as e:
+                print(f"⚠️ Response cache read failed for {request.path}: {e}")
+                return f(*args, **kwargs)
+
+            # Generations were read before the view ran, so a write that lands
+            # meanwhile leaves this entry stale rather than hiding the write
+            response = make_response(f(*args, **kwargs))
+            try:
+                if response.status_code == 200 and 'X-Replica-Stale' not in response.headers:
+                    response_cache.store(key, response.get_data(), response.headers.get('ETag'), current)
+                elif leased:
+                    response_cache.release(key)
+            except Exception as e:
+                print(f"⚠️ Response cache write failed for {request.path}: {e}")
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        response_cache.views.add(decorated)
+        return decorated
+    return decorator
+
+def cached(entry, state):
+    """Response for a cache entry (a 304 when the client already has its ETag)"""
+    etag = entry['etag']
+    if etag and request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+        response = make_response('', 304)
+    else:
+        response = make_response(entry['body'])
+        response.mimetype = 'application/json'
+    if etag:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['X-Cache'] = state
+    return response
@@ -0,0 +1,343 @@
+import os
+import re
+import math
+import time
+import bisect
+import threading
+from collections import Counter
+from datetime import datetime
+from paging import fetch_all
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# How much a word counts depending on where it appears
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'objective_title': 2.0,
+    'description': 1.0,
+    'notes': 1.0,
+    'update_notes': 1.0
+}
+# Score multiplier for a prefix match compared with an exact word match
+PREFIX_MATCH_FACTOR = 0.7
+MIN_PREFIX_LENGTH = 2
+
+# Columns kept per task so results can be filtered and shown without a DB read
+TASK_COLUMN_NAMES = [
+    'id', 'title', 'description', 'notes', 'objective_id', 'assigned_to', 'assigned_to_multiple',
+    'created_by', 'status', 'priority', 'due_date', 'completion_percentage', 'updated_at'
+]
+TASK_COLUMNS = ", ".join(TASK_COLUMN_NAMES)
+RESULT_FIELDS = ['id', 'title', 'status', 'priority', 'due_date', 'completion_percentage', 'objective_id', 'assigned_to', 'assigned_to_multiple', 'created_by']
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def newest_timestamp(timestamps):
+    """Latest of a list of ISO timestamps (None entries ignored)"""
+    timestamps = [ts for ts in timestamps if ts]
+    if not timestamps:
+        return None
+    return max(timestamps, key=lambda ts: datetime.fromisoformat(ts.replace('Z', '+00:00')))
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower()) if text else []
+
+
+class TaskSearchIndex:
+    """Tokenized inverted index over task title, description, notes, task update
+    notes and objective title.
+
+    Built once per worker, kept current by the task routes on every write, and
+    synced from the DB every SEARCH_INDEX_SYNC_SECONDS (tasks changed since the
+    last sync plus tombstones) so writes handled by other gunicorn workers show
+    up too.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}          # token -> {task_id: weight}
+        self.doc_terms = {}         # task_id -> Counter(token -> weight)
+        self.tasks = {}             # task_id -> task row (TASK_COLUMNS)
+        self.update_terms = {}      # task_id -> Counter of tokens from task_updates notes
+        self.indexed_updates = set()  # task_updates ids already counted in update_terms
+        self.objective_titles = {}  # objective_id -> title
+        self.vocabulary = []        # sorted tokens, for prefix lookups
+        self.vocabulary_dirty = False
+        self.ready = False
+        self.last_sync = None       # newest DB timestamp seen
+        self.last_sync_time = 0
+        self.sync_seconds = int(os.getenv('SEARCH_INDEX_SYNC_SECONDS', '30'))
+        self.sync_thread = None
+
+    # ---------- building ----------
+
+    def build(self, supabase):
+        """Load every task, objective title and task update note (worker start)"""
+        started = time.time()
+        objectives = fetch_all(lambda: supabase.table("objectives").select("id, title, updated_at").order("updated_at").order("id"))
+        tasks = fetch_all(lambda: supabase.table("tasks").select(TASK_COLUMNS).order("updated_at").order("id"))
+        updates = fetch_all(lambda: (
+            supabase.table("task_updates").select("id, task_id, notes, created_at")
+            .not_.is_("notes", "null").order("created_at").order("id")
+        ))
+
+        with self.lock:
+            self.postings, self.doc_terms, self.tasks, self.update_terms = {}, {}, {}, {}
+            self.indexed_updates = {u['id'] for u in updates}
+            self.objective_titles = {o['id']: o.get('title') for o in objectives}
+            for update in updates:
+                self.update_terms.setdefault(update['task_id'], Counter()).update(tokenize(update.get('notes')))
+            for task in tasks:
+                self._index_task(task)
+            self.last_sync = newest_timestamp(
+                [o.get('updated_at') for o in objectives] +
+                [t.get('updated_at') for t in tasks] +
+                [u.get('created_at') for u in updates]
+            )
+            self.last_sync_time = time.time()
+            self.ready = True
+        print(f"🔎 Task search index built: {len(tasks)} tasks, {len(self.postings)} terms in {(time.time() - started) * 1000:.0f}ms")
+
+    def sync(self, supabase):
+        """Pull tasks, notes and deletions newer than the last sync"""
+        since = self.last_sync
+        if not since:
+            return self.build(supabase)
+        # Every page is read, so the newest timestamp below covers all of them
+        objectives = fetch_all(lambda: (
+            supabase.table("objectives").select("id, title, updated_at").gt("updated_at", since).order("updated_at").order("id")
+        ))
+        tasks = fetch_all(lambda: (
+            supabase.table("tasks").select(TASK_COLUMNS).gt("updated_at", since).order("updated_at").order("id")
+        ))
+        updates = fetch_all(lambda: (
+            supabase.table("task_updates").select("id, task_id, notes, created_at")
+            .gt("created_at", since).not_.is_("notes", "null").order("created_at").order("id")
+        ))
+        deleted = fetch_all(lambda: (
+            supabase.table("deleted_records").select("id, table_name, record_id, deleted_at")
+            .gt("deleted_at", since).order("deleted_at").order("id")
+        ))
+
+        with self.lock:
+            for objective in objectives:
+                self.set_objective_title(objective['id'], objective.get('title'))
+            for update in updates:
+                self.add_note(update['task_id'], update.get('notes'), update.get('id'))
+            for task in tasks:
+                self.upsert_task(task)
+            for record in deleted:
+                if record.get('table_name') == 'tasks':
+                    self.remove_task(record.get('record_id'))
+                elif record.get('table_name') == 'objectives':
+                    self.remove_objective(record.get('record_id'))
+            timestamps = [since]
+            timestamps += [o.get('updated_at') for o in objectives]
+            timestamps += [t.get('updated_at') for t in tasks]
+            timestamps += [u.get('created_at') for u in updates]
+            timestamps += [d.get('deleted_at') for d in deleted]
+            self.last_sync = newest_timestamp(timestamps)
+            self.last_sync_time = time.time()
+
+    def start_background_sync(self):
+        """Build the index and keep it synced from a daemon thread (one per worker)"""
+        with self.lock:
+            if self.sync_thread and self.sync_thread.is_alive():
+                return
+            self.sync_thread = threading.Thread(target=self._sync_loop, name='task-search-index', daemon=True)
+            self.sync_thread.start()
+
+    def _sync_loop(self):
+        while True:
+            try:
+                supabase = get_supabase_client()
+                if self.ready:
+                    self.sync(supabase)
+                else:
+                    self.build(supabase)
+            except Exception as e:
+                print(f"⚠️ Task search index sync failed: {e}")
+            time.sleep(self.sync_seconds)
+
+    # ---------- title lookups (notification display strings) ----------
+
+    def lookup_task_titles(self, supabase, task_ids):
+        """{task_id: title} from the index, with one query for ids it does not hold"""
+        found, missing = {}, []
+        with self.lock:
+            for task_id in set(filter(None, task_ids)):
+                task = self.tasks.get(task_id)
+                if task:
+                    found[task_id] = task.get('title') or (task.get('description') or 'Task')[:100]
+                else:
+                    missing.append(task_id)
+        if missing:
+            rows = supabase.table("tasks").select("id, title, description").in_("id", missing).execute().data or []
+            for row in rows:
+                found[row['id']] = row.get('title') or (row.get('description') or 'Task')[:100]
+        return found
+
+    def lookup_objective_titles(self, supabase, objective_ids):
+        """{objective_id: title} from the index, with one query for ids it does not hold"""
+        found, missing = {}, []
+        with self.lock:
+            for objective_id in set(filter(None, objective_ids)):
+                if objective_id in self.objective_titles:
+                    found[objective_id] = self.objective_titles[objective_id]
+                else:
+                    missing.append(objective_id)
+        if missing:
+            rows = supabase.table("objectives").select("id, title").in_("id", missing).execute().data or []
+            for row in rows:
+                found[row['id']] = row.get('title')
+        return found
+
+    # ---------- incremental updates (called from the write paths) ----------
+
+    def upsert_task(self, task):
+        """Index a created or updated task row (partial rows are merged)"""
+        if not task or not task.get('id'):
+            return
+        with self.lock:
+            merged = dict(self.tasks.get(task['id'], {}))
+            merged.update({k: v for k, v in task.items() if k in TASK_COLUMN_NAMES})
+            self._index_task(merged)
+
+    def remove_task(self, task_id):
+        with self.lock:
+            self._unindex(task_id)
+            self.tasks.pop(task_id, None)
+            self.update_terms.pop(task_id, None)
+
+    def add_note(self, task_id, notes, update_id=None):
+        """Index the text of a new task update (each update id is counted once)"""
+        tokens = tokenize(notes)
+        if not tokens:
+            return
+        with self.lock:
+            if update_id:
+                if update_id in self.indexed_updates:
+                    return
+                self.indexed_updates.add(update_id)
+            self.update_terms.setdefault(task_id, Counter()).update(tokens)
+            if task_id in self.tasks:
+                self._index_task(self.tasks[task_id])
+
+    def set_objective_title(self, objective_id, title):
+        with self.lock:
+            if self.objective_titles.get(objective_id) == title:
+                return
+            self.objective_titles[objective_id] = title
+            for task in [t for t in self.tasks.values() if t.get('objective_id') == objective_id]:
+                self._index_task(task)
+
+    def remove_objective(self, objective_id):
+        """Drop an objective and the tasks removed with it by ON DELETE CASCADE"""
+        with self.lock:
+            self.objective_titles.pop(objective_id, None)
+            for task_id in [t['id'] for t in self.tasks.values() if t.get('objective_id') == objective_id]:
+                self.remove_task(task_id)
+
+    def _index_task(self, task):
+        task_id = task['id']
+        terms = Counter()
+        fields = {
+            'title': task.get('title'),
+            'description': task.get('description'),
+            'notes': task.get('notes'),
+            'objective_title': self.objective_titles.get(task.get('objective_id'))
+        }
+        for field, text in fields.items():
+            for token in tokenize(text):
+                terms[token] += FIELD_WEIGHTS[field]
+        for token, count in self.update_terms.get(task_id, Counter()).items():
+            terms[token] += FIELD_WEIGHTS['update_notes'] * count
+
+        self._unindex(task_id)
+        self.tasks[task_id] = task
+        self.doc_terms[task_id] = terms
+        for token, weight in terms.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self.vocabulary_dirty = True
+            self.postings[token][task_id] = weight
+
+    def _unindex(self, task_id):
+        for token in self.doc_terms.pop(task_id, {}):
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.pop(task_id, None)
+            if not docs:
+                del self.postings[token]
+                self.vocabulary_dirty = True
+
+    # ---------- querying ----------
+
+    def _expand(self, term):
+        """Tokens matching a query term: the exact word plus words it prefixes"""
+        matches = {term: 1.0} if term in self.postings else {}
+        if len(term) >= MIN_PREFIX_LENGTH:
+            if self.vocabulary_dirty:
+                self.vocabulary = sorted(self.postings)
+                self.vocabulary_dirty = False
+            position = bisect.bisect_left(self.vocabulary, term)
+            while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+                token = self.vocabulary[position]
+                if token != term:
+                    matches[token] = PREFIX_MATCH_FACTOR
+                position += 1
+        return matches
+
+    def search(self, query, limit=20, visible=None):
+        """Rank tasks matching every query term (exact or prefix), TF-IDF style
+
+        ``visible`` is an optional predicate on the task row used to apply the
+        caller's permissions before limiting.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+        with self.lock:
+            total_docs = max(len(self.tasks), 1)
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token, factor in self._expand(term).items():
+                    docs = self.postings[token]
+                    idf = math.log(1 + total_docs / len(docs))
+                    for task_id, weight in docs.items():
+                        score = weight * idf * factor
+                        if score > term_scores.get(task_id, 0):
+                            term_scores[task_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {task_id: score + term_scores[task_id] for task_id, score in scores.items() if task_id in term_scores}
+                if not scores:
+                    return [], 0
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            total = 0
+            for task_id, score in ranked:
+                task = self.tasks[task_id]
+                if visible and not visible(task):
+                    continue
+                total += 1
+                if len(results) < limit:
+                    result = {field: task.get(field) for field in RESULT_FIELDS}
+                    result['objective_title'] = self.objective_titles.get(task.get('objective_id'))
+                    result['score'] = round(score, 4)
+                    results.append(result)
+            return results, total
+
+
+task_search_index = TaskSearchIndex()
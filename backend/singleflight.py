@@ -0,0 +1,70 @@
+import threading
+
+
+class InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Lets concurrent identical upstream queries in this worker share one call.
+
+    The first caller for a key runs the query; callers arriving with the same
+    key while it is in flight wait for it and get the same result (or
+    exception). Nothing is kept once the call returns, so later callers always
+    query again. Keys are tuples whose first item names the query for the
+    metrics, e.g. ``('notifications.count', 'employee', employee_id)``; the
+    rest must cover every input the query depends on.
+
+    The shared result object is handed to every waiter, so callers must not
+    mutate the rows in it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.counts = {}   # query name -> {'executed': n, 'coalesced': n}
+
+    def do(self, key, fn):
+        """Run ``fn()`` once for all concurrent callers with the same key"""
+        with self.lock:
+            counts = self.counts.setdefault(key[0], {'executed': 0, 'coalesced': 0})
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = InFlightCall()
+                counts['executed'] += 1
+                owner = True
+            else:
+                counts['coalesced'] += 1
+                owner = False
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    def metrics(self):
+        """Per-query executed/coalesced counts and the share of calls that were coalesced"""
+        with self.lock:
+            counts = {name: dict(c) for name, c in self.counts.items()}
+        for c in counts.values():
+            total = c['executed'] + c['coalesced']
+            c['coalescing_ratio'] = round(c['coalesced'] / total, 4) if total else 0.0
+        return counts
+
+
+singleflight = SingleFlight()
@@ -1,8 +1,21 @@
 from flask import Blueprint, request, jsonify, g
 from auth import token_required, admin_required
+from search_index import task_search_index
+from due_scheduler import due_scheduler
+from employee_index import employee_lookup_index
+from read_replica import read_replica, replica_read
+from response_cache import response_cache, cached_response
+from singleflight import singleflight
+from watchers import watcher_index, WATCH_STATES
+import identity_map
+from fieldsets import Fieldset
+from progress_history import task_progress_history, objective_burndown, parse_day
+from etag import conditional_get, if_match_versions, apply_if_match, apply_row_version, row_etag, with_row_etag
 import os
 from datetime import datetime
 import uuid
+import json
+import base64
 import traceback
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -66,18 +79,416 @@ def can_employee_edit_fully(task, user_employee_id):
             (assigned_to == user_employee_id or not assigned_to) and 
             not task.get('is_admin_created', False))
 
+TASK_EDITABLE_FIELDS = [
+    'title', 'description', 'assigned_to', 'assigned_to_multiple',
+    'priority', 'due_date', 'status', 'completion_percentage', 'notes'
+]
+# Fields an employee may change on tasks they cannot edit fully
+TASK_PROGRESS_FIELDS = ['completion_percentage', 'notes', 'status']
+
+def build_task_insert(data, user_employee_id):
+    """Build the tasks row for a create request"""
+    # Handle assignment
+    assigned_to = safe_uuid(data.get('assigned_to'))
+    assigned_to_multiple = []
+    if data.get('assigned_to_multiple'):
+        assigned_to_multiple = [safe_uuid(uid) for uid in data.get('assigned_to_multiple', []) if safe_uuid(uid)]
+    
+    return {
+        "title": data.get('title'),
+        "description": data.get('description'),
+        "objective_id": safe_uuid(data.get('objective_id')),
+        "assigned_to": assigned_to,
+        "assigned_to_multiple": assigned_to_multiple,
+        "due_date": data.get('due_date'),
+        "priority": data.get('priority', 'medium'),
+        "status": data.get('status', 'not_started'),
+        "completion_percentage": data.get('completion_percentage', 0),
+        "notes": data.get('notes'),
+        "created_by": user_employee_id,
+        "is_standalone": not bool(data.get('objective_id'))  # Standalone if no objective_id
+    }
+
+def build_task_update(current_task, data, user_employee_id, user_role):
+    """Filter a task update request down to the fields this user may change
+    
+    Callers must check check_task_permission first.
+    """
+    if user_role == 'employee':
+        # Check if employee created and is assigned to the task (can edit fully)
+        can_edit_fully = can_employee_edit_fully(current_task, user_employee_id)
+        
+        if can_edit_fully:
+            # Employee can edit all fields when they created the task (and are assigned or unassigned)
+            update_data = {k: v for k, v in data.items() if k in TASK_EDITABLE_FIELDS}
+            
+            # If task is unassigned and employee is editing, auto-assign to them
+            if not current_task.get('assigned_to') and not update_data.get('assigned_to'):
+                update_data['assigned_to'] = user_employee_id
+                print(f"✅ Auto-assigning unassigned task to employee {user_employee_id}")
+        else:
+            # Employees can only update progress, notes, and status
+            update_data = {k: v for k, v in data.items() if k in TASK_PROGRESS_FIELDS}
+        
+        # Auto-update status based on progress
+        if 'completion_percentage' in update_data:
+            progress = update_data['completion_percentage']
+            if progress == 100:
+                update_data['status'] = 'completed'
+            elif progress > 0:
+                update_data['status'] = 'in_progress'
+    else:
+        # Admins can update most fields
+        update_data = {k: v for k, v in data.items() if k in TASK_EDITABLE_FIELDS}
+    
+    # Sanitize UUID fields
+    if 'assigned_to' in update_data:
+        update_data['assigned_to'] = safe_uuid(update_data['assigned_to'])
+    if 'assigned_to_multiple' in update_data:
+        update_data['assigned_to_multiple'] = [safe_uuid(uid) for uid in update_data['assigned_to_multiple'] if safe_uuid(uid)]
+    
+    return update_data
+
+DATE_FIELDS = ('due_date', 'deadline')
+
+def normalize_field_value(field, value):
+    """Normalize a column value so equivalent request/DB representations compare equal"""
+    if value == '':
+        return None
+    if field in DATE_FIELDS and value:
+        return str(value)[:10]
+    if field == 'assigned_to_multiple':
+        return sorted(str(v) for v in (value or []))
+    if field == 'completion_percentage' and value is not None:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+def changed_fields(current_row, update_data):
+    """Subset of update_data whose values differ from the current row"""
+    return {
+        field: value for field, value in update_data.items()
+        if normalize_field_value(field, value) != normalize_field_value(field, current_row.get(field))
+    }
+
+def task_assignees(task):
+    """All employee ids a task is assigned to"""
+    assignees = set(task.get('assigned_to_multiple') or [])
+    if task.get('assigned_to'):
+        assignees.add(task['assigned_to'])
+    return assignees
+
+def apply_due_filters(query, args):
+    """Push due_after / due_before (inclusive YYYY-MM-DD) and overdue=true into a tasks query
+    
+    Raises ValueError for malformed dates.
+    """
+    due_after = parse_day(args.get('due_after'))
+    due_before = parse_day(args.get('due_before'))
+    if due_after:
+        query = query.gte("due_date", due_after.isoformat())
+    if due_before:
+        query = query.lte("due_date", due_before.isoformat())
+    if args.get('overdue', 'false').lower() == 'true':
+        query = query.lt("due_date", datetime.utcnow().date().isoformat()).not_.in_("status", ["completed", "cancelled"])
+    return query
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor for (created_at, id) pagination"""
+    payload = json.dumps({'t': created_at, 'id': row_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor; raises ValueError when malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        datetime.fromisoformat(payload['t'].replace('Z', '+00:00'))
+        return payload['t'], str(uuid.UUID(str(payload['id'])))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+TASK_LIST_FIELDS = Fieldset(
+    "*, objectives(title)",
+    columns=[
+        'id', 'objective_id', 'title', 'description', 'assigned_to', 'assigned_to_multiple', 'due_date',
+        'priority', 'status', 'completion_percentage', 'notes', 'created_by', 'is_admin_created',
+        'is_standalone', 'created_at', 'updated_at', 'completed_at'
+    ],
+    embeds={'objectives': 'objectives(title)'},
+    derived={
+        'assigned_to_name': ['assigned_to'], 'assigned_to_email': ['assigned_to'],
+        'created_by_name': ['created_by'], 'created_by_email': ['created_by']
+    }
+)
+
+def add_employee_names(supabase, tasks, fields=None):
+    """Add assigned_to/created_by names and emails to tasks using one employees query
+    
+    With a sparse ``fields`` set only the requested name/email fields are looked up.
+    """
+    want_assigned = TASK_LIST_FIELDS.wants(fields, 'assigned_to_name', 'assigned_to_email')
+    want_created = TASK_LIST_FIELDS.wants(fields, 'created_by_name', 'created_by_email')
+    employee_ids = set()
+    for task in tasks:
+        if want_assigned and task.get('assigned_to'):
+            employee_ids.add(task['assigned_to'])
+        if want_created and task.get('created_by'):
+            employee_ids.add(task['created_by'])
+    
+    # Fetch all needed employees in one query
+    employee_map = {}
+    if employee_ids:
+        emp_result = supabase.table("employees").select("id, name, email").in_("id", list(employee_ids)).execute()
+        if emp_result.data:
+            for emp in emp_result.data:
+                employee_map[emp['id']] = emp
+    
+    # Add employee names to tasks
+    for task in tasks:
+        if want_assigned and task.get('assigned_to') and task['assigned_to'] in employee_map:
+            emp = employee_map[task['assigned_to']]
+            task['assigned_to_name'] = emp.get('name')
+            task['assigned_to_email'] = emp.get('email')
+        if want_created and task.get('created_by') and task['created_by'] in employee_map:
+            emp = employee_map[task['created_by']]
+            task['created_by_name'] = emp.get('name')
+            task['created_by_email'] = emp.get('email')
+    return tasks
+
+# Columns needed to explain why a conditional write matched nothing
+TASK_PERMISSION_COLUMNS = "id, created_by, assigned_to, assigned_to_multiple, is_admin_created, updated_at"
+OBJECTIVE_PERMISSION_COLUMNS = "id, created_by, is_admin_created, updated_at"
+
+def apply_task_permission(query, user_employee_id, user_role):
+    """PostgREST filter equivalent of check_task_permission for tasks"""
+    if user_role in ('admin', 'superadmin'):
+        return query
+    return query.not_.is_("is_admin_created", "true").or_(
+        f"created_by.eq.{user_employee_id},assigned_to.eq.{user_employee_id},assigned_to_multiple.cs.{{{user_employee_id}}}"
+    )
+
+def apply_objective_permission(query, user_employee_id, user_role):
+    """PostgREST filter equivalent of check_task_permission for objectives"""
+    if user_role in ('admin', 'superadmin'):
+        return query
+    return query.not_.is_("is_admin_created", "true").eq("created_by", user_employee_id)
+
+def write_precondition_error(current_row, versions, user_employee_id, user_role, label, action):
+    """Error response if the row is missing, not writable by the user or not at the
+    If-Match version; None when the write may go ahead"""
+    if not current_row:
+        return jsonify({'success': False, 'error': f'{label} not found'}), 404
+    if not check_task_permission(current_row, user_employee_id, user_role):
+        return jsonify({'success': False, 'error': f'Not authorized to {action} this {label.lower()}'}), 403
+    if versions and row_etag(current_row) not in versions:
+        response = with_row_etag(jsonify({
+            'success': False,
+            'error': f'{label} has been modified since it was loaded',
+            'current_version': row_etag(current_row)
+        }), current_row)
+        return response, 412
+    return None
+
+def conflict_message(label):
+    return f'{label} was modified by someone else, reload and try again'
+
+def write_conflict(label):
+    return jsonify({'success': False, 'error': conflict_message(label)}), 409
+
+OBJECTIVE_PROGRESS_FIELDS = [
+    'task_count', 'not_started_count', 'in_progress_count', 'completed_count', 'cancelled_count', 'average_completion'
+]
+OBJECTIVE_PROGRESS_SELECT = "objective_progress(" + ", ".join(OBJECTIVE_PROGRESS_FIELDS) + ")"
+
+OBJECTIVE_LIST_FIELDS = Fieldset(
+    f"*, employees!created_by(name, email), {OBJECTIVE_PROGRESS_SELECT}",
+    columns=[
+        'id', 'title', 'description', 'department', 'deadline', 'priority', 'status',
+        'created_by', 'is_admin_created', 'created_at', 'updated_at'
+    ],
+    embeds={'employees': 'employees!created_by(name, email)', 'progress': OBJECTIVE_PROGRESS_SELECT}
+)
+
+def attach_objective_progress(objective):
+    """Replace the embedded objective_progress row with a flat ``progress`` dict (zeros when no tasks yet)"""
+    embedded = objective.pop('objective_progress', None)
+    if isinstance(embedded, list):
+        embedded = embedded[0] if embedded else None
+    embedded = embedded or {}
+    objective['progress'] = {field: embedded.get(field) or 0 for field in OBJECTIVE_PROGRESS_FIELDS}
+    objective['progress']['average_completion'] = float(objective['progress']['average_completion'])
+    return objective
+
+# ============================================
+# WRITE HOOKS (keep in-process indexes current)
+# ============================================
+
+def task_changed(task):
+    """Call after a task row was inserted or updated"""
+    task_search_index.upsert_task(task)
+    due_scheduler.schedule_task(task)
+    read_replica.upsert('tasks', task)
+    response_cache.invalidate('tasks')
+    identity_map.remember('tasks', [task])
+
+def task_removed(task_id):
+    """Call after a task was deleted"""
+    task_search_index.remove_task(task_id)
+    due_scheduler.unschedule_task(task_id)
+    read_replica.remove('tasks', task_id)
+    watcher_index.forget('task', task_id)
+    response_cache.invalidate('tasks')
+    identity_map.forget('tasks', task_id)
+
+def task_update_added(update):
+    """Call after a task_updates row (note, progress, file) was inserted"""
+    task_search_index.add_note(update.get('task_id'), update.get('notes'), update.get('id'))
+    read_replica.upsert('task_updates', update)
+
+def objective_changed(objective):
+    """Call after an objective row was inserted or updated"""
+    if 'title' in objective:
+        task_search_index.set_objective_title(objective.get('id'), objective.get('title'))
+    read_replica.upsert('objectives', objective)
+    response_cache.invalidate('objectives')
+    identity_map.remember('objectives', [objective])
+
+def objective_removed(objective_id):
+    """Call after an objective (and, by cascade, its tasks) was deleted"""
+    task_search_index.remove_objective(objective_id)
+    watcher_index.forget('objective', objective_id)
+    read_replica.remove('objectives', objective_id)
+    response_cache.invalidate('objectives')
+    identity_map.forget('objectives', objective_id)
+    identity_map.forget('tasks')
+
+# ============================================
+# READ REPLICA VIEWS (same responses, built from the local copy)
+# ============================================
+
+def replica_employee_names(tasks, fields=None):
+    """add_employee_names against the read replica"""
+    want_assigned = TASK_LIST_FIELDS.wants(fields, 'assigned_to_name', 'assigned_to_email')
+    want_created = TASK_LIST_FIELDS.wants(fields, 'created_by_name', 'created_by_email')
+    employee_map = read_replica.by_id('employees', [
+        employee_id for task in tasks
+        for employee_id in ((task.get('assigned_to') if want_assigned else None), (task.get('created_by') if want_created else None))
+    ])
+    for task in tasks:
+        if want_assigned and task.get('assigned_to') in employee_map:
+            emp = employee_map[task['assigned_to']]
+            task['assigned_to_name'] = emp.get('name')
+            task['assigned_to_email'] = emp.get('email')
+        if want_created and task.get('created_by') in employee_map:
+            emp = employee_map[task['created_by']]
+            task['created_by_name'] = emp.get('name')
+            task['created_by_email'] = emp.get('email')
+    return tasks
+
+def replica_embed_objective_titles(tasks):
+    """The objectives(title) embed against the read replica"""
+    objectives = read_replica.by_id('objectives', [t.get('objective_id') for t in tasks])
+    for task in tasks:
+        objective = objectives.get(task.get('objective_id'))
+        task['objectives'] = {'title': objective.get('title')} if objective else None
+    return tasks
+
+def replica_task_updates(task_id):
+    """Updates of a task, newest first, with the employees!updated_by(name, email) embed"""
+    updates = read_replica.rows('task_updates', "task_id = ?", [task_id])
+    updates.sort(key=lambda u: u.get('created_at') or '', reverse=True)
+    employees = read_replica.by_id('employees', [u.get('updated_by') for u in updates])
+    for update in updates:
+        emp = employees.get(update.get('updated_by'))
+        update['employees'] = {'name': emp.get('name'), 'email': emp.get('email')} if emp else None
+    return updates
+
+def get_tasks_from_replica():
+    """get_tasks served from the read replica"""
+    user_role = g.user.get('role')
+    user_employee_id = safe_get_employee_id()
+    try:
+        fields = TASK_LIST_FIELDS.requested()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    conditions, params = [], []
+    for column in ('objective_id', 'assigned_to', 'status', 'priority'):
+        if request.args.get(column):
+            conditions.append(f"{column} = ?")
+            params.append(request.args.get(column))
+    try:
+        due_after = parse_day(request.args.get('due_after'))
+        due_before = parse_day(request.args.get('due_before'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'due_after/due_before must be YYYY-MM-DD'}), 400
+    if due_after:
+        conditions.append("due_date >= ?")
+        params.append(due_after.isoformat())
+    if due_before:
+        conditions.append("due_date <= ?")
+        params.append(due_before.isoformat())
+    if request.args.get('overdue', 'false').lower() == 'true':
+        conditions.append("due_date < ? AND status NOT IN ('completed', 'cancelled')")
+        params.append(datetime.utcnow().date().isoformat())
+    
+    if request.args.get('sort') == 'due_date':
+        order = "due_date IS NULL, due_date, created_at DESC"
+    else:
+        order = "created_at DESC"
+    tasks = read_replica.rows('tasks', " AND ".join(conditions), params, order)
+    
+    if user_role == 'employee' and user_employee_id:
+        tasks = [
+            task for task in tasks
+            if task.get('created_by') == user_employee_id
+            or task.get('assigned_to') == user_employee_id
+            or user_employee_id in (task.get('assigned_to_multiple') or [])
+        ]
+    
+    if TASK_LIST_FIELDS.wants(fields, 'objectives'):
+        replica_embed_objective_titles(tasks)
+    replica_employee_names(tasks, fields)
+    return jsonify({'success': True, 'tasks': TASK_LIST_FIELDS.trim(tasks, fields)})
+
+def get_task_from_replica(task_id):
+    """get_task served from the read replica"""
+    task = read_replica.get('tasks', task_id)
+    if not task:
+        return jsonify({'success': False, 'error': 'Task not found'}), 404
+    replica_embed_objective_titles([task])
+    replica_employee_names([task])
+    task['updates'] = replica_task_updates(task_id)
+    return with_row_etag(jsonify({'success': True, 'task': task}), task)
+
+def get_task_updates_from_replica(task_id):
+    """get_task_updates served from the read replica"""
+    return jsonify({'success': True, 'updates': replica_task_updates(task_id)})
+
 # ============================================
 # OBJECTIVES ENDPOINTS
 # ============================================
 
 @task_bp.route('/api/objectives', methods=['GET'])
 @token_required
+@cached_response(['objectives', 'employees', 'tasks'])
+@conditional_get(lambda: [("objectives", None), ("employees", None), ("objective_progress", None)])
 def get_objectives():
-    """Get all objectives"""
+    """Get all objectives with their task progress rollup (?fields= narrows the columns)"""
     try:
         supabase = get_supabase_client()
-        result = supabase.table("objectives").select("*, employees!created_by(name, email)").order("created_at", desc=True).execute()
-        return jsonify({'success': True, 'objectives': result.data if result.data else []})
+        try:
+            fields = OBJECTIVE_LIST_FIELDS.requested()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        result = supabase.table("objectives").select(OBJECTIVE_LIST_FIELDS.select(fields)).order("created_at", desc=True).execute()
+        objectives = result.data or []
+        if OBJECTIVE_LIST_FIELDS.wants(fields, 'progress'):
+            objectives = [attach_objective_progress(o) for o in objectives]
+        return jsonify({'success': True, 'objectives': objectives})
     except Exception as e:
         print(f"❌ Error getting objectives: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -110,6 +521,8 @@ def create_objective():
         result = supabase.table("objectives").insert(objective_data).execute()
         
         if result.data:
+            objective_changed(result.data[0])
+            
             # Create notification for objective creation
             try:
                 from notification_routes import get_admin_employees
@@ -120,9 +533,9 @@ def create_objective():
                 # Get current user's name
                 current_user_name = "Unknown"
                 if user_employee_id:
-                    emp_result = supabase.table("employees").select("name").eq("id", user_employee_id).execute()
-                    if emp_result.data:
-                        current_user_name = emp_result.data[0].get('name', 'Unknown')
+                    employee = identity_map.get_row(supabase, "employees", user_employee_id, "name")
+                    if employee:
+                        current_user_name = employee.get('name', 'Unknown')
                 
                 objective_id = result.data[0].get('id')
                 objective_title = data.get('title', 'Untitled Objective')[:100]
@@ -136,13 +549,8 @@ def create_objective():
                             "message": f"New objective created by {current_user_name}: {objective_title}",
                             "type": "objective_created",
                             "related_task_id": None,
-                            "meta": {
-                                "objective_id": objective_id,
-                                "objective_title": objective_title,
-                                "created_by": current_user_name,
-                                "created_by_id": user_employee_id,
-                                "timestamp": datetime.utcnow().isoformat()
-                            },
+                            "related_objective_id": objective_id,
+                            "actor_id": user_employee_id,   # title and creator name are joined at read time
                             "priority": "normal",
                             "is_read": False
                         }
@@ -164,46 +572,152 @@ def create_objective():
 @task_bp.route('/api/objectives/<objective_id>', methods=['GET'])
 @token_required
 def get_objective(objective_id):
-    """Get a single objective with its tasks"""
+    """Get a single objective with its progress rollup and tasks (include_tasks=false skips the tasks)"""
     try:
         supabase = get_supabase_client()
         
         # Get objective
-        obj_result = supabase.table("objectives").select("*, employees!created_by(name, email)").eq("id", objective_id).execute()
+        obj_result = supabase.table("objectives").select(f"*, employees!created_by(name, email), {OBJECTIVE_PROGRESS_SELECT}").eq("id", objective_id).execute()
         if not obj_result.data:
             return jsonify({'success': False, 'error': 'Objective not found'}), 404
         
-        objective = obj_result.data[0]
+        objective = attach_objective_progress(obj_result.data[0])
         
         # Get tasks for this objective
-        tasks_result = supabase.table("tasks").select("*, employees!assigned_to(name, email)").eq("objective_id", objective_id).execute()
-        objective['tasks'] = tasks_result.data if tasks_result.data else []
+        if request.args.get('include_tasks', 'true').lower() != 'false':
+            tasks_result = supabase.table("tasks").select("*, employees!assigned_to(name, email)").eq("objective_id", objective_id).execute()
+            objective['tasks'] = tasks_result.data if tasks_result.data else []
         
-        return jsonify({'success': True, 'objective': objective})
+        return with_row_etag(jsonify({'success': True, 'objective': objective}), objective)
     except Exception as e:
         print(f"❌ Error getting objective: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@task_bp.route('/api/objectives/<objective_id>/activity', methods=['GET'])
+@token_required
+def get_objective_activity(objective_id):
+    """Task updates across all of an objective's tasks, newest first
+    
+    One keyset-paginated query joined to tasks on objective_id (ordered by
+    created_at, id), so the cost does not grow with the number of tasks.
+    Pass back ``next_cursor`` as ``cursor`` for the next page. Employees only
+    see updates on tasks they created or are assigned to (same rule as
+    get_tasks), and get 403 for an objective they neither created nor have
+    such a task in.
+    """
+    try:
+        supabase = get_supabase_client()
+        user_employee_id = safe_get_employee_id()
+        user_role = g.user.get('role')
+        is_admin = user_role in ('admin', 'superadmin')
+        if not is_admin and not user_employee_id:
+            return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
+        
+        objective = identity_map.get_row(supabase, "objectives", objective_id, OBJECTIVE_PERMISSION_COLUMNS)
+        if not objective:
+            return jsonify({'success': False, 'error': 'Objective not found'}), 404
+        if not is_admin and objective.get('created_by') != user_employee_id:
+            own_tasks = (
+                supabase.table("tasks").select("id").eq("objective_id", objective_id)
+                .or_(employee_task_filter(user_employee_id)).limit(1).execute()
+            )
+            if not own_tasks.data:
+                return jsonify({'success': False, 'error': 'Not authorized to view this objective'}), 403
+        
+        try:
+            limit = min(max(int(request.args.get('limit', ACTIVITY_PAGE_SIZE)), 1), MAX_ACTIVITY_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be a number'}), 400
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        
+        query = (
+            supabase.table("task_updates")
+            .select("id, task_id, updated_by, progress, notes, attachments, created_at, tasks!inner(title, objective_id)")
+            .eq("tasks.objective_id", objective_id)
+        )
+        if not is_admin:
+            query = query.or_(employee_task_filter(user_employee_id), reference_table="tasks")
+        if after:
+            created_at, row_id = after
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+        rows = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute().data or []
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        names = employee_lookup_index.names(supabase, [r.get('updated_by') for r in rows])
+        activity = []
+        for row in rows:
+            task = row.pop('tasks', None) or {}
+            row['task_title'] = task.get('title')
+            row['updated_by_name'] = (names.get(row.get('updated_by')) or {}).get('name')
+            activity.append(row)
+        
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id']) if has_more else None
+        return jsonify({'success': True, 'activity': activity, 'next_cursor': next_cursor})
+    except Exception as e:
+        print(f"❌ Error getting objective activity: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/api/objectives/<objective_id>/burndown', methods=['GET'])
+@token_required
+def get_objective_burndown(objective_id):
+    """Daily remaining work for an objective, from the task_progress_daily buckets"""
+    try:
+        supabase = get_supabase_client()
+        try:
+            start = parse_day(request.args.get('from'))
+            end = parse_day(request.args.get('to'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'from/to must be YYYY-MM-DD'}), 400
+        
+        obj_result = supabase.table("objectives").select("id, title, deadline, created_at").eq("id", objective_id).execute()
+        if not obj_result.data:
+            return jsonify({'success': False, 'error': 'Objective not found'}), 404
+        
+        objective = obj_result.data[0]
+        burndown = objective_burndown(supabase, objective, start, end)
+        return jsonify({
+            'success': True,
+            'objective_id': objective_id,
+            'deadline': objective.get('deadline'),
+            'points': burndown['points'],
+            'ideal': burndown['ideal']
+        })
+    except Exception as e:
+        print(f"❌ Error getting objective burndown: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @task_bp.route('/api/objectives/<objective_id>', methods=['PUT'])
 @token_required
 def update_objective(objective_id):
-    """Update an objective"""
+    """Update an objective, writing only the fields that actually changed
+    
+    Two round trips: the row is read first (the diff needs it), then an empty
+    diff returns without writing. Otherwise the write is conditional on the
+    version that was read, so concurrent editors get 409 instead of losing an
+    update (412 when the client's If-Match is already stale).
+    """
     try:
         supabase = get_supabase_client()
-        data = request.get_json()
+        data = request.get_json() or {}
         user_employee_id = safe_get_employee_id()
         user_role = g.user.get('role')
+        versions = if_match_versions()
         
         # Get current objective
         obj_result = supabase.table("objectives").select("*").eq("id", objective_id).execute()
-        if not obj_result.data:
-            return jsonify({'success': False, 'error': 'Objective not found'}), 404
+        current_objective = obj_result.data[0] if obj_result.data else None
         
-        current_objective = obj_result.data[0]
-        
-        # Check permissions
-        if not check_task_permission(current_objective, user_employee_id, user_role):
-            return jsonify({'success': False, 'error': 'Not authorized to update this objective'}), 403
+        # Check existence, permissions and If-Match
+        error = write_precondition_error(current_objective, versions, user_employee_id, user_role, 'Objective', 'update')
+        if error:
+            return error
         
         # Build update data
         allowed_fields = ['title', 'description', 'department', 'deadline', 'priority', 'status']
@@ -212,14 +726,24 @@ def update_objective(objective_id):
         if not update_data:
             return jsonify({'success': False, 'error': 'No valid fields to update'}), 400
         
-        update_data['updated_at'] = datetime.utcnow().isoformat()
+        changes = changed_fields(current_objective, update_data)
+        if not changes:
+            return with_row_etag(jsonify({
+                'success': True, 'objective': current_objective, 'changed_fields': [], 'message': 'No changes'
+            }), current_objective)
         
-        result = supabase.table("objectives").update(update_data).eq("id", objective_id).execute()
+        changes_to_write = {**changes, 'updated_at': datetime.utcnow().isoformat()}
+        query = supabase.table("objectives").update(changes_to_write).eq("id", objective_id)
+        result = apply_row_version(query, current_objective).execute()
         
-        if result.data:
-            return jsonify({'success': True, 'objective': result.data[0]})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to update objective'}), 500
+        if not result.data:
+            return write_conflict('Objective')
+        
+        objective_changed(result.data[0])
+        
+        return with_row_etag(jsonify({
+            'success': True, 'objective': result.data[0], 'changed_fields': sorted(changes)
+        }), result.data[0])
             
     except Exception as e:
         print(f"❌ Error updating objective: {e}")
@@ -228,26 +752,32 @@ def update_objective(objective_id):
 @task_bp.route('/api/objectives/<objective_id>', methods=['DELETE'])
 @token_required
 def delete_objective(objective_id):
-    """Delete an objective"""
+    """Delete an objective with one conditional write (id + permission + If-Match)
+    
+    Its tasks go with it through ON DELETE CASCADE; tombstones for both are
+    recorded by DB triggers (migration 002).
+    """
     try:
         supabase = get_supabase_client()
         user_employee_id = safe_get_employee_id()
         user_role = g.user.get('role')
+        versions = if_match_versions()
         
-        # Get current objective
-        obj_result = supabase.table("objectives").select("*").eq("id", objective_id).execute()
-        if not obj_result.data:
-            return jsonify({'success': False, 'error': 'Objective not found'}), 404
-        
-        current_objective = obj_result.data[0]
-        
-        # Check permissions
-        if not check_task_permission(current_objective, user_employee_id, user_role):
+        if user_role not in ('admin', 'superadmin') and not user_employee_id:
             return jsonify({'success': False, 'error': 'Not authorized to delete this objective'}), 403
         
-        result = supabase.table("objectives").delete().eq("id", objective_id).execute()
+        query = supabase.table("objectives").delete().eq("id", objective_id)
+        query = apply_objective_permission(query, user_employee_id, user_role)
+        result = apply_if_match(query, versions).execute()
+        
+        if result.data:
+            objective_removed(objective_id)
+            return jsonify({'success': True, 'message': 'Objective deleted'})
         
-        return jsonify({'success': True, 'message': 'Objective deleted'})
+        # Nothing matched - read the row only now to report why
+        current = supabase.table("objectives").select(OBJECTIVE_PERMISSION_COLUMNS).eq("id", objective_id).execute()
+        error = write_precondition_error(current.data[0] if current.data else None, versions, user_employee_id, user_role, 'Objective', 'delete')
+        return error or write_conflict('Objective')
             
     except Exception as e:
         print(f"❌ Error deleting objective: {e}")
@@ -259,8 +789,16 @@ def delete_objective(objective_id):
 
 @task_bp.route('/api/tasks', methods=['GET'])
 @token_required
+@conditional_get(lambda: [("tasks", None), ("objectives", None), ("employees", None)])
+@replica_read(get_tasks_from_replica)
 def get_tasks():
-    """Get all tasks with optional filters - Returns ALL tasks for admins, filtered tasks for employees"""
+    """Get all tasks with optional filters - Returns ALL tasks for admins, filtered tasks for employees
+    
+    Filters: objective_id, assigned_to, status, priority, due_after/due_before
+    (inclusive YYYY-MM-DD), overdue=true. sort=due_date orders by due date
+    (undated last) instead of newest first. fields=a,b returns only those
+    fields (see TASK_LIST_FIELDS).
+    """
     try:
         supabase = get_supabase_client()
         user_role = g.user.get('role')
@@ -272,8 +810,14 @@ def get_tasks():
         status = request.args.get('status')
         priority = request.args.get('priority')
         
-        # Build query - start with all tasks
-        query = supabase.table("tasks").select("*, objectives(title)")
+        try:
+            fields = TASK_LIST_FIELDS.requested()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Build query - start with all tasks (employees also need the ownership columns for filtering below)
+        required = ['created_by', 'assigned_to', 'assigned_to_multiple'] if user_role == 'employee' and user_employee_id else []
+        query = supabase.table("tasks").select(TASK_LIST_FIELDS.select(fields, required))
         
         # Apply optional filters
         if objective_id:
@@ -284,6 +828,10 @@ def get_tasks():
             query = query.eq("status", status)
         if priority:
             query = query.eq("priority", priority)
+        try:
+            query = apply_due_filters(query, request.args)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'due_after/due_before must be YYYY-MM-DD'}), 400
         
         # For employees: filter to show only tasks they created OR are assigned to
         # For admins: show ALL tasks (no additional filtering)
@@ -295,7 +843,12 @@ def get_tasks():
             # Actually, let's use a different approach - fetch all and filter in Python
             pass  # We'll handle this after fetching
         
-        result = query.order("created_at", desc=True).execute()
+        if request.args.get('sort') == 'due_date':
+            # Ascending order puts NULL due dates last in Postgres
+            query = query.order("due_date").order("created_at", desc=True)
+        else:
+            query = query.order("created_at", desc=True)
+        result = query.execute()
         tasks = result.data if result.data else []
         
         # For employees, filter to show only their tasks
@@ -317,33 +870,9 @@ def get_tasks():
             print(f"📊 Tasks breakdown: Admin-created={admin_created}, Employee-created={employee_created}")
         
         # Now fetch employee names separately and add them to tasks
-        employee_ids = set()
-        for task in tasks:
-            if task.get('assigned_to'):
-                employee_ids.add(task['assigned_to'])
-            if task.get('created_by'):
-                employee_ids.add(task['created_by'])
+        add_employee_names(supabase, tasks, fields)
         
-        # Fetch all needed employees in one query
-        employee_map = {}
-        if employee_ids:
-            emp_result = supabase.table("employees").select("id, name, email").in_("id", list(employee_ids)).execute()
-            if emp_result.data:
-                for emp in emp_result.data:
-                    employee_map[emp['id']] = emp
-        
-        # Add employee names to tasks
-        for task in tasks:
-            if task.get('assigned_to') and task['assigned_to'] in employee_map:
-                emp = employee_map[task['assigned_to']]
-                task['assigned_to_name'] = emp.get('name')
-                task['assigned_to_email'] = emp.get('email')
-            if task.get('created_by') and task['created_by'] in employee_map:
-                emp = employee_map[task['created_by']]
-                task['created_by_name'] = emp.get('name')
-                task['created_by_email'] = emp.get('email')
-        
-        return jsonify({'success': True, 'tasks': tasks})
+        return jsonify({'success': True, 'tasks': TASK_LIST_FIELDS.trim(tasks, fields)})
     except Exception as e:
         print(f"❌ Error getting tasks: {e}")
         traceback.print_exc()
@@ -364,32 +893,15 @@ def create_task():
         if not data.get('title'):
             return jsonify({'success': False, 'error': 'Title is required'}), 400
         
-        # Handle assignment
-        assigned_to = safe_uuid(data.get('assigned_to'))
-        assigned_to_multiple = []
-        if data.get('assigned_to_multiple'):
-            assigned_to_multiple = [safe_uuid(uid) for uid in data.get('assigned_to_multiple', []) if safe_uuid(uid)]
-        
-        task_data = {
-            "title": data.get('title'),
-            "description": data.get('description'),
-            "objective_id": safe_uuid(data.get('objective_id')),
-            "assigned_to": assigned_to,
-            "assigned_to_multiple": assigned_to_multiple,
-            "due_date": data.get('due_date'),
-            "priority": data.get('priority', 'medium'),
-            "status": data.get('status', 'not_started'),
-            "completion_percentage": data.get('completion_percentage', 0),
-            "notes": data.get('notes'),
-            "created_by": user_employee_id,
-            "is_standalone": not bool(data.get('objective_id'))  # Standalone if no objective_id
-        }
+        task_data = build_task_insert(data, user_employee_id)
         
         result = supabase.table("tasks").insert(task_data).execute()
         
         if result.data:
+            task_changed(result.data[0])
+            
             # Create notification if assigned to someone
-            if assigned_to:
+            if task_data['assigned_to']:
                 from notification_routes import create_enhanced_task_notification
                 create_enhanced_task_notification(
                     result.data[0]['id'],
@@ -405,8 +917,486 @@ def create_task():
         print(f"❌ Error creating task: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+MAX_BATCH_OPERATIONS = 500
+MAX_CALENDAR_DAYS = 366
+ACTIVITY_PAGE_SIZE = 50
+MAX_ACTIVITY_PAGE_SIZE = 200
+
+@task_bp.route('/api/tasks/batch', methods=['POST'])
+@token_required
+def batch_tasks():
+    """Create, update and delete many tasks in one request
+    
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": "<task_id>", "data": {...}, "version": "<etag>"},
+                          {"op": "delete", "id": "<task_id>", "version": "<etag>"}]}
+    
+    Permissions for every update/delete are checked against one select, creates
+    are one bulk insert, updates are diffed against the loaded rows (no-ops are
+    skipped) and those sharing the same changes and row version are one
+    UPDATE ... IN, deletes at the same row version are one DELETE ... IN, and
+    each assignee gets one notification for the whole batch. Every write is
+    conditional on the version that was loaded (or the optional ``version``,
+    like If-Match on the single-task routes): a stale ``version`` is a 412 and
+    a row changed by someone else in between is a 409. The batch is not
+    atomic: ``results`` holds one entry per operation, in request order,
+    saying whether it was applied.
+    """
+    try:
+        supabase = get_supabase_client()
+        data = request.get_json() or {}
+        user_employee_id = safe_get_employee_id()
+        user_role = g.user.get('role')
+        
+        if not user_employee_id:
+            return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
+        
+        operations = data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+        
+        results = [None] * len(operations)
+        
+        def fail(index, op, task_id, error, status):
+            results[index] = {'index': index, 'op': op, 'id': task_id, 'success': False, 'error': error, 'status': status}
+        
+        def succeed(index, op, task_id, task=None):
+            results[index] = {'index': index, 'op': op, 'id': task_id, 'success': True, 'status': 200}
+            if task is not None:
+                results[index]['task'] = task
+        
+        # Validate and sort operations by kind
+        creates, updates, deletes = [], [], []
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                fail(index, None, None, 'Operation must be an object', 400)
+                continue
+            op = operation.get('op')
+            if op == 'create':
+                payload = operation.get('data') or {}
+                if not payload.get('title'):
+                    fail(index, op, None, 'Title is required', 400)
+                else:
+                    creates.append((index, build_task_insert(payload, user_employee_id)))
+            elif op in ('update', 'delete'):
+                task_id = safe_uuid(operation.get('id'))
+                if not task_id:
+                    fail(index, op, operation.get('id'), 'Valid task id is required', 400)
+                elif op == 'update':
+                    updates.append((index, task_id, operation.get('data') or {}, operation.get('version')))
+                else:
+                    deletes.append((index, task_id, operation.get('version')))
+            else:
+                fail(index, op, operation.get('id'), f'Unknown operation: {op}', 400)
+        
+        # One query loads every task touched by an update or delete
+        target_ids = list({task_id for _, task_id, _, _ in updates} | {task_id for _, task_id, _ in deletes})
+        current_tasks = {}
+        if target_ids:
+            current_result = supabase.table("tasks").select("*").in_("id", target_ids).execute()
+            current_tasks = {t['id']: t for t in (current_result.data or [])}
+        
+        # recipient -> tasks newly assigned to them in this batch
+        assignments = {}
+        
+        def add_assignments(task, previous=None):
+            new_assignees = task_assignees(task) - (task_assignees(previous) if previous else set())
+            for recipient in new_assignees:
+                assignments.setdefault(recipient, []).append(task)
+        
+        # Creates: one bulk insert
+        if creates:
+            try:
+                insert_result = supabase.table("tasks").insert([row for _, row in creates]).execute()
+                inserted = insert_result.data or []
+                for position, (index, _) in enumerate(creates):
+                    if position < len(inserted):
+                        task = inserted[position]
+                        succeed(index, 'create', task.get('id'), task)
+                        task_changed(task)
+                        add_assignments(task)
+                    else:
+                        fail(index, 'create', None, 'Failed to create task', 500)
+            except Exception as e:
+                print(f"❌ Batch create failed: {e}")
+                for index, _ in creates:
+                    fail(index, 'create', None, str(e), 500)
+        
+        def stale(index, op, task_id, current_task, version):
+            """Fail the operation if the client's version is not the loaded one"""
+            if version and row_etag(current_task) != version:
+                fail(index, op, task_id, 'Task has been modified since it was loaded', 412)
+                results[index]['current_version'] = row_etag(current_task)
+                return True
+            return False
+        
+        # Updates: identical changes to rows at the same version are applied with
+        # one UPDATE ... WHERE id IN (...) AND updated_at = <version>
+        update_groups = {}
+        for index, task_id, payload, version in updates:
+            current_task = current_tasks.get(task_id)
+            if not current_task:
+                fail(index, 'update', task_id, 'Task not found', 404)
+                continue
+            if not check_task_permission(current_task, user_employee_id, user_role):
+                fail(index, 'update', task_id, 'Not authorized to update this task', 403)
+                continue
+            if stale(index, 'update', task_id, current_task, version):
+                continue
+            update_data = build_task_update(current_task, payload, user_employee_id, user_role)
+            if not update_data:
+                fail(index, 'update', task_id, 'No valid fields to update', 400)
+                continue
+            update_data = changed_fields(current_task, update_data)
+            if not update_data:
+                # Nothing changed: skip the write and report the task as it is
+                succeed(index, 'update', task_id, current_task)
+                results[index]['changed_fields'] = []
+                continue
+            group_key = (json.dumps(update_data, sort_keys=True, default=str), row_etag(current_task))
+            update_groups.setdefault(group_key, (update_data, current_task, []))[2].append((index, task_id))
+        
+        updated_at = datetime.utcnow().isoformat()
+        for update_data, loaded_task, members in update_groups.values():
+            try:
+                update_result = apply_row_version(
+                    supabase.table("tasks")
+                    .update({**update_data, 'updated_at': updated_at})
+                    .in_("id", [task_id for _, task_id in members]),
+                    loaded_task
+                ).execute()
+                updated_by_id = {t['id']: t for t in (update_result.data or [])}
+                for index, task_id in members:
+                    task = updated_by_id.get(task_id)
+                    if task:
+                        succeed(index, 'update', task_id, task)
+                        results[index]['changed_fields'] = sorted(update_data)
+                        task_changed(task)
+                        add_assignments(task, current_tasks.get(task_id))
+                    else:
+                        # Changed or deleted since it was loaded
+                        fail(index, 'update', task_id, conflict_message('Task'), 409)
+            except Exception as e:
+                print(f"❌ Batch update failed: {e}")
+                for index, task_id in members:
+                    fail(index, 'update', task_id, str(e), 500)
+        
+        # Deletes: one DELETE ... WHERE id IN (...) AND updated_at = <version> per version
+        delete_groups = {}
+        for index, task_id, version in deletes:
+            current_task = current_tasks.get(task_id)
+            if not current_task:
+                fail(index, 'delete', task_id, 'Task not found', 404)
+            elif not check_task_permission(current_task, user_employee_id, user_role):
+                fail(index, 'delete', task_id, 'Not authorized to delete this task', 403)
+            elif not stale(index, 'delete', task_id, current_task, version):
+                delete_groups.setdefault(row_etag(current_task), (current_task, []))[1].append((index, task_id))
+        
+        for loaded_task, members in delete_groups.values():
+            try:
+                delete_result = apply_row_version(
+                    supabase.table("tasks").delete().in_("id", list({task_id for _, task_id in members})),
+                    loaded_task
+                ).execute()
+                deleted = {t['id'] for t in (delete_result.data or [])}
+                for index, task_id in members:
+                    if task_id in deleted:
+                        succeed(index, 'delete', task_id)
+                    else:
+                        fail(index, 'delete', task_id, conflict_message('Task'), 409)
+                for task_id in deleted:
+                    task_removed(task_id)
+            except Exception as e:
+                print(f"❌ Batch delete failed: {e}")
+                for index, task_id in members:
+                    fail(index, 'delete', task_id, str(e), 500)
+        
+        # One coalesced notification per assignee for the whole batch
+        deleted_ids = {r['id'] for r in results if r and r.get('success') and r.get('op') == 'delete'}
+        assignments = {
+            recipient: [t for t in tasks if t.get('id') not in deleted_ids]
+            for recipient, tasks in assignments.items()
+        }
+        assignments = {recipient: tasks for recipient, tasks in assignments.items() if tasks}
+        if assignments:
+            try:
+                from notification_routes import create_batch_assignment_notifications
+                current_user_name = "Unknown"
+                employee = identity_map.get_row(supabase, "employees", user_employee_id, "name")
+                if employee:
+                    current_user_name = employee.get('name', 'Unknown')
+                create_batch_assignment_notifications(supabase, assignments, current_user_name, user_role)
+            except Exception as notify_err:
+                print(f"⚠️ Failed to create batch notifications: {notify_err}")
+        
+        applied = sum(1 for r in results if r and r.get('success'))
+        print(f"📦 Batch tasks: {applied}/{len(operations)} operations applied")
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'applied': applied,
+            'failed': len(operations) - applied
+        })
+    except Exception as e:
+        print(f"❌ Error in batch task operation: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Delta sync streams: name -> (table, cursor column)
+CHANGE_STREAMS = {
+    'tasks': ('tasks', 'updated_at'),
+    'task_updates': ('task_updates', 'created_at'),
+    'deleted': ('deleted_records', 'deleted_at'),
+    'hidden': ('task_visibility_changes', 'changed_at'),
+}
+CHANGES_PAGE_SIZE = int(os.getenv('TASK_CHANGES_PAGE_SIZE', '500'))
+
+def encode_changes_cursor(positions):
+    """Opaque delta sync cursor: {stream: [timestamp, id] or None}"""
+    payload = json.dumps(positions, sort_keys=True).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_changes_cursor(since):
+    """Per-stream positions from a cursor; a bare timestamp (older clients) starts every stream there"""
+    try:
+        datetime.fromisoformat(since.replace('Z', '+00:00'))
+        return {stream: [since, None] for stream in CHANGE_STREAMS}
+    except ValueError:
+        pass
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(since + '=' * (-len(since) % 4)))
+        positions = {}
+        for stream in CHANGE_STREAMS:
+            position = payload.get(stream)
+            if position is not None:
+                datetime.fromisoformat(position[0].replace('Z', '+00:00'))
+                position = [position[0], str(uuid.UUID(str(position[1]))) if position[1] else None]
+            positions[stream] = position
+        return positions
+    except Exception:
+        raise ValueError('Invalid since cursor')
+
+def employee_task_filter(user_employee_id):
+    """PostgREST or_ filter for tasks an employee created or is assigned to (same rule as get_tasks)"""
+    return f"created_by.eq.{user_employee_id},assigned_to.eq.{user_employee_id},assigned_to_multiple.cs.{{{user_employee_id}}}"
+
+def visible_task_ids(supabase, user_employee_id):
+    """Ids of every task an employee can see (paged past the PostgREST row cap)"""
+    ids, offset = set(), 0
+    while True:
+        rows = (
+            supabase.table("tasks").select("id").or_(employee_task_filter(user_employee_id))
+            .order("id").range(offset, offset + CHANGES_PAGE_SIZE - 1).execute()
+        ).data or []
+        ids.update(row['id'] for row in rows)
+        if len(rows) < CHANGES_PAGE_SIZE:
+            return ids
+        offset += CHANGES_PAGE_SIZE
+
+def read_stream(query, column, position):
+    """One page of a stream after (timestamp, id), in cursor order; returns (rows, new position, has_more)"""
+    if position and position[1]:
+        timestamp, row_id = position
+        query = query.or_(f'{column}.gt."{timestamp}",and({column}.eq."{timestamp}",id.gt.{row_id})')
+    elif position:
+        query = query.gt(column, position[0])
+    rows = query.order(column).order("id").limit(CHANGES_PAGE_SIZE).execute().data or []
+    if rows:
+        position = [rows[-1][column], rows[-1]['id']]
+    return rows, position, len(rows) == CHANGES_PAGE_SIZE
+
+def stream_head(supabase, stream):
+    """Position of a stream's newest row (where a full sync starts it)"""
+    table, column = CHANGE_STREAMS[stream]
+    rows = supabase.table(table).select(f"id, {column}").order(column, desc=True).order("id", desc=True).limit(1).execute().data
+    return [rows[0][column], rows[0]['id']] if rows else None
+
+@task_bp.route('/api/tasks/changes', methods=['GET'])
+@token_required
+def get_task_changes():
+    """Get tasks, task updates and deletions since a cursor (delta sync)
+    
+    Without ``since`` this starts a full sync of the visible task list. Clients
+    upsert ``tasks``/``task_updates`` by id, drop everything listed in
+    ``deleted`` (including the updates of deleted tasks, and tasks whose
+    ``reason`` is ``not_visible`` because they were reassigned away from the
+    caller; employees only get tombstones of tasks they could see), and send back ``cursor`` as ``since`` next time. Each stream
+    returns at most TASK_CHANGES_PAGE_SIZE rows; while ``has_more`` is true,
+    call again right away with the new cursor.
+    """
+    try:
+        supabase = get_supabase_client()
+        user_role = g.user.get('role')
+        user_employee_id = safe_get_employee_id()
+        is_employee = user_role == 'employee' and user_employee_id
+        
+        since = request.args.get('since')
+        if since:
+            try:
+                positions = decode_changes_cursor(since)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+        else:
+            # Full sync: every task, then only changes from now on in the other streams
+            positions = {stream: stream_head(supabase, stream) for stream in CHANGE_STREAMS if stream != 'tasks'}
+            positions['tasks'] = None
+        
+        has_more = False
+        
+        tasks_query = supabase.table("tasks").select("*, objectives(title)")
+        # Employees only sync tasks they created or are assigned to (same rule as get_tasks)
+        if is_employee:
+            tasks_query = tasks_query.or_(employee_task_filter(user_employee_id))
+        tasks, positions['tasks'], more = read_stream(tasks_query, 'updated_at', positions['tasks'])
+        has_more = has_more or more
+        add_employee_names(supabase, tasks)
+        
+        updates = []
+        deleted = []
+        if since:
+            visible_ids = visible_task_ids(supabase, user_employee_id) if is_employee else None
+            
+            # Employees only get notes of tasks they can see
+            if visible_ids is None or visible_ids:
+                updates_query = supabase.table("task_updates").select("*, employees!updated_by(name, email)")
+                if visible_ids is not None:
+                    updates_query = updates_query.in_("task_id", sorted(visible_ids))
+                updates, positions['task_updates'], more = read_stream(updates_query, 'created_at', positions['task_updates'])
+                has_more = has_more or more
+            
+            tombstones_query = supabase.table("deleted_records").select("id, table_name, record_id, deleted_at")
+            # Employees only learn about deleted tasks they could see (migration 017)
+            if is_employee:
+                tombstones_query = tombstones_query.or_(f"table_name.eq.objectives,visible_to.cs.{{{user_employee_id}}}")
+            tombstones, positions['deleted'], more = read_stream(tombstones_query, 'deleted_at', positions['deleted'])
+            has_more = has_more or more
+            deleted = [
+                {'table': d.get('table_name'), 'id': d.get('record_id'), 'deleted_at': d.get('deleted_at'), 'reason': 'deleted'}
+                for d in tombstones
+            ]
+            
+            # Tasks reassigned away from this employee (admins see every task)
+            if is_employee:
+                hidden, positions['hidden'], more = read_stream(
+                    supabase.table("task_visibility_changes").select("id, task_id, changed_at").eq("employee_id", user_employee_id),
+                    'changed_at', positions['hidden']
+                )
+                has_more = has_more or more
+                deleted += [
+                    {'table': 'tasks', 'id': h.get('task_id'), 'deleted_at': h.get('changed_at'), 'reason': 'not_visible'}
+                    for h in hidden if h.get('task_id') not in visible_ids
+                ]
+        
+        return jsonify({
+            'success': True,
+            'tasks': tasks,
+            'task_updates': updates,
+            'deleted': deleted,
+            'cursor': encode_changes_cursor(positions),
+            'has_more': has_more,
+            'full_sync': not since
+        })
+    except Exception as e:
+        print(f"❌ Error getting task changes: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/api/tasks/calendar', methods=['GET'])
+@token_required
+@conditional_get(lambda: [("tasks", None)])
+def get_task_calendar():
+    """Compact task list for calendar rendering: tasks due between from and to (inclusive)"""
+    try:
+        supabase = get_supabase_client()
+        user_role = g.user.get('role')
+        user_employee_id = safe_get_employee_id()
+        
+        try:
+            start = parse_day(request.args.get('from'))
+            end = parse_day(request.args.get('to'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'from/to must be YYYY-MM-DD'}), 400
+        if not start or not end:
+            return jsonify({'success': False, 'error': 'from and to are required'}), 400
+        if end < start or (end - start).days > MAX_CALENDAR_DAYS:
+            return jsonify({'success': False, 'error': f'Range must be between 0 and {MAX_CALENDAR_DAYS} days'}), 400
+        
+        query = (
+            supabase.table("tasks")
+            .select("id, title, due_date, status, assigned_to, assigned_to_multiple")
+            .gte("due_date", start.isoformat())
+            .lte("due_date", end.isoformat())
+        )
+        # Employees only see tasks they created or are assigned to (same rule as get_tasks)
+        if user_role == 'employee' and user_employee_id:
+            query = query.or_(employee_task_filter(user_employee_id))
+        tasks = query.order("due_date").execute().data or []
+        return jsonify({'success': True, 'from': start.isoformat(), 'to': end.isoformat(), 'tasks': tasks})
+    except Exception as e:
+        print(f"❌ Error getting task calendar: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def quoted_ilike_pattern(text):
+    """'%text%' as a double-quoted PostgREST filter value, so , . : ( ) in the text are not parsed"""
+    text = text.replace('%', '').replace('*', '').replace('\\', '\\\\').replace('"', '\\"')
+    return f'"%{text}%"'
+
+@task_bp.route('/api/tasks/search', methods=['GET'])
+@token_required
+def search_tasks():
+    """Full-text search over task title, description, notes, update notes and objective title
+    
+    Served from the in-process search index; while the index is still being
+    built this falls back to a plain title/description match in the DB.
+    """
+    try:
+        user_role = g.user.get('role')
+        user_employee_id = safe_get_employee_id()
+        
+        query_text = (request.args.get('q') or '').strip()
+        if not query_text:
+            return jsonify({'success': False, 'error': 'q is required'}), 400
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit must be a number'}), 400
+        
+        # Employees only find tasks they created or are assigned to (same rule as get_tasks)
+        visible = None
+        if user_role == 'employee' and user_employee_id:
+            visible = lambda task: (
+                task.get('created_by') == user_employee_id or
+                user_employee_id in task_assignees(task)
+            )
+        
+        if task_search_index.ready:
+            tasks, total = task_search_index.search(query_text, limit=limit, visible=visible)
+            return jsonify({'success': True, 'tasks': tasks, 'total': total, 'indexed': True})
+        
+        supabase = get_supabase_client()
+        pattern = quoted_ilike_pattern(query_text)
+        text_match = f"title.ilike.{pattern},description.ilike.{pattern}"
+        if visible:
+            # One or_ filter: the text match AND the ownership rule
+            text_match = f"and(or({text_match}),or({employee_task_filter(user_employee_id)}))"
+        db_query = supabase.table("tasks").select(
+            "id, title, status, priority, due_date, completion_percentage, objective_id, assigned_to, assigned_to_multiple, created_by, objectives(title)"
+        ).or_(text_match)
+        tasks = db_query.order("updated_at", desc=True).limit(limit).execute().data or []
+        for task in tasks:
+            task['objective_title'] = (task.pop('objectives', None) or {}).get('title')
+        return jsonify({'success': True, 'tasks': tasks, 'total': len(tasks), 'indexed': False})
+    except Exception as e:
+        print(f"❌ Error searching tasks: {e}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @task_bp.route('/api/tasks/<task_id>', methods=['GET'])
 @token_required
+@replica_read(get_task_from_replica)
 def get_task(task_id):
     """Get a single task with updates"""
     try:
@@ -447,7 +1437,7 @@ def get_task(task_id):
         updates_result = supabase.table("task_updates").select("*, employees!updated_by(name, email)").eq("task_id", task_id).order("created_at", desc=True).execute()
         task['updates'] = updates_result.data if updates_result.data else []
         
-        return jsonify({'success': True, 'task': task})
+        return with_row_etag(jsonify({'success': True, 'task': task}), task)
     except Exception as e:
         print(f"❌ Error getting task: {e}")
         traceback.print_exc()
@@ -456,92 +1446,55 @@ def get_task(task_id):
 @task_bp.route('/api/tasks/<task_id>', methods=['PUT'])
 @token_required
 def update_task(task_id):
-    """Update a task"""
+    """Update a task, writing only the fields that actually changed
+    
+    The edit form resubmits the whole task, so the request is diffed against the
+    current row, read first (two round trips; the diff and the employee field
+    rules need it): an empty diff returns without writing (no updated_at bump,
+    no trigger notifications). Otherwise only changed columns are written, and the
+    write is conditional on the version that was read, so concurrent editors get
+    409 instead of losing an update (412 when the client's If-Match is stale).
+    """
     try:
         supabase = get_supabase_client()
-        data = request.get_json()
+        data = request.get_json() or {}
         user_employee_id = safe_get_employee_id()
         user_role = g.user.get('role')
+        versions = if_match_versions()
         
         # Get current task
         task_result = supabase.table("tasks").select("*").eq("id", task_id).execute()
-        if not task_result.data:
-            return jsonify({'success': False, 'error': 'Task not found'}), 404
+        current_task = task_result.data[0] if task_result.data else None
         
-        current_task = task_result.data[0]
-        old_status = current_task.get('status')
-        old_progress = current_task.get('completion_percentage', 0)
+        # Check existence, permissions and If-Match
+        error = write_precondition_error(current_task, versions, user_employee_id, user_role, 'Task', 'update')
+        if error:
+            return error
         
-        # Check permissions
-        if user_role == 'employee':
-            # Employees can only update tasks assigned to them or their own tasks
-            if not check_task_permission(current_task, user_employee_id, user_role):
-                return jsonify({'success': False, 'error': 'Not authorized to update this task'}), 403
-            
-            # Check if employee created and is assigned to the task (can edit fully)
-            can_edit_fully = can_employee_edit_fully(current_task, user_employee_id)
-            
-            if can_edit_fully:
-                # Employee can edit all fields when they created the task (and are assigned or unassigned)
-                allowed_fields = [
-                    'title', 'description', 'assigned_to', 'assigned_to_multiple',
-                    'priority', 'due_date', 'status', 'completion_percentage', 'notes'
-                ]
-                update_data = {k: v for k, v in data.items() if k in allowed_fields}
-                
-                # If task is unassigned and employee is editing, auto-assign to them
-                if not current_task.get('assigned_to') and not update_data.get('assigned_to'):
-                    update_data['assigned_to'] = user_employee_id
-                    print(f"✅ Auto-assigning unassigned task to employee {user_employee_id}")
-                
-                # Sanitize UUID fields
-                if 'assigned_to' in update_data:
-                    update_data['assigned_to'] = safe_uuid(update_data['assigned_to'])
-                if 'assigned_to_multiple' in update_data:
-                    update_data['assigned_to_multiple'] = [safe_uuid(uid) for uid in update_data['assigned_to_multiple'] if safe_uuid(uid)]
-            else:
-                # Employees can only update progress, notes, and status
-                allowed_fields = ['completion_percentage', 'notes', 'status']
-                update_data = {k: v for k, v in data.items() if k in allowed_fields}
-            
-            # Auto-update status based on progress
-            if 'completion_percentage' in update_data:
-                progress = update_data['completion_percentage']
-                if progress == 100:
-                    update_data['status'] = 'completed'
-                elif progress > 0:
-                    update_data['status'] = 'in_progress'
-        else:
-            # Admins can update most fields
-            allowed_fields = [
-                'title', 'description', 'assigned_to', 'assigned_to_multiple',
-                'priority', 'due_date', 'status', 'completion_percentage', 'notes'
-            ]
-            update_data = {k: v for k, v in data.items() if k in allowed_fields}
-            
-            # Sanitize UUID fields
-            if 'assigned_to' in update_data:
-                update_data['assigned_to'] = safe_uuid(update_data['assigned_to'])
-            if 'assigned_to_multiple' in update_data:
-                update_data['assigned_to_multiple'] = [safe_uuid(uid) for uid in update_data['assigned_to_multiple'] if safe_uuid(uid)]
+        update_data = build_task_update(current_task, data, user_employee_id, user_role)
         
         if not update_data:
             return jsonify({'success': False, 'error': 'No valid fields to update'}), 400
         
-        update_data['updated_at'] = datetime.utcnow().isoformat()
+        changes = changed_fields(current_task, update_data)
+        if not changes:
+            return with_row_etag(jsonify({
+                'success': True, 'task': current_task, 'changed_fields': [], 'message': 'No changes'
+            }), current_task)
         
-        result = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
+        changes_to_write = {**changes, 'updated_at': datetime.utcnow().isoformat()}
+        query = supabase.table("tasks").update(changes_to_write).eq("id", task_id)
+        result = apply_row_version(query, current_task).execute()
         
-        if result.data:
-            # Check if task was completed (triggers will handle notifications)
-            new_status = result.data[0].get('status')
-            if new_status == 'completed' and old_status != 'completed':
-                # Notification will be created by database trigger
-                pass
-            
-            return jsonify({'success': True, 'task': result.data[0]})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to update task'}), 500
+        if not result.data:
+            return write_conflict('Task')
+        
+        task_changed(result.data[0])
+        
+        # Completion notifications are created by the task_completion_notification trigger
+        return with_row_etag(jsonify({
+            'success': True, 'task': result.data[0], 'changed_fields': sorted(changes)
+        }), result.data[0])
             
     except Exception as e:
         print(f"❌ Error updating task: {e}")
@@ -550,26 +1503,28 @@ def update_task(task_id):
 @task_bp.route('/api/tasks/<task_id>', methods=['DELETE'])
 @token_required
 def delete_task(task_id):
-    """Delete a task"""
+    """Delete a task with one conditional write (id + permission + If-Match)"""
     try:
         supabase = get_supabase_client()
         user_employee_id = safe_get_employee_id()
         user_role = g.user.get('role')
+        versions = if_match_versions()
         
-        # Get current task
-        task_result = supabase.table("tasks").select("*").eq("id", task_id).execute()
-        if not task_result.data:
-            return jsonify({'success': False, 'error': 'Task not found'}), 404
-        
-        current_task = task_result.data[0]
-        
-        # Check permissions
-        if not check_task_permission(current_task, user_employee_id, user_role):
+        if user_role not in ('admin', 'superadmin') and not user_employee_id:
             return jsonify({'success': False, 'error': 'Not authorized to delete this task'}), 403
         
-        result = supabase.table("tasks").delete().eq("id", task_id).execute()
+        query = supabase.table("tasks").delete().eq("id", task_id)
+        query = apply_task_permission(query, user_employee_id, user_role)
+        result = apply_if_match(query, versions).execute()
         
-        return jsonify({'success': True, 'message': 'Task deleted'})
+        if result.data:
+            task_removed(task_id)
+            return jsonify({'success': True, 'message': 'Task deleted'})
+        
+        # Nothing matched - read the row only now to report why
+        current = supabase.table("tasks").select(TASK_PERMISSION_COLUMNS).eq("id", task_id).execute()
+        error = write_precondition_error(current.data[0] if current.data else None, versions, user_employee_id, user_role, 'Task', 'delete')
+        return error or write_conflict('Task')
             
     except Exception as e:
         print(f"❌ Error deleting task: {e}")
@@ -581,6 +1536,7 @@ def delete_task(task_id):
 
 @task_bp.route('/api/tasks/<task_id>/updates', methods=['GET'])
 @token_required
+@replica_read(get_task_updates_from_replica)
 def get_task_updates(task_id):
     """Get all updates for a task"""
     try:
@@ -591,6 +1547,32 @@ def get_task_updates(task_id):
         print(f"❌ Error getting task updates: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@task_bp.route('/api/tasks/<task_id>/progress-history', methods=['GET'])
+@token_required
+def get_task_progress_history(task_id):
+    """Daily progress of a task (last value reported each day)"""
+    try:
+        supabase = get_supabase_client()
+        try:
+            start = parse_day(request.args.get('from'))
+            end = parse_day(request.args.get('to'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'from/to must be YYYY-MM-DD'}), 400
+        
+        task_result = supabase.table("tasks").select("id, completion_percentage, created_at").eq("id", task_id).execute()
+        if not task_result.data:
+            return jsonify({'success': False, 'error': 'Task not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'current_progress': task_result.data[0].get('completion_percentage') or 0,
+            'history': task_progress_history(supabase, task_id, start, end)
+        })
+    except Exception as e:
+        print(f"❌ Error getting task progress history: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @task_bp.route('/api/tasks/<task_id>/updates', methods=['POST'])
 @token_required
 def create_task_update(task_id):
@@ -604,11 +1586,10 @@ def create_task_update(task_id):
             return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
         
         # Verify task exists and user has access
-        task_result = supabase.table("tasks").select("*").eq("id", task_id).execute()
-        if not task_result.data:
+        task = identity_map.get_row(supabase, "tasks", task_id)
+        if not task:
             return jsonify({'success': False, 'error': 'Task not found'}), 404
         
-        task = task_result.data[0]
         user_role = g.user.get('role')
         
         # Check if user can create updates for this task
@@ -630,6 +1611,8 @@ def create_task_update(task_id):
         result = supabase.table("task_updates").insert(update_data).execute()
         
         if result.data:
+            task_update_added(result.data[0])
+            
             # Create notification
             from notification_routes import create_enhanced_task_notification
             old_progress = task.get('completion_percentage', 0)
@@ -665,11 +1648,10 @@ def add_task_note(task_id):
             return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
         
         # Verify task exists
-        task_result = supabase.table("tasks").select("*").eq("id", task_id).execute()
-        if not task_result.data:
+        task = identity_map.get_row(supabase, "tasks", task_id)
+        if not task:
             return jsonify({'success': False, 'error': 'Task not found'}), 404
         
-        task = task_result.data[0]
         user_role = g.user.get('role')
         
         # Check if user can create updates for this task
@@ -692,6 +1674,8 @@ def add_task_note(task_id):
         result = supabase.table("task_updates").insert(update_data).execute()
         
         if result.data:
+            task_update_added(result.data[0])
+            
             # Update task progress if provided
             if data.get('progress') is not None:
                 task_update_data = {
@@ -705,7 +1689,22 @@ def add_task_note(task_id):
                 elif data.get('progress') > 0:
                     task_update_data['status'] = 'in_progress'
                 
-                supabase.table("tasks").update(task_update_data).eq("id", task_id).execute()
+                progress_result = supabase.table("tasks").update(task_update_data).eq("id", task_id).execute()
+                if progress_result.data:
+                    task_changed(progress_result.data[0])
+            
+            # Employees attached to the note start watching the task, and their
+            # replies go back to whoever attached them
+            from notification_routes import record_note_attachers
+            attached_ids = [safe_uuid(e) for e in [data.get('attached_to'), *(data.get('attached_to_multiple') or [])]]
+            try:
+                watcher_index.watch_attached(supabase, task_id, attached_ids)
+            except Exception as e:
+                print(f"⚠️ Failed to subscribe attached employees: {e}")
+            try:
+                record_note_attachers(supabase, task_id, user_employee_id, attached_ids, result.data[0].get('id'))
+            except Exception as e:
+                print(f"⚠️ Failed to record who attached employees: {e}")
             
             # Create notification
             from notification_routes import create_enhanced_task_notification
@@ -748,12 +1747,11 @@ def upload_task_file(task_id):
         print(f"✅ Employee ID: {user_employee_id}")
         
         # Verify task exists
-        task_result = supabase.table("tasks").select("*").eq("id", task_id).execute()
-        if not task_result.data:
+        task = identity_map.get_row(supabase, "tasks", task_id)
+        if not task:
             print(f"❌ Task {task_id} not found")
             return jsonify({'success': False, 'error': 'Task not found'}), 404
         
-        task = task_result.data[0]
         user_role = g.user.get('role')
         print(f"✅ Task found: {task.get('title')}, User role: {user_role}")
         
@@ -832,6 +1830,7 @@ def upload_task_file(task_id):
         
         if result.data:
             print(f"✅ Task update created successfully: {result.data[0].get('id')}")
+            task_update_added(result.data[0])
             # Create notification
             try:
                 from notification_routes import create_enhanced_task_notification
@@ -860,6 +1859,100 @@ def upload_task_file(task_id):
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============================================
+# WATCH / MUTE ENDPOINTS
+# ============================================
+
+def watch_target(supabase, kind, target_id):
+    """The task or objective row a watch endpoint refers to (None when missing)"""
+    if kind == 'task':
+        return identity_map.get_row(supabase, "tasks", target_id, "id, assigned_to, assigned_to_multiple, created_by, objective_id")
+    return identity_map.get_row(supabase, "objectives", target_id, "id, created_by")
+
+def watch_status(kind, target_id):
+    """GET: the caller's subscription and everyone who would be notified"""
+    try:
+        supabase = get_supabase_client()
+        target = watch_target(supabase, kind, target_id)
+        if not target:
+            return jsonify({'success': False, 'error': f'{kind.capitalize()} not found'}), 404
+        
+        from notification_routes import get_admin_employees
+        admin_ids = [admin['id'] for admin in get_admin_employees()]
+        if kind == 'task':
+            watcher_ids = watcher_index.task_watchers(supabase, target_id, target, admin_ids)
+        else:
+            watcher_ids = watcher_index.objective_watchers(supabase, target_id, target, admin_ids)
+        names = employee_lookup_index.names(supabase, [e for e in watcher_ids if safe_uuid(e)])
+        
+        user_employee_id = safe_get_employee_id()
+        return jsonify({
+            'success': True,
+            'watching': user_employee_id in watcher_ids,
+            'state': watcher_index.explicit_state(supabase, kind, target_id, user_employee_id),
+            'watchers': sorted(
+                [{'id': e, 'name': names.get(e, {}).get('name')} for e in watcher_ids],
+                key=lambda w: (w['name'] or '').lower()
+            )
+        })
+    except Exception as e:
+        print(f"❌ Error getting {kind} watchers: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def set_watch_state(kind, target_id, state):
+    """PUT/DELETE: follow, mute or go back to the default for the caller"""
+    try:
+        supabase = get_supabase_client()
+        user_employee_id = safe_get_employee_id()
+        if not user_employee_id:
+            return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
+        if state is not None and state not in WATCH_STATES:
+            return jsonify({'success': False, 'error': f"state must be one of: {', '.join(WATCH_STATES)}"}), 400
+        if not watch_target(supabase, kind, target_id):
+            return jsonify({'success': False, 'error': f'{kind.capitalize()} not found'}), 404
+        
+        watcher_index.set_state(supabase, kind, target_id, user_employee_id, state)
+        return jsonify({'success': True, 'state': state})
+    except Exception as e:
+        print(f"❌ Error updating {kind} watch: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/api/tasks/<task_id>/watchers', methods=['GET'])
+@token_required
+def get_task_watchers(task_id):
+    """Who is notified about notes, progress and uploads on a task"""
+    return watch_status('task', task_id)
+
+@task_bp.route('/api/tasks/<task_id>/watch', methods=['PUT'])
+@token_required
+def watch_task(task_id):
+    """Follow ({"state": "watching"}) or mute ({"state": "muted"}) a task"""
+    return set_watch_state('task', task_id, (request.get_json() or {}).get('state', 'watching'))
+
+@task_bp.route('/api/tasks/<task_id>/watch', methods=['DELETE'])
+@token_required
+def unwatch_task(task_id):
+    """Drop the caller's follow/mute (assignees, creator and admins watch by default)"""
+    return set_watch_state('task', task_id, None)
+
+@task_bp.route('/api/objectives/<objective_id>/watchers', methods=['GET'])
+@token_required
+def get_objective_watchers(objective_id):
+    """Who follows every task of an objective"""
+    return watch_status('objective', objective_id)
+
+@task_bp.route('/api/objectives/<objective_id>/watch', methods=['PUT'])
+@token_required
+def watch_objective(objective_id):
+    """Follow or mute all tasks of an objective (a task-level choice still wins)"""
+    return set_watch_state('objective', objective_id, (request.get_json() or {}).get('state', 'watching'))
+
+@task_bp.route('/api/objectives/<objective_id>/watch', methods=['DELETE'])
+@token_required
+def unwatch_objective(objective_id):
+    """Drop the caller's follow/mute of an objective"""
+    return set_watch_state('objective', objective_id, None)
+
 @task_bp.route('/api/tasks/<task_id>/notes', methods=['GET'])
 @token_required
 def get_task_notes(task_id):
@@ -930,58 +2023,61 @@ def get_task_attachments(task_id):
 # DASHBOARD ENDPOINTS
 # ============================================
 
+DASHBOARD_STATUSES = ('not_started', 'in_progress', 'completed', 'cancelled')
+DASHBOARD_STAT_KEYS = ('total',) + DASHBOARD_STATUSES + ('objectives',)
+
+def shape_dashboard_stats(data):
+    """Normalise the dashboard_stats RPC result to {key: int} with every key present"""
+    if isinstance(data, list):
+        data = data[0] if data else {}
+    if isinstance(data, str):
+        data = json.loads(data)
+    data = data or {}
+    return {key: int(data.get(key) or 0) for key in DASHBOARD_STAT_KEYS}
+
+def count_dashboard_stats(supabase, scope):
+    """Same counts as dashboard_stats with PostgREST exact counts, for databases
+    without migration 009"""
+    def count(table, status=None):
+        query = supabase.table(table).select("id", count="exact")
+        if table == "tasks" and scope:
+            query = query.or_(f"assigned_to.eq.{scope},assigned_to_multiple.cs.{{{scope}}}")
+        elif scope:
+            query = query.eq("created_by", scope)
+        if status:
+            query = query.eq("status", status)
+        return query.limit(1).execute().count or 0
+    
+    stats = {status: count("tasks", status) for status in DASHBOARD_STATUSES}
+    stats['total'] = count("tasks")
+    stats['objectives'] = count("objectives")
+    return shape_dashboard_stats(stats)
+
+def load_dashboard_stats(supabase, scope):
+    """dashboard_stats RPC (migration 009), falling back to counting queries when it fails"""
+    try:
+        return shape_dashboard_stats(supabase.rpc("dashboard_stats", {"p_employee_id": scope}).execute().data)
+    except Exception as e:
+        print(f"⚠️ dashboard_stats RPC failed ({e}), counting with queries instead")
+        return count_dashboard_stats(supabase, scope)
+
 @task_bp.route('/api/tasks/dashboard', methods=['GET'])
 @token_required
 def get_dashboard():
-    """Get dashboard statistics"""
+    """Get dashboard statistics (counted in the DB by the dashboard_stats function, migration 009)"""
     try:
         supabase = get_supabase_client()
         user_employee_id = safe_get_employee_id()
         user_role = g.user.get('role')
         
-        # Get all tasks or filtered by assignee
-        if user_role == 'employee':
-            tasks_result = supabase.table("tasks").select("*").or_("assigned_to.eq.{},assigned_to_multiple.cs.[{}]".format(user_employee_id, user_employee_id)).execute()
-        else:
-            tasks_result = supabase.table("tasks").select("*").execute()
-        
-        tasks = tasks_result.data if tasks_result.data else []
-        
-        # Calculate statistics
-        stats = {
-            'total': len(tasks),
-            'not_started': len([t for t in tasks if t.get('status') == 'not_started']),
-            'in_progress': len([t for t in tasks if t.get('status') == 'in_progress']),
-            'completed': len([t for t in tasks if t.get('status') == 'completed']),
-            'cancelled': len([t for t in tasks if t.get('status') == 'cancelled'])
-        }
-        
-        # Get objectives count
-        if user_role == 'employee':
-            objectives_result = supabase.table("objectives").select("*").eq("created_by", user_employee_id).execute()
-        else:
-            objectives_result = supabase.table("objectives").select("*").execute()
-        
-        stats['objectives'] = len(objectives_result.data) if objectives_result.data else 0
+        # Employees see tasks assigned to them and objectives they created; admins see everything
+        if user_role == 'employee' and not user_employee_id:
+            return jsonify({'success': False, 'error': 'Employee ID not found'}), 401
+        scope = user_employee_id if user_role == 'employee' else None
+        # Concurrent identical loads share one call
+        stats = singleflight.do(('dashboard.stats', scope), lambda: load_dashboard_stats(supabase, scope))
         
         return jsonify({'success': True, 'stats': stats})
     except Exception as e:
         print(f"❌ Error getting dashboard: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
-
-# ============================================
-# EMPLOYEES ENDPOINT (for assignment dropdowns)
-# ============================================
-
-@task_bp.route('/api/employees', methods=['GET'])
-@token_required
-def get_employees():
-    """Get all active employees (for assignment dropdowns)"""
-    try:
-        supabase = get_supabase_client()
-        result = supabase.table("employees").select("id, name, email, role, department").eq("is_active", True).order("name").execute()
-        return jsonify({'success': True, 'employees': result.data if result.data else []})
-    except Exception as e:
-        print(f"❌ Error getting employees: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
-
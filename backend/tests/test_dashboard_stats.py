@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from task_routes import DASHBOARD_STAT_KEYS, load_dashboard_stats, shape_dashboard_stats
+
+TASKS = [
+    {'id': 1, 'status': 'not_started', 'assigned_to': 'e1', 'assigned_to_multiple': []},
+    {'id': 2, 'status': 'in_progress', 'assigned_to': 'e2', 'assigned_to_multiple': ['e1']},
+    {'id': 3, 'status': 'completed', 'assigned_to': 'e2', 'assigned_to_multiple': []},
+    {'id': 4, 'status': 'completed', 'assigned_to': 'e1', 'assigned_to_multiple': []},
+]
+OBJECTIVES = [{'id': 1, 'created_by': 'e1'}, {'id': 2, 'created_by': 'e2'}]
+
+
+class CountQuery:
+    """Just enough of a PostgREST select builder to answer exact counts"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, *columns, count=None):
+        return self
+
+    def eq(self, column, value):
+        return CountQuery([r for r in self.rows if r.get(column) == value])
+
+    def or_(self, filters):
+        employee_id = filters.split(',')[0].split('.eq.')[1]
+        return CountQuery([
+            r for r in self.rows
+            if r.get('assigned_to') == employee_id or employee_id in (r.get('assigned_to_multiple') or [])
+        ])
+
+    def limit(self, size):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows[:1], count=len(self.rows))
+
+
+def client_without_rpc():
+    supabase = MagicMock()
+    supabase.rpc.side_effect = Exception('Could not find the function public.dashboard_stats')
+    supabase.table.side_effect = lambda name: CountQuery({'tasks': TASKS, 'objectives': OBJECTIVES}[name])
+    return supabase
+
+
+def client_with_rpc(data):
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=data)
+    return supabase
+
+
+def test_rpc_result_is_returned_as_ints():
+    supabase = client_with_rpc({'total': 4, 'not_started': 1, 'in_progress': 1,
+                                'completed': 2, 'cancelled': 0, 'objectives': '2'})
+    stats = load_dashboard_stats(supabase, 'e1')
+    assert stats == {'total': 4, 'not_started': 1, 'in_progress': 1, 'completed': 2, 'cancelled': 0, 'objectives': 2}
+    supabase.rpc.assert_called_once_with('dashboard_stats', {'p_employee_id': 'e1'})
+    supabase.table.assert_not_called()
+
+
+def test_rpc_result_shapes():
+    expected = dict.fromkeys(DASHBOARD_STAT_KEYS, 0)
+    assert shape_dashboard_stats(None) == expected
+    assert shape_dashboard_stats([]) == expected
+    assert shape_dashboard_stats([{'total': 3}]) == {**expected, 'total': 3}
+    assert shape_dashboard_stats('{"completed": 1, "objectives": null}') == {**expected, 'completed': 1}
+
+
+def test_falls_back_to_counting_queries_for_admins():
+    stats = load_dashboard_stats(client_without_rpc(), None)
+    assert stats == {'total': 4, 'not_started': 1, 'in_progress': 1, 'completed': 2, 'cancelled': 0, 'objectives': 2}
+
+
+def test_fallback_scopes_counts_to_the_employee():
+    stats = load_dashboard_stats(client_without_rpc(), 'e1')
+    assert stats == {'total': 3, 'not_started': 1, 'in_progress': 1, 'completed': 1, 'cancelled': 0, 'objectives': 1}
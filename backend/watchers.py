@@ -0,0 +1,163 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+WATCHING = 'watching'
+MUTED = 'muted'
+WATCH_STATES = (WATCHING, MUTED)
+
+# kind -> (table, target column) (migration 013)
+WATCHER_TABLES = {
+    'task': ('task_watchers', 'task_id'),
+    'objective': ('objective_watchers', 'objective_id'),
+}
+
+LOAD_PAGE_SIZE = 1000
+
+
+def get_supabase_client():
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if not supabase_url or not supabase_key:
+        raise Exception("Supabase credentials not configured")
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+
+class WatcherIndex:
+    """Cached task/objective -> {employee_id: state} map of explicit subscriptions.
+
+    A task's assignees, its creator and the admins watch it without a row.
+    task_watchers / objective_watchers rows hold everything else: follows,
+    mutes and employees attached to a note. Following an objective watches
+    all of its tasks; a task-level choice wins over the objective-level one,
+    and either wins over the implicit default.
+
+    Kept current by the watch routes and the task write hooks. Other workers'
+    writes are picked up by comparing the tables' versions at most every
+    WATCHER_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.watchers = {kind: {} for kind in WATCHER_TABLES}    # kind -> target_id -> {employee_id: state}
+        self.versions = {}
+        self.checked_at = 0
+        self.refresh_seconds = int(os.getenv('WATCHER_INDEX_REFRESH_SECONDS', '60'))
+
+    def load(self, supabase, kind):
+        """Rebuild one kind from its table"""
+        table, column = WATCHER_TABLES[kind]
+        by_target, offset = {}, 0
+        while True:
+            rows = (
+                supabase.table(table).select(f"{column}, employee_id, state")
+                .order("created_at").range(offset, offset + LOAD_PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            for row in rows:
+                by_target.setdefault(row[column], {})[row['employee_id']] = row['state']
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+            offset += LOAD_PAGE_SIZE
+        with self.lock:
+            self.watchers[kind] = by_target
+        print(f"👀 Watcher index loaded: {sum(len(w) for w in by_target.values())} {kind} subscriptions")
+
+    def refresh_if_stale(self, supabase):
+        """Reload a kind when another worker changed its table since the last check"""
+        if self.checked_at and time.time() - self.checked_at < self.refresh_seconds:
+            return
+        from etag import table_version
+        for kind, (table, _) in WATCHER_TABLES.items():
+            version = table_version(supabase, table)
+            if version != self.versions.get(kind):
+                self.load(supabase, kind)
+            self.versions[kind] = version
+        self.checked_at = time.time()
+
+    def _apply(self, kind, target_id, employee_id, state):
+        with self.lock:
+            states = self.watchers[kind].setdefault(target_id, {})
+            if state is None:
+                states.pop(employee_id, None)
+            else:
+                states[employee_id] = state
+            if not states:
+                self.watchers[kind].pop(target_id, None)
+
+    # ---------- writes ----------
+
+    def set_state(self, supabase, kind, target_id, employee_id, state):
+        """Follow or mute a task/objective; state None goes back to the default"""
+        table, column = WATCHER_TABLES[kind]
+        if state is None:
+            supabase.table(table).delete().eq(column, target_id).eq("employee_id", employee_id).execute()
+        else:
+            supabase.table(table).upsert({
+                column: target_id,
+                'employee_id': employee_id,
+                'state': state,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }, on_conflict=f"{column},employee_id").execute()
+        self._apply(kind, target_id, employee_id, state)
+
+    def watch_attached(self, supabase, task_id, employee_ids):
+        """Subscribe employees attached to a note, keeping any choice they already made"""
+        with self.lock:
+            known = self.watchers['task'].get(task_id, {})
+            new_ids = sorted({e for e in employee_ids if e and e not in known})
+        if not new_ids:
+            return
+        result = supabase.table("task_watchers").upsert(
+            [{'task_id': task_id, 'employee_id': e, 'state': WATCHING} for e in new_ids],
+            on_conflict="task_id,employee_id", ignore_duplicates=True
+        ).execute()
+        # Only inserted rows come back; an existing mute stays a mute
+        for row in result.data or []:
+            self._apply('task', task_id, row['employee_id'], row['state'])
+
+    def forget(self, kind, target_id):
+        """Drop a deleted task/objective (its rows go with it by cascade)"""
+        with self.lock:
+            self.watchers[kind].pop(target_id, None)
+
+    def forget_employee(self, employee_id):
+        """Drop a deleted employee everywhere"""
+        with self.lock:
+            for by_target in self.watchers.values():
+                for target_id in [t for t, states in by_target.items() if employee_id in states]:
+                    by_target[target_id].pop(employee_id, None)
+                    if not by_target[target_id]:
+                        by_target.pop(target_id, None)
+
+    # ---------- reads ----------
+
+    def explicit_state(self, supabase, kind, target_id, employee_id):
+        """'watching', 'muted' or None when the employee made no choice"""
+        self.refresh_if_stale(supabase)
+        with self.lock:
+            return self.watchers[kind].get(target_id, {}).get(employee_id)
+
+    def task_watchers(self, supabase, task_id, task, admin_ids=()):
+        """Employee ids to notify about activity on a task (task needs assigned_to,
+        assigned_to_multiple, created_by and objective_id)"""
+        self.refresh_if_stale(supabase)
+        implicit = {task.get('assigned_to'), task.get('created_by'), *(task.get('assigned_to_multiple') or []), *admin_ids}
+        states = {employee_id: WATCHING for employee_id in implicit if employee_id}
+        with self.lock:
+            states.update(self.watchers['objective'].get(task.get('objective_id'), {}))
+            states.update(self.watchers['task'].get(task_id, {}))
+        return {employee_id for employee_id, state in states.items() if state == WATCHING}
+
+    def objective_watchers(self, supabase, objective_id, objective, admin_ids=()):
+        """Employee ids watching an objective (objective needs created_by)"""
+        self.refresh_if_stale(supabase)
+        states = {employee_id: WATCHING for employee_id in {objective.get('created_by'), *admin_ids} if employee_id}
+        with self.lock:
+            states.update(self.watchers['objective'].get(objective_id, {}))
+        return {employee_id for employee_id, state in states.items() if state == WATCHING}
+
+
+watcher_index = WatcherIndex()